@@ -8,6 +8,7 @@ import atexit
 import random
 import pathlib
 import traceback
+import threading
 import jsonschema
 import subprocess
 from pathlib import Path
@@ -15,6 +16,7 @@ from sys import executable
 from threading import Thread
 from functools import partial
 from datetime import datetime
+from collections import deque
 
 from rich.text import Text
 from textual import on
@@ -27,6 +29,7 @@ from textual.screen import Screen
 from textual.coordinate import Coordinate
 from textual.theme import Theme
 from textual.widget import Widget
+from textual.worker import get_current_worker
 from textual.widgets import (Button, Checkbox, Footer, Header, Input, Label, Select, Switch,
                              LoadingIndicator, Log, Markdown, Pretty, Rule, Tabs, Tab,
                              Digits, Static, RichLog, DataTable, ContentSwitcher,
@@ -34,17 +37,22 @@ from textual.widgets import (Button, Checkbox, Footer, Header, Input, Label, Sel
 
 from .logger import logger
 from .misc import TILE_2_UNICODE_ART_RICH, VERTICAL_RULE, EMPTY_VERTICAL_RULE, ADDITIONAL_THEMES
-from .libriichi_helper import meta_to_recommend
+from .decision import (AutoplayView, DecisionMailbox, DecisionSnapshot, RecommandationView, RECOMMANDATION_COUNT,
+                       take_snapshot)
 from playwright_client.client import Client
 from playwright_client.autoplay.autoplay import AutoPlay
 from mjai_bot.bot import AkagiBot
 from mjai_bot.controller import Controller
+from mjai_bot.codec import encode_events
+from mjai_bot.pipeline import ReactPipeline
+from mjai_bot.thread_tuner import profile_summary
 from settings import Settings, load_settings, get_settings, get_schema, verify_settings, save_settings
 from settings.settings import settings
 
 playwright_client: Client = None
 mjai_controller: Controller = None
 mjai_bot: AkagiBot = None
+react_pipeline: ReactPipeline = None
 autoplay: AutoPlay = None
 
 # ============================================= #
@@ -134,6 +142,14 @@ class SettingsScreen(Screen):
                     classes="settings__row",
                     id=f"{previous_names}{name}",
                 )
+            case "array" if schema.get("items", {}).get("type") == "integer":
+                # Comma separated, e.g. inference.process_cores
+                return Horizontal(
+                    Label(f"{name}: ", classes="settings__key"),
+                    Input(value=", ".join(str(v) for v in settings), id=f"{previous_names}{name}", type="text", classes="settings__input settings__list"),
+                    classes="settings__row",
+                    id=f"{previous_names}{name}",
+                )
             case "array":
                 raise ValueError(f"Invalid schema: {schema['type']} is not a valid type")
             case _:
@@ -167,14 +183,16 @@ class SettingsScreen(Screen):
                 settings[key] = self.get_settings_from_horizontal(child)
         return settings
     
-    def get_settings_from_horizontal(self, horizontal: Horizontal) -> str | int | bool | float | None:
+    def get_settings_from_horizontal(self, horizontal: Horizontal) -> str | int | bool | float | list[int] | None:
         for child in horizontal.children:
             if isinstance(child, Label):
                 continue
             elif isinstance(child, Select):
                 return str(child.value)
             elif isinstance(child, Input):
-                if child.type == "number":
+                if child.has_class("settings__list"):
+                    return [int(v) for v in child.value.split(",") if v.strip()]
+                elif child.type == "number":
                     return float(child.value)
                 elif child.type == "integer":
                     return int(child.value)
@@ -198,7 +216,12 @@ class SettingsScreen(Screen):
             logger.info("Settings are valid, saving...")
             save_settings(local_settings)
             logger.info("Settings saved")
-            update_model = local_settings["model"] != settings.model
+            # The engine is rebuilt from these, a game in progress is restored into it
+            rebuild_engine = any(
+                local_settings["inference"][key] != getattr(settings.inference, key)
+                for key in ("fuse", "fuse_tolerance", "precision", "calibration_dir", "engine_backend")
+            )
+            update_model = local_settings["model"] != settings.model or rebuild_engine
             # Reload settings
             settings.update(get_settings())
             self.app.notify(
@@ -207,16 +230,8 @@ class SettingsScreen(Screen):
                 severity="information",
             )
             if update_model:
-                if mjai_controller.choose_bot_name(settings.model):
-                    logger.info(f"Selected model: {settings.model}")
-                else:
-                    logger.error(f"Failed to select model: {settings.model}")
-                    self.app.notify(
-                        f"Failed to select model: {settings.model}\n"
-                        "Please check the model name and try again.",
-                        title="Model Error",
-                        severity="error",
-                    )
+                # Already saved above
+                self.app.request_model(settings.model, save=False)
             self.app.pop_screen()
         except Exception as e:
             logger.error("Settings are invalid, not saving")
@@ -253,6 +268,7 @@ class ModelsScreen(Screen):
             Select.from_values(mjai_controller.available_bots_names, id="models_select"),
             Static("Warning: This will restart the bot, do not change model during a match!", id="models_warning"),
             Static("Warning: To play 3P Mahjong, a 3P model is needed.", id="models_warning2"),
+            Static(profile_summary(settings.model), id="models_threads"),
             Button("Select", variant="primary", id="models_select_button"),
             id="models_select_container",
         )
@@ -260,18 +276,10 @@ class ModelsScreen(Screen):
     @on(Button.Pressed, "#models_select_button")
     def models_select_button_clicked(self) -> None:
         """Handle Button.Pressed message sent by Select button."""
-        global mjai_controller, settings
-
         models_select: Select = self.query_one("#models_select")
         selected_model = models_select.value
         if selected_model != Select.BLANK:
-            selected_model_index = mjai_controller.available_bots_names.index(selected_model)
-            if mjai_controller.choose_bot_index(selected_model_index):
-                logger.info(f"Selected model: {selected_model}")
-                settings.model = selected_model
-                settings.save()
-            else:
-                logger.error(f"Failed to select model: {selected_model}")
+            self.app.request_model(selected_model, save=True)
 
         self.app.pop_screen()
 
@@ -415,11 +423,8 @@ class Tehai(Horizontal):
         yield Label(TILE_2_UNICODE_ART_RICH["?"], id="tehai_13") # Tsumo
         self.border_title = "Tehai"
 
-    def update_tehai(self) -> None:
-        global mjai_bot
-
-        tehai: list[str] = mjai_bot.tehai_mjai
-        tsumo: str = mjai_bot.last_self_tsumo
+    def update_tehai(self, tehai: tuple[str, ...], tsumo: str) -> None:
+        tehai: list[str] = list(tehai)
         if len(tehai) in [14, 11, 8, 5, 2]:
             if tsumo in tehai:
                 tehai.remove(tsumo)
@@ -480,109 +485,22 @@ class Recommandation(Horizontal):
         yield Consume(id="recommandation_consume")
         yield Digits(value="00.00", id="recommandation_score")
 
-    def update_recommandation(self, recommand: tuple[str, float]) -> None:
-        global mjai_bot
-        action_name: dict[str, str] = {
-            "reach": "Reach",
-            "chi_low": "Chi",
-            "chi_mid": "Chi",
-            "chi_high": "Chi",
-            "pon": "Pon",
-            "kan_select": "Kan",
-            "hora": "Hora",
-            "ryukyoku": "Ryukyoku",
-            "none": "None",
-            "nukidora": "Nukidora",
-        }
-        if (recommand[0] in action_name):
-            action = action_name[recommand[0]]
-        else:
-            action = "Dahai"
-
+    def update_recommandation(self, view: RecommandationView) -> None:
         recommandation_button: Button = self.query_one("#recommandation_button")
         recommandation_tile: Label = self.query_one("#recommandation_tile")
         recommandation_rule: Label = self.query_one("#recommandation_rule")
-        recommandation_consume: Consume = self.query_one("#recommandation_consume")        
+        recommandation_consume: Consume = self.query_one("#recommandation_consume")
         recommandation_score: Digits = self.query_one("#recommandation_score")
 
-        recommandation_button.label = action
-        recommandation_button.set_classes([action])
-        if recommand[0] in ("reach"):
-            # We don't know the tile to reach, so we use "?"
-            # This is because MJAI protocol doesn't provide the tile to reach
-            assert mjai_bot.can_riichi
-            recommandation_tile.update(TILE_2_UNICODE_ART_RICH["?"])
-            recommandation_rule.update(EMPTY_VERTICAL_RULE)
-            recommandation_consume.clear_consume()
-        elif recommand[0] in ("chi_low", "chi_mid", "chi_high"):
-            chi_candidates = mjai_bot.find_chi_candidates_simple()
-            if recommand[0] == "chi_low":
-                assert mjai_bot.can_chi_low
-                assert chi_candidates.chi_low_meld is not None
-                recommandation_tile.update(TILE_2_UNICODE_ART_RICH[chi_candidates.chi_low_meld[0]])
-                recommandation_rule.update(VERTICAL_RULE)
-                recommandation_consume.update_consume(chi_candidates.chi_low_meld[1])
-            elif recommand[0] == "chi_mid":
-                assert mjai_bot.can_chi_mid
-                assert chi_candidates.chi_mid_meld is not None
-                recommandation_tile.update(TILE_2_UNICODE_ART_RICH[chi_candidates.chi_mid_meld[0]])
-                recommandation_rule.update(VERTICAL_RULE)
-                recommandation_consume.update_consume(chi_candidates.chi_mid_meld[1])
-            elif recommand[0] == "chi_high":
-                assert mjai_bot.can_chi_high
-                assert chi_candidates.chi_high_meld is not None
-                recommandation_tile.update(TILE_2_UNICODE_ART_RICH[chi_candidates.chi_high_meld[0]])
-                recommandation_rule.update(VERTICAL_RULE)
-                recommandation_consume.update_consume(chi_candidates.chi_high_meld[1])
-        elif recommand[0] in ("pon"):
-            assert mjai_bot.can_pon
-            recommandation_tile.update(TILE_2_UNICODE_ART_RICH[mjai_bot.last_kawa_tile])
-            recommandation_rule.update(VERTICAL_RULE)
-            recommandation_consume.update_consume([mjai_bot.last_kawa_tile[:2], mjai_bot.last_kawa_tile[:2]])
-        elif recommand[0] in ("kan_select"):
-            assert mjai_bot.can_kan
-            if mjai_bot.can_daiminkan:
-                # When we can daiminkan, this is the only way to kan.
-                recommandation_tile.update(TILE_2_UNICODE_ART_RICH[mjai_bot.last_kawa_tile])
-                recommandation_rule.update(VERTICAL_RULE)
-                recommandation_consume.update_consume([mjai_bot.last_kawa_tile[:2]]*3)
-            else:
-                # We don't know the tile to kan, so we use "?"
-                # At some rare cases, we can have multiple kan options
-                # but we don't know which one to choose, so we use "?"
-                # This is because of Mortal model's limitation.
-                recommandation_tile.update(TILE_2_UNICODE_ART_RICH["?"])
-                recommandation_rule.update(EMPTY_VERTICAL_RULE)
-                recommandation_consume.clear_consume()
-        elif recommand[0] in ("hora"):
-            assert mjai_bot.can_agari
-            if mjai_bot.can_ron_agari:
-                recommandation_tile.update(TILE_2_UNICODE_ART_RICH[mjai_bot.last_kawa_tile])
-                recommandation_rule.update(EMPTY_VERTICAL_RULE)
-                recommandation_consume.clear_consume()
-            elif mjai_bot.can_tsumo_agari:
-                recommandation_tile.update(TILE_2_UNICODE_ART_RICH[mjai_bot.last_self_tsumo])
-                recommandation_rule.update(EMPTY_VERTICAL_RULE)
-                recommandation_consume.clear_consume()
-        elif recommand[0] in ("ryukyoku"):
-            assert mjai_bot.can_ryukyoku
-            recommandation_tile.update(TILE_2_UNICODE_ART_RICH["?"])
-            recommandation_rule.update(EMPTY_VERTICAL_RULE)
-            recommandation_consume.clear_consume()
-        elif recommand[0] in ("none"):
-            recommandation_tile.update(TILE_2_UNICODE_ART_RICH["?"])
-            recommandation_rule.update(EMPTY_VERTICAL_RULE)
-            recommandation_consume.clear_consume()
-        elif recommand[0] in ("nukidora"):
-            recommandation_tile.update(TILE_2_UNICODE_ART_RICH["N"])
-            recommandation_rule.update(EMPTY_VERTICAL_RULE)
-            recommandation_consume.clear_consume()
+        recommandation_button.label = view.action
+        recommandation_button.set_classes([view.action])
+        recommandation_tile.update(TILE_2_UNICODE_ART_RICH[view.tile])
+        recommandation_rule.update(VERTICAL_RULE if view.rule else EMPTY_VERTICAL_RULE)
+        if view.consume:
+            recommandation_consume.update_consume(list(view.consume))
         else:
-            assert mjai_bot.can_discard
-            recommandation_tile.update(TILE_2_UNICODE_ART_RICH[recommand[0]])
-            recommandation_rule.update(EMPTY_VERTICAL_RULE)
             recommandation_consume.clear_consume()
-        recommandation_score.update(f"{recommand[1]*100:.2f}")
+        recommandation_score.update(f"{view.score*100:.2f}")
 
     def clear_recommandation(self) -> None:
         recommandation_button: Button = self.query_one("#recommandation_button")
@@ -621,7 +539,7 @@ class Recommandations(Vertical):
     """
     Recommandations widget.
     """
-    RECOMMANDATION_COUNT = 3
+    RECOMMANDATION_COUNT = RECOMMANDATION_COUNT
 
     def __init__(self, *args, **kwargs):
         super().__init__(**kwargs)
@@ -631,18 +549,15 @@ class Recommandations(Vertical):
             yield Recommandation(id=f"recommandation_{i}")
         self.border_title = "Top Recommandations"
 
-    def update_recommandation(self, mjai_msg: dict) -> None:
-        global mjai_bot
-        if "meta" not in mjai_msg:
+    def update_recommandation(self, snapshot: DecisionSnapshot) -> None:
+        meta = snapshot.response.get("meta")
+        if not meta or "q_values" not in meta:
             return
-        if "q_values" not in mjai_msg["meta"]:
-            return
-        meta = mjai_msg["meta"]
-        recommands: list[tuple[str, float]] = meta_to_recommend(meta, mjai_bot.is_3p)
+        views = snapshot.recommandations
         for i in range(self.RECOMMANDATION_COUNT):
             recommand: Recommandation = self.query_one(f"#recommandation_{i}")
-            if i < len(recommands):
-                recommand.update_recommandation(recommands[i])
+            if i < len(views):
+                recommand.update_recommandation(views[i])
             else:
                 recommand.clear_recommandation()
 
@@ -662,7 +577,6 @@ class BestAction(Horizontal):
         self.border_title = "Suggestion"
 
     def update_best_action(self, mjai_msg: dict) -> None:
-        global mjai_bot
         action_name: dict[str, str] = {
             "dahai": "Dahai",
             "chi": "Chi",
@@ -784,20 +698,12 @@ class BotStatus(Vertical):
         )
         self.border_title = "Bot Status"
 
-    def update_bot_status(self) -> None:
+    def update_bot_status(self, attributes: tuple) -> None:
         """
-        Update the bot status table with the current bot status.
+        Update the bot status table with the bot status of a decision snapshot
+        (values in the order of `BOT_STATUS_FIELDS`).
         """
-        global mjai_bot
-
         mjai_bot_status: DataTable = self.query_one("#mjai_bot_status")
-        attributes = [
-            mjai_bot.player_id, mjai_bot.target_actor, mjai_bot.target_actor_rel, mjai_bot.can_act,
-            mjai_bot.can_discard, mjai_bot.can_riichi, mjai_bot.can_chi, mjai_bot.can_chi_low,
-            mjai_bot.can_chi_mid, mjai_bot.can_chi_high, mjai_bot.can_pon, mjai_bot.can_kan,
-            mjai_bot.can_daiminkan, mjai_bot.can_ankan, mjai_bot.can_kakan, mjai_bot.can_agari,
-            mjai_bot.can_ron_agari, mjai_bot.can_tsumo_agari, mjai_bot.can_ryukyoku, mjai_bot.can_pass
-        ]
         for row, attribute in enumerate(attributes):
             if isinstance(attribute, bool):
                 new_attribute = Text(str(attribute))
@@ -862,16 +768,35 @@ class AkagiApp(App):
         ("z", "help_screen_zh", "Help (中文)"),
     ]
 
+    class DecisionReady(Message):
+        """
+        Posted by the react worker when a decision snapshot is waiting in the mailbox.
+        """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.autoplay_mjai_msg: dict | None = None
+        self.decisions = DecisionMailbox()
+        # textual.events.Event shadows threading.Event in this module
+        self.react_wake = threading.Event()
+        # Model switches for the react worker, the only thread touching the Controller
+        self.model_requests: deque[tuple[str, bool]] = deque()
+        # frame arrival -> suggestion rendered, in seconds
+        self.suggestion_latency: deque[float] = deque(maxlen=512)
 
     def on_mount(self) -> None:
-        global settings, mjai_controller
+        global settings, mjai_controller, playwright_client
         # ============================================= #
         #                   Main Loop                   #
         # ============================================= #
-        self.main_loop_timer = self.set_interval(1 / 20, self.main_loop)
+        # Inference runs in a worker thread, the UI only renders its snapshots.
+        # Event-driven: the Playwright thread wakes the worker.
+        # AKAGI_POLL_HZ > 0 restores timer polling, e.g. to compare latencies.
+        poll_hz = float(os.getenv("AKAGI_POLL_HZ", "0"))
+        if poll_hz <= 0:
+            playwright_client.set_listener(self.react_wake.set)
+        self.run_worker(partial(self.react_worker, poll_hz), name="react", thread=True, exclusive=True)
+        self.warmup_timer = self.set_interval(1 / 2, self.update_warmup_status)
 
         # ============================================= #
         #                  Screens                      #
@@ -899,7 +824,7 @@ class AkagiApp(App):
         # ============================================= #
         #                   Models                      #
         # ============================================= #
-        if mjai_controller.bot is None:
+        if mjai_controller.bot_name is None:
             self.notify(
                 "No bot selected, please make sure you have bots installed in ./mjai_bot directory",
                 title="Bot Error",
@@ -952,63 +877,155 @@ class AkagiApp(App):
         )
         yield Footer()
 
-    def main_loop(self) -> None:
+    def react_worker(self, poll_hz: float) -> None:
         """
-        Main loop for the application.
+        Owns the Controller and AkagiBot: reacts to mjai messages off the UI
+        thread and hands the results to the UI as decision snapshots.
         """
-        try:
-            global playwright_client, mjai_controller, mjai_bot, settings
-            if not playwright_client.running:
-                return
-            mjai_msgs = playwright_client.dump_messages()
-            if mjai_msgs:
-                # ============================================= #
-                #                React to MJAI                  #
-                # ============================================= #
-                mjai_in_log: RichLog = self.query_one("#mjai_in_log")
+        global playwright_client, mjai_bot
+        worker = get_current_worker()
+        interval = 1 / poll_hz if poll_hz > 0 else 0.5
+        seq = 0
+        while not worker.is_cancelled:
+            self.react_wake.wait(interval)
+            self.react_wake.clear()
+            try:
+                # Between batches: nothing reacts while the model is swapped
+                while self.model_requests:
+                    if self.switch_model(*self.model_requests.popleft()):
+                        # A game taken over mid-hanchan: render its pending decision now
+                        restored = react_pipeline.take_restored()
+                        if restored is not None:
+                            seq += 1
+                            snapshot = take_snapshot(seq, None, [], restored, mjai_bot)
+                            if self.decisions.publish(snapshot):
+                                self.post_message(self.DecisionReady())
+                if not playwright_client.running:
+                    continue
+                mjai_msgs = playwright_client.dump_messages()
+                if not mjai_msgs:
+                    continue
+                arrived_at = playwright_client.last_arrival
                 for mjai_msg in mjai_msgs:
                     logger.debug(f"-> {mjai_msg}")
-                    mjai_in_log.write(mjai_msg)
-                mjai_response = mjai_controller.react(mjai_msgs)
+                # Encode once, both the controller and the tracking bot feed the same lines to libriichi
+                mjai_lines = encode_events(mjai_msgs)
+                # Mortal and the strategy layer run concurrently, only Mortal is waited for
+                mjai_response = react_pipeline.react(mjai_msgs, mjai_lines)
                 logger.debug(f"<- {mjai_response}")
-                mjai_bot.react(input_list=mjai_msgs)
-                mjai_out_log: RichLog = self.query_one("#mjai_out_log")
-                if (
-                    ((mjai_response["type"] != "none" or mjai_bot.can_act   ) and (not mjai_bot.is_3p)) or
-                    ((mjai_response["type"] != "none" or mjai_bot.can_act_3p) and (    mjai_bot.is_3p))
-                ):
-                    mjai_out_log.write(mjai_response)
-                # ============================================= #
-                #             Update Widgets and UI             #
-                # ============================================= #
-                bot_status: BotStatus = self.query_one("#bot_status")
-                bot_status.update_bot_status()
-                tehai: Tehai = self.query_one("#tehai")
-                tehai.update_tehai()
-                best_action: BestAction = self.query_one("#best_action")
-                best_action.update_best_action(mjai_response)
-                recommandation: Recommandations = self.query_one("#recommandation")
-                recommandation.update_recommandation(mjai_response)
-                # ============================================= #
-                #             Autoplay and Actions              #
-                # ============================================= #
-                if (
-                    ((mjai_response["type"] != "none" or mjai_bot.can_act   ) and (not mjai_bot.is_3p)) or
-                    ((mjai_response["type"] != "none" or mjai_bot.can_act_3p) and (    mjai_bot.is_3p))
-                ):
-                    if settings.autoplay:
-                        self.set_timer(0.1, partial(self.autoplay, mjai_response))
+                seq += 1
+                snapshot = take_snapshot(seq, arrived_at, mjai_msgs, mjai_response, mjai_bot)
+                if self.decisions.publish(snapshot):
+                    self.post_message(self.DecisionReady())
+            except Exception:
+                logger.error(f"Error in react worker: {traceback.format_exc()}")
+
+    def request_model(self, model: str, save: bool) -> None:
+        """
+        Switch to `model` from the react worker, between two batches.
+
+        :param save: store the model in the settings once it is selected
+        """
+        self.model_requests.append((model, save))
+        self.react_wake.set()
+
+    def switch_model(self, model: str, save: bool) -> bool:
+        """
+        Runs on the react worker. A game in progress is handed over to the new model,
+        or to a rebuild of the current one if it is chosen again.
+        """
+        global mjai_controller, settings
+        if mjai_controller.choose_bot_name(model, restore=True):
+            logger.info(f"Selected model: {model}")
+            if save:
+                settings.model = model
+                settings.save()
+            return True
+        else:
+            logger.error(f"Failed to select model: {model}")
+            self.call_from_thread(
+                self.notify,
+                f"Failed to select model: {model}\n"
+                "Please check the model name and try again.",
+                title="Model Error",
+                severity="error",
+            )
+            return False
+
+    @on(DecisionReady)
+    def main_loop(self) -> None:
+        """
+        Render the newest decision snapshot. Older snapshots the UI did not
+        get to draw have been dropped; only their log lines are written.
+        """
+        try:
+            global settings
+            snapshot, in_log, out_log = self.decisions.take()
+            if snapshot is None:
+                return
+            mjai_in_log: RichLog = self.query_one("#mjai_in_log")
+            for mjai_msg in in_log:
+                mjai_in_log.write(mjai_msg)
+            mjai_out_log: RichLog = self.query_one("#mjai_out_log")
+            for mjai_response in out_log:
+                mjai_out_log.write(mjai_response)
+            # ============================================= #
+            #             Update Widgets and UI             #
+            # ============================================= #
+            bot_status: BotStatus = self.query_one("#bot_status")
+            bot_status.update_bot_status(snapshot.bot_status)
+            tehai: Tehai = self.query_one("#tehai")
+            tehai.update_tehai(snapshot.tehai, snapshot.tsumo)
+            best_action: BestAction = self.query_one("#best_action")
+            best_action.update_best_action(snapshot.response)
+            recommandation: Recommandations = self.query_one("#recommandation")
+            recommandation.update_recommandation(snapshot)
+            if snapshot.arrived_at is not None:
+                self.suggestion_latency.append(time.perf_counter() - snapshot.arrived_at)
+            # ============================================= #
+            #             Autoplay and Actions              #
+            # ============================================= #
+            if snapshot.actionable and settings.autoplay:
+                # Autoplay reads the bot state captured with the snapshot, never the live bot,
+                # and gets its own copy of the response, which it may rewrite
+                self.set_timer(0.1, partial(self.autoplay, dict(snapshot.response), snapshot.autoplay))
         except Exception as e:
             logger.error(f"Error in main loop: {traceback.format_exc()}")
 
-    def autoplay(self, mjai_response: dict) -> None:
+    def update_warmup_status(self) -> None:
+        """
+        Show the model warm-up progress in the header until inference is hot.
+        """
+        global mjai_controller
+        finished, total = mjai_controller.warmup_progress
+        if finished < total:
+            self.sub_title = f"Warming up models {finished}/{total}"
+            return
+        self.warmup_timer.stop()
+        failed = [name for name, status in mjai_controller.warmup_status.items() if status == "failed"]
+        if failed:
+            self.sub_title = f"Warm-up failed: {', '.join(failed)}"
+            self.notify(
+                f"Failed to preload: {', '.join(failed)}",
+                title="Model Warm-up",
+                severity="warning",
+            )
+        elif mjai_controller.time_to_ready is not None:
+            self.sub_title = f"Inference ready ({mjai_controller.time_to_ready:.1f}s)"
+            self.notify(
+                f"Models ready in {mjai_controller.time_to_ready:.1f}s",
+                title="Model Warm-up",
+                severity="information",
+            )
+
+    def autoplay(self, mjai_response: dict, bot_view: AutoplayView | None) -> None:
         """
         Autoplay function to handle MJAI messages.
         """
         global autoplay, playwright_client, mjai_controller
 
         try:
-            act_result = autoplay.act(mjai_response)
+            act_result = autoplay.act(mjai_response, bot_view)
             if not act_result:
                 logger.warning("Action not preformed.")
                 self.app.notify(
@@ -1089,15 +1106,15 @@ def main():
     """
     Main entry point for Akagi.
     """
-    global playwright_client, mjai_controller, mjai_bot, settings, autoplay
+    global playwright_client, mjai_controller, mjai_bot, react_pipeline, settings, autoplay
 
     logger.info("Starting Akagi...")
     playwright_client = Client()
     logger.info(f"Starting MJAI controller")
     mjai_controller = Controller()
     mjai_bot = AkagiBot()
+    react_pipeline = ReactPipeline(mjai_controller, mjai_bot)
     autoplay = AutoPlay()
-    autoplay.set_bot(mjai_bot)
     autoplay.set_client(playwright_client)
 
     logger.info("Starting App...")
@@ -1107,5 +1124,14 @@ def main():
     except KeyboardInterrupt:
         logger.info("Stopping Akagi...")
     playwright_client.stop()
+    react_pipeline.shutdown()
+    if app.decisions.dropped:
+        logger.info(f"Dropped {app.decisions.dropped} stale decision snapshots")
+    if app.suggestion_latency:
+        latencies = sorted(app.suggestion_latency)
+        logger.info(
+            f"Frame-to-suggestion latency: mean {sum(latencies) / len(latencies) * 1000:.1f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms over {len(latencies)} batches"
+        )
     logger.info("Akagi stopped")
     sys.exit(0)
@@ -0,0 +1,229 @@
+"""
+Immutable decision snapshots passed from the react worker to the UI.
+
+The worker owns the Controller and AkagiBot: it reacts to mjai messages and
+captures everything the widgets draw into a `DecisionSnapshot`. The UI only
+renders snapshots, taken from a `DecisionMailbox` that keeps the newest one
+and drops those the UI did not get to draw.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from mjai_bot.bot import AkagiBot
+from .logger import logger
+from .libriichi_helper import meta_to_recommend
+
+RECOMMANDATION_COUNT = 3
+
+BOT_STATUS_FIELDS = (
+    "player_id", "target_actor", "target_actor_rel", "can_act",
+    "can_discard", "can_riichi", "can_chi", "can_chi_low",
+    "can_chi_mid", "can_chi_high", "can_pon", "can_kan",
+    "can_daiminkan", "can_ankan", "can_kakan", "can_agari",
+    "can_ron_agari", "can_tsumo_agari", "can_ryukyoku", "can_pass",
+)
+
+ACTION_NAME: dict[str, str] = {
+    "reach": "Reach",
+    "chi_low": "Chi",
+    "chi_mid": "Chi",
+    "chi_high": "Chi",
+    "pon": "Pon",
+    "kan_select": "Kan",
+    "hora": "Hora",
+    "ryukyoku": "Ryukyoku",
+    "none": "None",
+    "nukidora": "Nukidora",
+}
+
+
+@dataclass(frozen=True)
+class RecommandationView:
+    action: str                 # button label
+    tile: str                   # mjai tile, "?" when unknown
+    rule: bool                  # draw the vertical rule before consume
+    consume: tuple[str, ...]
+    score: float
+
+
+@dataclass(frozen=True)
+class DecisionSnapshot:
+    seq: int
+    arrived_at: Optional[float]           # time.perf_counter() of the oldest frame
+    messages: tuple[dict, ...]            # mjai messages fed to the bots
+    response: dict                        # Mortal response, read-only
+    actionable: bool                      # the response should be logged / played
+    bot_status: tuple                     # values of BOT_STATUS_FIELDS
+    tehai: tuple[str, ...]
+    tsumo: str
+    recommandations: tuple[RecommandationView, ...]
+    autoplay: Optional["AutoplayView"] = None   # set when actionable
+
+
+@dataclass(frozen=True)
+class AutoplayView:
+    """
+    The part of AkagiBot that autoplay reads to place its clicks, captured
+    with the snapshot, so autoplay never reads the bot the worker is updating.
+    Quacks like AkagiBot for `AutoPlayMajsoul`.
+    """
+    player_id: Optional[int]
+    dealer: Optional[int]
+    self_riichi_accepted: bool
+    last_kawa_tile: str
+    last_self_tsumo: str
+    tehai_mjai: tuple[str, ...]
+    tehai_vec34: tuple[int, ...]
+    can_discard: bool
+    can_chi: bool
+    can_pon: bool
+    can_ankan: bool
+    can_daiminkan: bool
+    can_kakan: bool
+    can_riichi: bool
+    can_tsumo_agari: bool
+    can_ron_agari: bool
+    can_ryukyoku: bool
+    chi_consumes: tuple[tuple[str, ...], ...]
+    pon_consumes: tuple[tuple[str, ...], ...]
+
+    def find_chi_consume_simple(self) -> list[list[str]]:
+        return [list(consumed) for consumed in self.chi_consumes]
+
+    def find_pon_consume_simple(self) -> list[list[str]]:
+        return [list(consumed) for consumed in self.pon_consumes]
+
+
+def autoplay_view(bot: AkagiBot) -> AutoplayView:
+    state = bot.state
+    return AutoplayView(
+        player_id=bot.player_id,
+        dealer=state.dealer if state is not None else None,
+        self_riichi_accepted=bot.self_riichi_accepted,
+        last_kawa_tile=bot.last_kawa_tile,
+        last_self_tsumo=bot.last_self_tsumo,
+        tehai_mjai=tuple(bot.tehai_mjai),
+        tehai_vec34=tuple(bot.tehai_vec34),
+        can_discard=bot.can_discard,
+        can_chi=bot.can_chi,
+        can_pon=bot.can_pon,
+        can_ankan=bot.can_ankan,
+        can_daiminkan=bot.can_daiminkan,
+        can_kakan=bot.can_kakan,
+        can_riichi=bot.can_riichi,
+        can_tsumo_agari=bot.can_tsumo_agari,
+        can_ron_agari=bot.can_ron_agari,
+        can_ryukyoku=bot.can_ryukyoku,
+        chi_consumes=tuple(tuple(c) for c in bot.find_chi_consume_simple()) if bot.can_chi else (),
+        pon_consumes=tuple(tuple(c) for c in bot.find_pon_consume_simple()) if bot.can_pon else (),
+    )
+
+
+def recommandation_view(recommand: tuple[str, float], bot: AkagiBot) -> RecommandationView:
+    """
+    Resolve the tiles shown for one (label, probability) recommendation.
+    """
+    label, score = recommand
+    action = ACTION_NAME.get(label, "Dahai")
+    tile, rule, consume = "?", False, ()
+    if label == "reach":
+        # We don't know the tile to reach, so we use "?"
+        # This is because MJAI protocol doesn't provide the tile to reach
+        assert bot.can_riichi
+    elif label in ("chi_low", "chi_mid", "chi_high"):
+        chi_candidates = bot.find_chi_candidates_simple()
+        assert getattr(bot, f"can_{label}")
+        meld = getattr(chi_candidates, f"{label}_meld")
+        assert meld is not None
+        tile, rule, consume = meld[0], True, tuple(meld[1])
+    elif label == "pon":
+        assert bot.can_pon
+        tile, rule, consume = bot.last_kawa_tile, True, (bot.last_kawa_tile[:2],) * 2
+    elif label == "kan_select":
+        assert bot.can_kan
+        if bot.can_daiminkan:
+            # When we can daiminkan, this is the only way to kan.
+            tile, rule, consume = bot.last_kawa_tile, True, (bot.last_kawa_tile[:2],) * 3
+        # Otherwise we don't know the tile to kan (Mortal model's limitation), so we use "?"
+    elif label == "hora":
+        assert bot.can_agari
+        if bot.can_ron_agari:
+            tile = bot.last_kawa_tile
+        elif bot.can_tsumo_agari:
+            tile = bot.last_self_tsumo
+    elif label in ("ryukyoku", "none"):
+        pass
+    elif label == "nukidora":
+        tile = "N"
+    else:
+        assert bot.can_discard
+        tile = label
+    return RecommandationView(action, tile, rule, consume, score)
+
+
+def take_snapshot(seq: int, arrived_at: Optional[float], messages: list[dict], response: dict,
+                  bot: AkagiBot) -> DecisionSnapshot:
+    """
+    Capture what the widgets need from the bot right after it reacted.
+    Runs on the worker thread, so nothing here may touch widgets.
+    """
+    actionable = response["type"] != "none" or (bot.can_act_3p if bot.is_3p else bot.can_act)
+    recommandations: list[RecommandationView] = []
+    meta = response.get("meta")
+    if meta and "q_values" in meta:
+        for recommand in meta_to_recommend(meta, bot.is_3p)[:RECOMMANDATION_COUNT]:
+            try:
+                recommandations.append(recommandation_view(recommand, bot))
+            except Exception as e:
+                logger.error(f"Failed to resolve recommandation {recommand}: {e}")
+                break
+    return DecisionSnapshot(
+        seq=seq,
+        arrived_at=arrived_at,
+        messages=tuple(messages),
+        response=response,
+        actionable=actionable,
+        bot_status=tuple(getattr(bot, name) for name in BOT_STATUS_FIELDS),
+        tehai=tuple(bot.tehai_mjai),
+        tsumo=bot.last_self_tsumo,
+        recommandations=tuple(recommandations),
+        autoplay=autoplay_view(bot) if actionable else None,
+    )
+
+
+class DecisionMailbox(object):
+    """
+    Single-slot hand-off with backpressure: a snapshot the UI has not drawn yet
+    is replaced by a newer one. Log lines of replaced snapshots are kept, so
+    the MJAI in/out logs stay complete.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: Optional[DecisionSnapshot] = None
+        self._in_log: list[dict] = []
+        self._out_log: list[dict] = []
+        self.dropped = 0
+
+    def publish(self, snapshot: DecisionSnapshot) -> bool:
+        """
+        :return: True if the UI has to be woken, False if a wake-up is already pending
+        """
+        with self._lock:
+            pending = self._latest is not None
+            if pending:
+                self.dropped += 1
+            self._latest = snapshot
+            self._in_log.extend(snapshot.messages)
+            if snapshot.actionable:
+                self._out_log.append(snapshot.response)
+        return not pending
+
+    def take(self) -> tuple[Optional[DecisionSnapshot], list[dict], list[dict]]:
+        """
+        :return: the newest snapshot, and the in / out log lines since the last take
+        """
+        with self._lock:
+            snapshot, self._latest = self._latest, None
+            in_log, self._in_log = self._in_log, []
+            out_log, self._out_log = self._out_log, []
+        return snapshot, in_log, out_log
@@ -1,6 +1,32 @@
 import numpy as np
 
-def meta_to_recommend(meta: dict, is_3p=False) -> dict:
+MASK_UNICODE_4P = [
+    "1m", "2m", "3m", "4m", "5m", "6m", "7m", "8m", "9m",
+    "1p", "2p", "3p", "4p", "5p", "6p", "7p", "8p", "9p",
+    "1s", "2s", "3s", "4s", "5s", "6s", "7s", "8s", "9s",
+     "E",  "S",  "W",  "N",  "P",  "F",  "C",
+    '5mr', '5pr', '5sr', 
+    'reach', 'chi_low', 'chi_mid', 'chi_high', 'pon', 'kan_select', 'hora', 'ryukyoku', 'none'
+]
+MASK_UNICODE_3P = [
+    "1m", "2m", "3m", "4m", "5m", "6m", "7m", "8m", "9m",
+    "1p", "2p", "3p", "4p", "5p", "6p", "7p", "8p", "9p",
+    "1s", "2s", "3s", "4s", "5s", "6s", "7s", "8s", "9s",
+     "E",  "S",  "W",  "N",  "P",  "F",  "C",
+    '5mr', '5pr', '5sr', 
+    'reach', 'pon', 'kan_select', 'nukidora', 'hora', 'ryukyoku', 'none'
+]
+_MASK_LABELS_4P = np.array(MASK_UNICODE_4P)
+_MASK_LABELS_3P = np.array(MASK_UNICODE_3P)
+_MASK_BIT_SHIFTS = np.arange(46, dtype=np.uint64)
+
+def mask_bits_to_array(mask_bits: int) -> np.ndarray:
+    """
+    Decode libriichi's `mask_bits` (bit i set = action i legal) into a (46,) bool array.
+    """
+    return ((np.uint64(mask_bits) >> _MASK_BIT_SHIFTS) & np.uint64(1)).astype(bool)
+
+def meta_to_recommend(meta: dict, is_3p=False) -> list[tuple[str, float]]:
     # """
     # {
     #     "q_values":[
@@ -22,88 +48,25 @@ def meta_to_recommend(meta: dict, is_3p=False) -> dict:
     #     "eval_time_ns":357088300
     # }
     # """
+    # q_values holds only the legal actions, in action order.
+    # Both fields may also be numpy arrays (a bool mask instead of mask_bits).
+    labels = _MASK_LABELS_3P if is_3p else _MASK_LABELS_4P
+    q_values = np.asarray(meta['q_values'], dtype=float)
+    if q_values.size == 0:
+        return []
+    mask = meta.get('mask')
+    if mask is None:
+        mask = mask_bits_to_array(meta['mask_bits'])
+    # The 3p action space is shorter, its mask never sets the trailing bits
+    mask = np.asarray(mask, dtype=bool)[:len(labels)]
 
-    recommend = []
-
-    mask_unicode_4p = [
-        "1m", "2m", "3m", "4m", "5m", "6m", "7m", "8m", "9m",
-        "1p", "2p", "3p", "4p", "5p", "6p", "7p", "8p", "9p",
-        "1s", "2s", "3s", "4s", "5s", "6s", "7s", "8s", "9s",
-         "E",  "S",  "W",  "N",  "P",  "F",  "C",
-        '5mr', '5pr', '5sr', 
-        'reach', 'chi_low', 'chi_mid', 'chi_high', 'pon', 'kan_select', 'hora', 'ryukyoku', 'none'
-    ]
-    mask_unicode_3p = [
-        "1m", "2m", "3m", "4m", "5m", "6m", "7m", "8m", "9m",
-        "1p", "2p", "3p", "4p", "5p", "6p", "7p", "8p", "9p",
-        "1s", "2s", "3s", "4s", "5s", "6s", "7s", "8s", "9s",
-         "E",  "S",  "W",  "N",  "P",  "F",  "C",
-        '5mr', '5pr', '5sr', 
-        'reach', 'pon', 'kan_select', 'nukidora', 'hora', 'ryukyoku', 'none'
-    ]
-    if is_3p:
-        mask_unicode = mask_unicode_3p
-    else:
-        mask_unicode = mask_unicode_4p
-    
-    def mask_bits_to_binary_string(mask_bits):
-        binary_string = bin(mask_bits)[2:]
-        binary_string = binary_string.zfill(46)
-        return binary_string
-
-    def mask_bits_to_bool_list(mask_bits):
-        binary_string = mask_bits_to_binary_string(mask_bits)
-        bool_list = []
-        for bit in binary_string[::-1]:
-            bool_list.append(bit == '1')
-        return bool_list
-
-    def eq(l, r):
-        # Check for approximate equality using numpy's floating-point epsilon
-        return np.abs(l - r) <= np.finfo(float).eps
-
-    def softmax(arr, temperature=1.0):
-        arr = np.array(arr, dtype=float)  # Ensure the input is a numpy array of floats
-        
-        if arr.size == 0:
-            return arr  # Return the empty array if input is empty
-
-        if not eq(temperature, 1.0):
-            arr /= temperature  # Scale by temperature if temperature is not approximately 1
-
-        # Shift values by max for numerical stability
-        max_val = np.max(arr)
-        arr = arr - max_val
-        
-        # Apply the softmax transformation
-        exp_arr = np.exp(arr)
-        sum_exp = np.sum(exp_arr)
-        
-        softmax_arr = exp_arr / sum_exp
-        
-        return softmax_arr
-
-    def scale_list(list):
-        scaled_list = softmax(list)
-        return scaled_list
-    q_values = meta['q_values']
-    mask_bits = meta['mask_bits']
-    mask = mask_bits_to_bool_list(mask_bits)
-    scaled_q_values = scale_list(q_values)
-    q_value_idx = 0
-
-    true_count = 0
-    for i in range(46):
-        if mask[i]:
-            true_count += 1
-
-    for i in range(46):
-        if mask[i]:
-            recommend.append((mask_unicode[i], scaled_q_values[q_value_idx]))
-            q_value_idx += 1
+    # Softmax over the legal actions, shifted by max for numerical stability
+    exp_q = np.exp(q_values - q_values.max())
+    probs = exp_q / exp_q.sum()
 
-    recommend = sorted(recommend, key=lambda x: x[1], reverse=True)
-    return recommend
+    # Stable sort keeps action order between equal probabilities, like sorted(reverse=True)
+    order = np.argsort(-probs, kind='stable')
+    return list(zip(labels[mask][order].tolist(), probs[order].tolist()))
 
 def state_to_tehai(state) -> tuple[list[str], str]:
     tehai34 = state.tehai # with tsumohai, no aka marked
@@ -0,0 +1,89 @@
+"""
+Import-time breakdown of Akagi's startup (`python run_akagi.py --profile-startup`).
+
+Each phase is imported in a fresh interpreter with `-X importtime`, so the
+numbers do not depend on what is already loaded:
+
+- "ui": everything imported before the UI can appear (akagi.akagi)
+- "bot:<name>": the deferred import of each bot's entry module, which now
+  happens on first selection or in the background preload
+"""
+import sys
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+# Singled out in the report, the protobuf descriptor pool of the Majsoul protocol
+HIGHLIGHT_MODULES = ("playwright_client.bridge.majsoul.liqi_proto.liqi_pb2",)
+TOP_N = 15
+
+
+def import_times(module: str) -> list[tuple[str, int, int]]:
+    """
+    :return: (module, self us, cumulative us) for every module the import pulled in
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"import {module} failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(phase: str, module: str) -> float:
+    """
+    Print the breakdown of one phase.
+
+    :return: total import time in seconds
+    """
+    try:
+        rows = import_times(module)
+    except RuntimeError as e:
+        print(f"\n[{phase}] import {module} failed: {e}")
+        return 0.
+    total = sum(self_us for _, self_us, _ in rows) / 1e6
+    print(f"\n[{phase}] import {module}: {total:.3f}s, {len(rows)} modules")
+
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    print(f"  {'top-level package':<48} {'self ms':>10}")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:TOP_N]:
+        print(f"  {package:<48} {us / 1000:10.1f}")
+
+    print(f"  {'module':<48} {'cumul ms':>10} {'self ms':>10}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:TOP_N]:
+        print(f"  {name[-48:]:<48} {cumulative_us / 1000:10.1f} {self_us / 1000:10.1f}")
+    for name, self_us, cumulative_us in rows:
+        if name in HIGHLIGHT_MODULES:
+            print(f"  * {name}: {cumulative_us / 1000:.1f}ms cumulative, {self_us / 1000:.1f}ms self")
+    return total
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    sys.path.insert(0, str(ROOT))
+    from mjai_bot.manifest import discover_bots
+
+    print("Akagi startup import profile")
+    totals = {"ui": report("ui", "akagi.akagi")}
+    for manifest in discover_bots():
+        module_name = manifest.entry.split(":")[0]
+        totals[f"bot:{manifest.name}"] = report(f"bot:{manifest.name}", f"mjai_bot.{manifest.name}.{module_name}")
+
+    print("\nSummary (bots are imported on selection / preload, not before the UI)")
+    for phase, total in totals.items():
+        print(f"  {phase:<24} {total:8.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -5,25 +5,14 @@ Decision -> Bridge (Akagi) action dictionary adapter.
 Conforms to the Bridge's expected tile notation and action keys.
 """
 from typing import Dict, Any, Optional, List
-from .majiang_ai_port import is_red5, to_base_tile
+from . import tiles
 
-# Bridge準拠の牌表記（赤5は 5mr/5pr/5sr、字牌は E/S/W/N/P/F/C）
-Z_TO_LETTER = {'z1':'E','z2':'S','z3':'W','z4':'N','z5':'P','z6':'F','z7':'C'}
+# Bridge準拠の牌表記（赤5は 5mr/5pr/5sr、字牌は E/S/W/N/P/F/C）= mjai 表記
 
 def to_bridge_tile(t: str) -> str:
-    # すでに Bridge 形式ならそのまま
-    if t in ('E','S','W','N','P','F','C') or len(t)==3 and t in ('5mr','5pr','5sr'):
-        return t
-    # 赤5（m5r/p5r/s5r）→ 5mr/5pr/5sr
-    if is_red5(t):
-        return f"5{t[0]}r"
-    # 字牌 z1..z7 → E/S/W/N/P/F/C
-    if t.startswith('z'):
-        return Z_TO_LETTER.get(t, t)
-    # 数牌 m/p/s + 1..9 → 1m/.. の並び（Bridgeは数字→スート順）
-    if t[0] in ('m','p','s') and t[1].isdigit():
-        return f"{t[1]}{t[0]}"
-    return t
+    # m1/z1/m5r も 1m/E/5mr もそのまま mjai 表記へ、不明な表記は素通し
+    i = tiles.FROM_ANY.get(t)
+    return t if i is None else tiles.MJAI[i]
 
 def to_bridge_tiles(tiles: List[str]) -> List[str]:
     return [to_bridge_tile(x) for x in tiles]
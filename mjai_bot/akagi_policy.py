@@ -127,7 +127,7 @@ def _risk_budget(ctx) -> float:
     is_last = _is_last(ctx.my_score, ctx.other_scores)
 
     # --- 局の価値による大枠（既存ロジック） ---
-    rn = max(1, int(getattr(ctx, "round_number", 1)))
+    rn = max(1, int(ctx.round_number))
 
     # 東1〜東2はわずかに押し寄り
     if rn <= 2:
@@ -162,7 +162,7 @@ def _risk_budget(ctx) -> float:
 
 
 def _expected_ura_coef(ctx) -> float:
-    return 1.0 + 0.02 * max(0.0, min(1.0, getattr(ctx, "ura_luck", 0.0)))
+    return 1.0 + 0.02 * max(0.0, min(1.0, ctx.ura_luck))
 
 def _renchan_value(ctx) -> float:
     if not ctx.is_dealer:
@@ -203,9 +203,9 @@ def _prob_affine(p, mul=1.0, add=0.0, lo=0.0, hi=1.0):
 # small: normalization at EV entry
 
 def _normalize_core(ctx):
-    win  = _clamp01(float(getattr(ctx, "win_rate", 0.0) or 0.0))
-    lose = _clamp01(float(getattr(ctx, "deal_in_rate", 0.0) or 0.0))
-    bp   = max(1000.0, float(getattr(ctx, "basepoint", 0.0) or 0.0))
+    win  = _clamp01(float(ctx.win_rate or 0.0))
+    lose = _clamp01(float(ctx.deal_in_rate or 0.0))
+    bp   = max(1000.0, float(ctx.basepoint or 0.0))
     return win, lose, bp
 
 
@@ -222,9 +222,9 @@ def _soft_defend_scale(defend_value: float, keep_value: float, s: float = 0.15)
 def _apply_table_bonus_to_bp(bp: float, ctx) -> float:
     try:
         bonus = 0.0
-        rs = max(0, int(getattr(ctx, "riichi_sticks_on_table", 0)))
-        hb = max(0, int(getattr(ctx, "honba_count", 0)))
-        wr = max(0.0, min(1.0, float(getattr(ctx, "win_rate", 0.0))))
+        rs = max(0, int(ctx.riichi_sticks_on_table))
+        hb = max(0, int(ctx.honba_count))
+        wr = max(0.0, min(1.0, float(ctx.win_rate)))
         if rs: bonus += 1000.0 * wr
         if hb: bonus += 300.0 * wr * hb
         return float(bp) + bonus
@@ -242,10 +242,10 @@ def _step_gain(effective_bp: float, need_bp: float, turns_left: int) -> float:
 
 
 def _goal_pressure(ctx, effective_bp: float) -> float:
-    tbl = getattr(ctx, "required_bp_table", None) or {}
-    need_top = tbl.get("top", getattr(ctx, "required_points_for_top", 0) or 0)
-    need_second = tbl.get("second", getattr(ctx, "required_points_for_next_rank", 0) or 0)
-    turns = max(0, int(getattr(ctx, "turns_left", 0)))
+    tbl = ctx.required_bp_table or {}
+    need_top = tbl.get("top", ctx.required_points_for_top or 0)
+    need_second = tbl.get("second", ctx.required_points_for_next_rank or 0)
+    turns = max(0, int(ctx.turns_left))
     g = 1.0
     if need_top:
         g *= _step_gain(effective_bp, need_top, turns)
@@ -257,8 +257,13 @@ def _goal_pressure(ctx, effective_bp: float) -> float:
 from dataclasses import dataclass
 from typing import List, Optional, Dict
 
-@dataclass
+@dataclass(slots=True)
 class PolicyContext:
+    """
+    Inputs of `ExpectedValueEngine.decide`. Every field always exists, so
+    the engine reads them directly. AkagiBot keeps one instance and updates
+    it in place before each evaluation; the engine never writes to it.
+    """
     # Scores
     my_score: int
     other_scores: List[int]
@@ -415,7 +420,7 @@ def _approx_action_win(ctx: PolicyContext, action: str) -> float:
     """Very light win-prob proxy per action, for placement-side bonuses.
     Mirrors _estimate_delta_points adjustments without shape details.
     """
-    win = _clamp01(float(getattr(ctx, "win_rate", 0.0) or 0.0))
+    win = _clamp01(float(ctx.win_rate or 0.0))
     if action == "reach":
         return _clamp01(win)
     if action == "dama":
@@ -451,9 +456,9 @@ def _estimate_delta_points(ctx: PolicyContext, action: str) -> float:
     """Lightweight delta estimation reusing front multipliers.
     Not shape-accurate but consistent across actions for placement layer.
     """
-    win = _clamp01(float(getattr(ctx, "win_rate", 0.0) or 0.0))
-    lose = _clamp01(float(getattr(ctx, "deal_in_rate", 0.0) or 0.0))
-    bp  = max(1000.0, float(getattr(ctx, "basepoint", 0.0) or 0.0))
+    win = _clamp01(float(ctx.win_rate or 0.0))
+    lose = _clamp01(float(ctx.deal_in_rate or 0.0))
+    bp  = max(1000.0, float(ctx.basepoint or 0.0))
 
     if action == "reach":
         reach_bonus = (1.3 if ctx.is_dealer else 1.2)
@@ -557,7 +562,7 @@ def _placement_ev_for_action(ctx: PolicyContext, action: str) -> float:
     # 安全域にクリップ
     dyn_w = max(0.10, min(0.90, dyn_w))
 
-    rn = max(1, int(getattr(ctx, "round_number", 1)))
+    rn = max(1, int(ctx.round_number))
 
     # 南3〜南4は順位EVをもう少し重く
     if rn >= 7:
@@ -571,7 +576,7 @@ def _placement_ev_for_action(ctx: PolicyContext, action: str) -> float:
         approx_win = _approx_action_win(ctx, action)
         renchan_bonus = (
             OYA_RENCHAN_PLACEMENT_K
-            * max(0.0, getattr(ctx, "renchan_cont_prob", 0.0))
+            * max(0.0, ctx.renchan_cont_prob)
             * approx_win
         )
         placement_points += renchan_bonus * dyn_w
@@ -675,7 +680,7 @@ def _apply_table_speed(ctx: PolicyContext, win: float, bp: float):
             speed_tag = True
 
     # 仕掛けで明らかに場が速いとき
-    if getattr(ctx, "call_speed_gain", 0.0) >= 0.6:
+    if ctx.call_speed_gain >= 0.6:
         speed_tag = True
 
     return _clamp01(win), bp, speed_tag
@@ -689,7 +694,7 @@ def _speed_fallback_boost(win: float, ctx: PolicyContext, speed_tag: bool) -> fl
     boost = 1.0
     if ctx.is_ryanmen:
         boost *= 1.01
-    if getattr(ctx, "call_speed_gain", 0.0) >= 0.5:
+    if ctx.call_speed_gain >= 0.5:
         boost *= 1.01
     return _clamp01(win * boost)
 
@@ -726,9 +731,9 @@ def _opponent_aware_lose(ctx: PolicyContext, lose: float) -> float:
 
     # 無スジ枚数・スジ本数・共通安牌からの調整
     try:
-        no_suji = max(0, int(getattr(ctx, "no_suji_tiles", 0)))
-        safe_suji = max(0, int(getattr(ctx, "safe_suji_count", 0)))
-        shared_safe = max(0, int(getattr(ctx, "shared_safe_tiles", 0)))
+        no_suji = max(0, int(ctx.no_suji_tiles))
+        safe_suji = max(0, int(ctx.safe_suji_count))
+        shared_safe = max(0, int(ctx.shared_safe_tiles))
     except Exception:
         no_suji = safe_suji = shared_safe = 0
 
@@ -761,8 +766,8 @@ def _opponent_aware_lose(ctx: PolicyContext, lose: float) -> float:
             power += 0.02
 
     # 相手タイプによる補正（攻撃型は危険、守備型は少しマイルド）
-    aggr = max(0.0, min(1.0, getattr(ctx, "opponent_aggressiveness", 0.0)))
-    defe = max(0.0, min(1.0, getattr(ctx, "opponent_defense", 0.0)))
+    aggr = max(0.0, min(1.0, ctx.opponent_aggressiveness))
+    defe = max(0.0, min(1.0, ctx.opponent_defense))
     power += 0.05 * aggr
     power -= 0.03 * defe
 
@@ -807,7 +812,7 @@ def _top_safety_buffer_adjust(ev: float, ctx: PolicyContext, bp: float, is_tenpa
         return ev
 
     # 東場ではまだ攻撃優先
-    rn = max(1, int(getattr(ctx, "round_number", 1)))
+    rn = max(1, int(ctx.round_number))
     if rn <= 4:
         return ev
 
@@ -869,7 +874,7 @@ def _auto_objective(ctx: PolicyContext) -> str:
         return "avoid_last"
 
     # 南場以降＋3着でラスと近い → 強ラス回避モード
-    rn = max(1, int(getattr(ctx, "round_number", 1)))
+    rn = max(1, int(ctx.round_number))
     if rn >= 5 and my_rank == 3:
         # 序盤は3000点差以内、終盤は8000点差以内なら「ラスとほぼ一体」
         threshold = 3000 + 5000 * (1.0 - remain)
@@ -1092,7 +1097,7 @@ class ExpectedValueEngine:
 
         ev = _apply_goal_targeting(ev, "reach", ctx, bp * reach_bonus, win)
         ev = _endgame_adjust(ev, "reach", ctx, bp * reach_bonus, win)
-        ev = goal_driven_override(ev, "reach", ctx, bp * reach_bonus, win, getattr(ctx, 'ukeire_tiles', 0))
+        ev = goal_driven_override(ev, "reach", ctx, bp * reach_bonus, win, ctx.ukeire_tiles)
         keep_value = win * bp
         coverage = ctx.safe_tiles_next + 0.7 * ctx.safe_tiles_next2
         defend_value = (lose * DEFEND_VALUE_SCALAR) * (1.2 if coverage <= 1.5 else 0.9)
@@ -1146,7 +1151,7 @@ class ExpectedValueEngine:
         ev = gain - cost
         ev = _apply_goal_targeting(ev, "dama", ctx, bp, win)
         ev = _endgame_adjust(ev, "dama", ctx, bp, win)
-        ev = goal_driven_override(ev, "dama", ctx, bp, win, getattr(ctx, 'ukeire_tiles', 0))
+        ev = goal_driven_override(ev, "dama", ctx, bp, win, ctx.ukeire_tiles)
         ev = _tempai_noten_adjust(ev, ctx, win, is_tenpai_line=True)
         keep_value = win * bp
         coverage = ctx.safe_tiles_next + 0.7 * ctx.safe_tiles_next2
@@ -1176,8 +1181,8 @@ class ExpectedValueEngine:
         speed_gain = max(0.0, min(1.0, ctx.call_speed_gain))
 
         # 良形化・変化ポテンシャル
-        ryanmen_pot = max(0.0, min(1.0, getattr(ctx, "ryanmen_potential", 0.0)))
-        improve_tiles = max(0, int(getattr(ctx, "improve_tiles", 0)))
+        ryanmen_pot = max(0.0, min(1.0, ctx.ryanmen_potential))
+        improve_tiles = max(0, int(ctx.improve_tiles))
         improve_factor = min(1.0, improve_tiles / 10.0)
 
         # 速度補正: 東場は攻撃寄りに、終盤はやや控えめ
@@ -1191,8 +1196,8 @@ class ExpectedValueEngine:
 
         # --- 放銃率側の補正（場の脅威＋鳴き読まれやすさ） ---
         threat = _table_threat(ctx)
-        opp_aggr = max(0.0, min(1.0, getattr(ctx, "opponent_aggressiveness", 0.0)))
-        opp_def  = max(0.0, min(1.0, getattr(ctx, "opponent_defense", 0.0)))
+        opp_aggr = max(0.0, min(1.0, ctx.opponent_aggressiveness))
+        opp_def  = max(0.0, min(1.0, ctx.opponent_defense))
 
         lose_mul = 1.02
         if threat:
@@ -1204,7 +1209,7 @@ class ExpectedValueEngine:
         lose_mul -= 0.03 * opp_def
 
         # 安全度（自分の守備の良さ）で少しだけ下げる
-        safety = max(0.0, min(1.0, getattr(ctx, "safety_score", 0.5)))
+        safety = max(0.0, min(1.0, ctx.safety_score))
         lose_mul *= (1.02 - 0.05 * safety)
 
         lose_mul = max(0.90, min(1.30, lose_mul))
@@ -1234,7 +1239,7 @@ class ExpectedValueEngine:
             bp  *= 1.04
 
         # オタ風ポンなど、価値の低い鳴きは少し抑える
-        if getattr(ctx, "calling_otakaze", False):
+        if ctx.calling_otakaze:
             win *= 0.94
             bp  *= 0.96
 
@@ -1290,7 +1295,7 @@ class ExpectedValueEngine:
         ev = _endgame_adjust(ev, "call", ctx, bp, win)
 
         # 目標に対するゴール指向オーバーライド（局面依存の押し引き）
-        ev = goal_driven_override(ev, "call", ctx, bp, win, getattr(ctx, "ukeire_tiles", 0))
+        ev = goal_driven_override(ev, "call", ctx, bp, win, ctx.ukeire_tiles)
 
         # テンパイ/ノーテン価値（鳴きテンパイ線を評価）
         is_tenpai_line = (ctx.shanten == 0)
@@ -1357,7 +1362,7 @@ class ExpectedValueEngine:
         ev = gain - cost
         ev = _apply_goal_targeting(ev, "kan", ctx, bp, win)
         ev = _endgame_adjust(ev, "kan", ctx, bp, win)
-        ev = goal_driven_override(ev, "kan", ctx, bp, win, getattr(ctx, 'ukeire_tiles', 0))
+        ev = goal_driven_override(ev, "kan", ctx, bp, win, ctx.ukeire_tiles)
         # カンはテンパイ線で使うことが多い: わずかに加点
         ev = _tempai_noten_adjust(ev, ctx, win, is_tenpai_line=True)
         keep_value = win * bp
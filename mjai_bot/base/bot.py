@@ -1,6 +1,7 @@
 import json
 import sys
 from .logger import logger
+from .. import codec
 
 class Bot:
     def __init__(self):
@@ -75,3 +76,17 @@ class Bot:
         else:
             return json.dumps(return_action, separators=(",", ":"))
 
+    def react_events(self, events: list[dict], lines: list[str] | None = None) -> dict:
+        """
+        Structured counterpart of `react`, used by the Controller.
+
+        Bots should encode events to text only where a text consumer needs it
+        (libriichi), reusing `lines` when given.
+        This default serves bots that only implement `react`.
+
+        :param events: events as dicts
+        :param lines: the same events already encoded with `codec.encode_events`, or None
+        :return: action as dict
+        """
+        return codec.loads(self.react(codec.dumps(events)))
+
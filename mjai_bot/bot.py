@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 import json
-import os
 from mjai import Bot
 from dataclasses import dataclass
-from mjai.mlibriichi.state import PlayerState  # type: ignore
 from .logger import logger
+from . import codec
+from . import tiles
+from .game_state import GameStateTracker, GameStateSnapshot
 from .akagi_policy import PolicyContext, ExpectedValueEngine
 
 
@@ -12,6 +13,21 @@ from .akagi_policy import PolicyContext, ExpectedValueEngine
 from .strategy.last_avoid import TableState, MoveCandidate, LastAvoidConfig, choose_with_last_avoid
 from .strategy.safety import SafetyContext  # 型ヒントだけ使う
 
+
+@dataclass
+class EvaluationStats:
+    """
+    Per-hanchan counters of the policy / safety evaluation in `AkagiBot.think`.
+    """
+    evaluated: int = 0  # 判断点で実際に評価した回数
+    reused: int = 0     # 同一局面で前回の結果を再利用した回数
+    skipped: int = 0    # 行動できない局面で評価しなかった回数
+
+    def __str__(self) -> str:
+        total = self.evaluated + self.reused + self.skipped
+        return f"evaluated={self.evaluated} reused={self.reused} skipped={self.skipped} (of {total})"
+
+
 class AkagiBot(Bot):
     """
     This bot tracks game states and picks a discard via last-avoid safety layer.
@@ -20,20 +36,21 @@ class AkagiBot(Bot):
         super().__init__()
         self.is_3p = False
 
-        # --- 局面トラッキング ---
-        self.__rivers = {0: [], 1: [], 2: [], 3: []}  # [(tile, tsumogiri), ...]
-        self.__riichi_actors = set()
-        self.__riichi_early_turns = {}  # actor -> 宣言時のざっくり順目カウンタ
-        self.__dealer = 0
-        self.__scores = [25000, 25000, 25000, 25000]
-        self.__round_wind = "E"
-        self.__honba = 0
-        self.__kyotaku = 0
-        self.__remaining_tiles_live = 0  # live ツモ枚数
-        self.__discard_events = []
-        self.__call_events = []
-        self.__dora_indicators = []
+        # --- 局面トラッキング（PlayerState と卓情報を一元管理） ---
+        self.tracker = GameStateTracker()
         self.__cfg_last_avoid = LastAvoidConfig()
+        # --- 評価のゲート（判断点のみ評価し、同一局面は結果を再利用） ---
+        self.eval_stats = EvaluationStats()
+        self._eval_dirty = True
+        self._eval_key = None       # 最後に評価した局面の指紋（tracker.event_index）
+        self._eval_response = None  # その時の think() の結果
+        # --- 判断ごとに上書きして使い回す入力（毎回の確保を避ける） ---
+        self._policy_ctx = PolicyContext(my_score=25000, other_scores=[25000, 25000, 25000])
+        self._table_state = TableState(
+            round_wind="E", honba=0, kyotaku=0, dealer=0, turn=0, remaining_tiles=0,
+            scores=[25000, 25000, 25000, 25000], me=0, riichi_flags=[False] * 4, rivers={}, my_tiles=[],
+        )
+        self._move_candidates: dict[str, MoveCandidate] = {}  # tile -> 打牌候補
        # policy出力（UI層が読む想定）
         self.policy_allow_reach = True
         self.policy_allow_pon   = True
@@ -61,8 +78,17 @@ class AkagiBot(Bot):
         self._policy_est_basepoint      = 2600.0
         self._policy_est_call_speed     = 1.0
 
-        # ざっくり順目カウンタ（配牌後0、以後各打牌で+1）
-        self.__turn_counter = 0
+    @property
+    def state(self) -> GameStateSnapshot:
+        """Read-only snapshot of the tracked game state (UI / strategy layers)."""
+        return self.tracker.snapshot()
+
+    @property
+    def is_decision_point(self) -> bool:
+        """自分に打牌・副露・和了などの選択肢がある局面か"""
+        if self.player_state is None:
+            return False
+        return self.can_act_3p if self.is_3p else self.can_act
 
     # -------------------------
     # 思考
@@ -70,7 +96,25 @@ class AkagiBot(Bot):
     def think(self) -> str:
         """
         Safety-first discard with last-avoid layer. Fallback: tsumogiri.
+
+        Policy and safety are only evaluated at decision points, once per
+        state fingerprint; otherwise the cached result is returned.
         """
+        if not self.is_decision_point:
+            # 他家のツモ・ドラ表示など、選択肢が無い局面は評価しない
+            self.eval_stats.skipped += 1
+            return self.action_nothing()
+        key = self.tracker.event_index
+        if not self._eval_dirty and key == self._eval_key and self._eval_response is not None:
+            self.eval_stats.reused += 1
+            return self._eval_response
+        self.eval_stats.evaluated += 1
+        self._eval_response = self._evaluate()
+        self._eval_key = key
+        self._eval_dirty = False
+        return self._eval_response
+
+    def _evaluate(self) -> str:
         try:
             self.update_policy()
         except Exception as e:
@@ -83,27 +127,24 @@ class AkagiBot(Bot):
                 if self.last_self_tsumo and self.last_self_tsumo not in candidates:
                     candidates.append(self.last_self_tsumo)
 
-                riichi_flags = [False, False, False, False]
-                for a in self.__riichi_actors:
-                    if 0 <= a <= 3:
-                        riichi_flags[a] = True
-
-                ts = TableState(
-                    round_wind=self.__round_wind,
-                    honba=self.__honba,
-                    kyotaku=self.__kyotaku,
-                    dealer=self.__dealer,
-                    turn=self.__turn_counter,
-                    remaining_tiles=self.__remaining_tiles_live,
-                    scores=self.__scores[:],
+                snap = self.state
+                ts = self._table_state.refresh(
+                    round_wind=snap.round_wind,
+                    honba=snap.honba,
+                    kyotaku=snap.kyotaku,
+                    dealer=snap.dealer,
+                    turn=snap.turn,
+                    remaining_tiles=snap.remaining_tiles,
+                    scores=snap.scores,
                     me=self.player_id,
-                    riichi_flags=riichi_flags,
-                    rivers={k: v[:] for k, v in self.__rivers.items()},
-                    my_tiles=self.tehai_mjai[:],
-                    dora_indicators=self.__dora_indicators[:],
-                    riichi_early_turns=self.__riichi_early_turns.copy(),
+                    riichi_flags=snap.riichi_flags,
+                    rivers=snap.rivers,
+                    my_tiles=self.tehai_mjai,
+                    dora_indicators=snap.dora_indicators,
+                    riichi_early_turns=snap.riichi_early_turns,
+                    visibility=self.tracker.visibility_view(),
                 )
-                move_cands = [MoveCandidate(tile=c, kind="discard", ev_point=0.0) for c in candidates]
+                move_cands = [self._move_candidate(c) for c in candidates]
                 best = choose_with_last_avoid(move_cands, ts, self.__cfg_last_avoid)
                 return self.action_discard(best.tile)
             except Exception as _e:
@@ -112,116 +153,73 @@ class AkagiBot(Bot):
         else:
             return self.action_nothing()
 
+    def _move_candidate(self, tile: str) -> MoveCandidate:
+        """牌ごとに1つの打牌候補を使い回す（評価値はリセット）"""
+        cand = self._move_candidates.get(tile)
+        if cand is None:
+            cand = self._move_candidates[tile] = MoveCandidate(tile=tile, kind="discard")
+        cand.ev_point = 0.0
+        cand.danger_score = 0.0
+        return cand
+
     # -------------------------
     # イベント処理
     # -------------------------
-    def react(self, input_str: str = None, input_list: list[dict] = None) -> str:
+    def react(self, input_str: str = None, input_list: list[dict] = None, input_lines: list[str] = None) -> str:
+        """
+        :param input_str: JSON string of events
+        :param input_list: events as dicts, used if input_str is not given
+        :param input_lines: input_list already encoded with `codec.encode_events`, shared with the Controller
+        """
+        if not self.ingest(input_str, input_list, input_lines):
+            return json.dumps({"type": "none"}, separators=(",", ":"))
+        return self.decide()
+
+    def ingest(self, input_str: str = None, input_list: list[dict] = None, input_lines: list[str] = None) -> bool:
+        """
+        First half of `react`: apply events to the tracked state, without evaluating.
+
+        :return: False if the events could not be applied
+        """
         try:
             if input_str:
-                events = json.loads(input_str)
+                events = codec.loads(input_str)
             elif input_list:
                 events = input_list
             else:
                 raise ValueError("Empty input")
             if len(events) == 0:
                 raise ValueError("Empty events")
+            if input_lines is None or input_str:
+                input_lines = codec.encode_events(events)
+
+            for e in events:
+                if e["type"] in ("start_game", "end_game") and self.tracker.event_index > 0:
+                    self._log_eval_stats()
+            # 状態更新はトラッカーで一度だけ
+            event_index = self.tracker.event_index
+            self.action_candidate = self.tracker.ingest(events, input_lines)
+            if self.tracker.event_index != event_index:
+                self._eval_dirty = True
+            if self.tracker.player_state is not None:
+                # mjai.Bot の各 property はこの共有 PlayerState を読む
+                self.player_state = self.tracker.player_state
+                self.player_id = self.tracker.player_id
+            self.is_3p = self.tracker.is_3p
+            return True
 
-            for event in events:
-                et = event["type"]
-
-                if et == "start_game":
-                    self.player_id = event["id"]
-                    self.player_state = PlayerState(self.player_id)
-                    self.is_3p = False
-                    # リセット
-                    self.__discard_events = []
-                    self.__call_events = []
-                    self.__dora_indicators = []
-                    self.__rivers = {0: [], 1: [], 2: [], 3: []}
-                    self.__riichi_actors = set()
-                    self.__riichi_early_turns = {}
-                    self.__scores = [25000, 25000, 25000, 25000]
-                    self.__honba = 0
-                    self.__kyotaku = 0
-                    self.__round_wind = "E"
-                    self.__remaining_tiles_live = 0
-                    self.__turn_counter = 0
-
-                if et == "start_kyoku":
-                    # 3P 判定（既存ロジック）
-                    if (
-                        event["scores"][0] == 35000 and
-                        event["scores"][1] == 35000 and
-                        event["scores"][2] == 35000 and
-                        event["scores"][3] == 0
-                    ):
-                        self.is_3p = True
-
-                    # 局情報
-                    self.__dealer = event.get("oya", self.__dealer)
-                    self.__scores = event.get("scores", self.__scores)
-                    self.__honba = event.get("honba", 0)
-                    self.__kyotaku = event.get("kyotaku", 0)
-                    self.__round_wind = event.get("bakaze", "E")
-                    self.__rivers = {0: [], 1: [], 2: [], 3: []}
-                    self.__riichi_actors = set()
-                    self.__riichi_early_turns = {}
-                    self.__turn_counter = 0
-
-                    # 残り live ツモ枚数 初期化
-                    init_4p = int(os.getenv("AKAGI_INIT_LIVE_TILES_4P", "70"))
-                    init_3p = int(os.getenv("AKAGI_INIT_LIVE_TILES_3P", "83"))
-                    self.__remaining_tiles_live = init_3p if self.is_3p else init_4p
-
-                # dora 表示（カン後の新ドラ含む）を即時反映
-                if et == "start_kyoku" or et == "dora":
-                    self.__dora_indicators.append(event["dora_marker"])
-
-                # ツモは live -1
-                if et == "tsumo":
-                    self.__remaining_tiles_live = max(0, self.__remaining_tiles_live - 1)
-
-                if et == "dahai":
-                    self.__discard_events.append(event)
-                    actor = event["actor"]
-                    pai = event["pai"]
-                    tsumogiri = bool(event.get("tsumogiri", False))
-                    self.__rivers.setdefault(actor, []).append((pai, tsumogiri))
-                    # 打牌でざっくり順目+1
-                    self.__turn_counter += 1
-
-                if et in ["chi", "pon", "daiminkan", "kakan", "ankan"]:
-                    self.__call_events.append(event)
-
-                # カン時は live -1（補助ツモは王牌）
-                if et in ["daiminkan", "kakan", "ankan"]:
-                    self.__remaining_tiles_live = max(0, self.__remaining_tiles_live - 1)
-
-                # 立直追跡（早い順目を記録）
-                if et in ["reach", "reach_accepted"]:
-                    actor = event["actor"]
-                    self.__riichi_actors.add(actor)
-                    self.__riichi_early_turns.setdefault(actor, self.__turn_counter)
-
-                # 3P用の nukidora パッチ（既存）
-                if et == "nukidora":
-                    logger.debug(f"Event: {event}")
-                    replace_event = {
-                        "type": "dahai",
-                        "actor": event["actor"],
-                        "pai": "N",
-                        "tsumogiri": self.last_self_tsumo == "N" and event["actor"] == self.player_id,
-                    }
-                    self.__discard_events.append(replace_event)
-                    self.__rivers.setdefault(event["actor"], []).append(("N", False))
-                    # 打牌扱いで順目+1
-                    self.__turn_counter += 1
-                    self.action_candidate = self.player_state.update(json.dumps(replace_event))
-                    continue
-
-                logger.debug(f"Event: {event}")
-                self.action_candidate = self.player_state.update(json.dumps(event))
+        except Exception as e:
+            logger.error(f"Exception: {str(e)}")
+            logger.error("Brief info:")
+            logger.error(self.brief_info())
+        return False
 
+    def decide(self) -> str:
+        """
+        Second half of `react`: evaluate the ingested state. Only reads the state,
+        so it may run on another thread until the next `ingest`.
+        """
+        try:
             # 自分のリーチ後、限定状況はそのままツモ切り（既存ロジック）
             if (
                 self.self_riichi_accepted
@@ -249,136 +247,39 @@ class AkagiBot(Bot):
         chi_mid_meld: tuple[str, tuple[str, str]] = None
         chi_high_meld: tuple[str, tuple[str, str]] = None
 
-    # 既存の副露探索メソッドはそのまま（省略せず残しています）
+    # チーの形: (種類, 鳴く牌から見た2枚のオフセット)
+    CHI_SHAPES = (("high", -2, -1), ("mid", -1, 1), ("low", 1, 2))
+
+    def _chi_consumes(self) -> list[tuple[str, tuple[str, str]]]:
+        """
+        last_kawa_tile をチーできる (種類, 晒す2枚) を全て列挙する。
+        各形とも赤5を使う組み合わせが先、通常牌のみの組み合わせが最後。
+        """
+        called = tiles.tile_id(self.last_kawa_tile)
+        suit, rank = tiles.SUIT[called], tiles.RANK[called]
+        held = {tiles.tile_id(t) for t in self.tehai_mjai}
+        allowed = {"high": self.can_chi_high, "mid": self.can_chi_mid, "low": self.can_chi_low}
+        result = []
+        for kind, da, db in self.CHI_SHAPES:
+            a, b = tiles.number_id(suit, rank + da), tiles.number_id(suit, rank + db)
+            if not allowed[kind] or a is None or b is None:
+                continue
+            for x, y in ((tiles.RED.get(a), b), (a, tiles.RED.get(b)), (a, b)):
+                if x in held and y in held:
+                    result.append((kind, (tiles.MJAI[x], tiles.MJAI[y])))
+        return result
+
     def find_chi_candidates_simple(self) -> "AkagiBot.ChiCandidates":
-        chi_candidates: AkagiBot.ChiCandidates = AkagiBot.ChiCandidates()
-        color = self.last_kawa_tile[1]
-        chi_num = int(self.last_kawa_tile[0])
-        if (
-            self.can_chi_high
-            and f"{chi_num-2}{color}r" in self.tehai_mjai
-            and f"{chi_num-1}{color}" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num-2}{color}r", f"{chi_num-1}{color}")
-            chi_candidates.chi_high_meld = (self.last_kawa_tile, consumed)
-        if (
-            self.can_chi_high
-            and f"{chi_num-2}{color}" in self.tehai_mjai
-            and f"{chi_num-1}{color}r" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num-2}{color}", f"{chi_num-1}{color}r")
-            chi_candidates.chi_high_meld = (self.last_kawa_tile, consumed)
-        if (
-            self.can_chi_high
-            and f"{chi_num-2}{color}" in self.tehai_mjai
-            and f"{chi_num-1}{color}" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num-2}{color}", f"{chi_num-1}{color}")
-            chi_candidates.chi_high_meld = (self.last_kawa_tile, consumed)
-        if (
-            self.can_chi_mid
-            and f"{chi_num-1}{color}r" in self.tehai_mjai
-            and f"{chi_num+1}{color}" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num-1}{color}r", f"{chi_num+1}{color}")
-            chi_candidates.chi_mid_meld = (self.last_kawa_tile, consumed)
-        if (
-            self.can_chi_mid
-            and f"{chi_num-1}{color}" in self.tehai_mjai
-            and f"{chi_num+1}{color}r" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num-1}{color}", f"{chi_num+1}{color}r")
-            chi_candidates.chi_mid_meld = (self.last_kawa_tile, consumed)
-        if (
-            self.can_chi_mid
-            and f"{chi_num-1}{color}" in self.tehai_mjai
-            and f"{chi_num+1}{color}" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num-1}{color}", f"{chi_num+1}{color}")
-            chi_candidates.chi_mid_meld = (self.last_kawa_tile, consumed)
-        if (
-            self.can_chi_low
-            and f"{chi_num+1}{color}r" in self.tehai_mjai
-            and f"{chi_num+2}{color}" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num+1}{color}r", f"{chi_num+2}{color}")
-            chi_candidates.chi_low_meld = (self.last_kawa_tile, consumed)
-        if (
-            self.can_chi_low
-            and f"{chi_num+1}{color}" in self.tehai_mjai
-            and f"{chi_num+2}{color}r" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num+1}{color}", f"{chi_num+2}{color}r")
-            chi_candidates.chi_low_meld = (self.last_kawa_tile, consumed)
-        if (
-            self.can_chi_low
-            and f"{chi_num+1}{color}" in self.tehai_mjai
-            and f"{chi_num+2}{color}" in self.tehai_mjai
-        ):
-            consumed = (f"{chi_num+1}{color}", f"{chi_num+2}{color}")
-            chi_candidates.chi_low_meld = (self.last_kawa_tile, consumed)
-        return chi_candidates
+        # 同じ形に複数の組み合わせがあれば後の方（通常牌のみ）を採用
+        melds = {kind: (self.last_kawa_tile, consumed) for kind, consumed in self._chi_consumes()}
+        return AkagiBot.ChiCandidates(
+            chi_low_meld=melds.get("low"),
+            chi_mid_meld=melds.get("mid"),
+            chi_high_meld=melds.get("high"),
+        )
 
     def find_chi_consume_simple(self) -> list[list[str]]:
-        chi_candidates = []
-        color = self.last_kawa_tile[1]
-        chi_num = int(self.last_kawa_tile[0])
-        tehai_mjai = self.tehai_mjai
-        if (
-            self.can_chi_high
-            and f"{chi_num-2}{color}r" in tehai_mjai
-            and f"{chi_num-1}{color}" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num-2}{color}r", f"{chi_num-1}{color}"])
-        if (
-            self.can_chi_high
-            and f"{chi_num-2}{color}" in tehai_mjai
-            and f"{chi_num-1}{color}r" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num-2}{color}", f"{chi_num-1}{color}r"])
-        if (
-            self.can_chi_high
-            and f"{chi_num-2}{color}" in tehai_mjai
-            and f"{chi_num-1}{color}" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num-2}{color}", f"{chi_num-1}{color}"])
-        if (
-            self.can_chi_mid
-            and f"{chi_num-1}{color}r" in tehai_mjai
-            and f"{chi_num+1}{color}" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num-1}{color}r", f"{chi_num+1}{color}"])
-        if (
-            self.can_chi_mid
-            and f"{chi_num-1}{color}" in tehai_mjai
-            and f"{chi_num+1}{color}r" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num-1}{color}", f"{chi_num+1}{color}r"])
-        if (
-            self.can_chi_mid
-            and f"{chi_num-1}{color}" in tehai_mjai
-            and f"{chi_num+1}{color}" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num-1}{color}", f"{chi_num+1}{color}"])
-        if (
-            self.can_chi_low
-            and f"{chi_num+1}{color}r" in tehai_mjai
-            and f"{chi_num+2}{color}" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num+1}{color}r", f"{chi_num+2}{color}"])
-        if (
-            self.can_chi_low
-            and f"{chi_num+1}{color}" in tehai_mjai
-            and f"{chi_num+2}{color}r" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num+1}{color}", f"{chi_num+2}{color}r"])
-        if (
-            self.can_chi_low
-            and f"{chi_num+1}{color}" in tehai_mjai
-            and f"{chi_num+2}{color}" in tehai_mjai
-        ):
-            chi_candidates.append([f"{chi_num+1}{color}", f"{chi_num+2}{color}"])
-        return chi_candidates
+        return [list(consumed) for _, consumed in self._chi_consumes()]
 
     def find_pon_consume_simple(self) -> list[list[str]]:
         pon_candidates = []
@@ -431,31 +332,30 @@ class AkagiBot(Bot):
         scores = self._get_scores_safe()
         pid = self._get_player_id_safe()
         my_score = int(scores[pid]) if 0 <= pid < len(scores) else 25000
-        other_scores = [int(s) for i, s in enumerate(scores) if i != pid]
-        ctx = PolicyContext(
-            my_score=my_score,
-            other_scores=other_scores,
-            player_id=int(pid),
-            is_oras=bool(self._get_is_oras_safe()),
-            is_dealer=bool(getattr(self, "is_dealer", False)),
-            riichi_declared_count=int(self.riichi_declared_count),
-            opponent_threat=bool(self.opponent_threat),
-            last_discard_is_yakuhai=bool(self.last_discard_is_yakuhai),
-            win_rate=float(win),
-            deal_in_rate=float(lose),
-            tempai_rate=float(tempai),
-            basepoint=float(basept),
-            call_speed_gain=float(speed),
-            turns_left=int(getattr(self, "turns_left", getattr(self, "_policy_turns_left", 12))),
-            is_ryanmen=bool(getattr(self, "is_ryanmen_flag", getattr(self, "_policy_is_ryanmen", True))),
-            shanten=int(self._get_shanten_safe()),
-            safety_score=float(getattr(self, "safety_score", getattr(self, "_policy_safety_score", 0.5))),
-            genbutsu_count=int(getattr(self, "genbutsu_count", getattr(self, "_policy_genbutsu_count", 3))),
-            suji_count=int(getattr(self, "suji_count", getattr(self, "_policy_suji_count", 6))),
-            wall_info=float(getattr(self, "wall_info", getattr(self, "_policy_wall_info", 0.0))),
-            red_count=int(getattr(self, "red_count", getattr(self, "_policy_red_count", 0))),
-            dora_visible_count=int(getattr(self, "dora_visible_count", getattr(self, "_policy_dora_visible_count", 0))),
-        )
+        # 使い回しの PolicyContext を上書き（ここで設定しない項目は既定値のまま）
+        ctx = self._policy_ctx
+        ctx.my_score = my_score
+        ctx.other_scores[:] = [int(s) for i, s in enumerate(scores) if i != pid]
+        ctx.player_id = int(pid)
+        ctx.is_oras = bool(self._get_is_oras_safe())
+        ctx.is_dealer = bool(getattr(self, "is_dealer", False))
+        ctx.riichi_declared_count = int(self.riichi_declared_count)
+        ctx.opponent_threat = bool(self.opponent_threat)
+        ctx.last_discard_is_yakuhai = bool(self.last_discard_is_yakuhai)
+        ctx.win_rate = float(win)
+        ctx.deal_in_rate = float(lose)
+        ctx.tempai_rate = float(tempai)
+        ctx.basepoint = float(basept)
+        ctx.call_speed_gain = float(speed)
+        ctx.turns_left = int(getattr(self, "turns_left", getattr(self, "_policy_turns_left", 12)))
+        ctx.is_ryanmen = bool(getattr(self, "is_ryanmen_flag", getattr(self, "_policy_is_ryanmen", True)))
+        ctx.shanten = int(self._get_shanten_safe())
+        ctx.safety_score = float(getattr(self, "safety_score", getattr(self, "_policy_safety_score", 0.5)))
+        ctx.genbutsu_count = int(getattr(self, "genbutsu_count", getattr(self, "_policy_genbutsu_count", 3)))
+        ctx.suji_count = int(getattr(self, "suji_count", getattr(self, "_policy_suji_count", 6)))
+        ctx.wall_info = float(getattr(self, "wall_info", getattr(self, "_policy_wall_info", 0.0)))
+        ctx.red_count = int(getattr(self, "red_count", getattr(self, "_policy_red_count", 0)))
+        ctx.dora_visible_count = int(getattr(self, "dora_visible_count", getattr(self, "_policy_dora_visible_count", 0)))
         dec = ExpectedValueEngine.decide(ctx)
         # UI層で使う公開属性に反映
         self.policy_allow_reach = bool(dec.allow_reach)
@@ -480,6 +380,12 @@ class AkagiBot(Bot):
         except Exception:
             pass
 
+    def _log_eval_stats(self) -> None:
+        """半荘ごとの評価回数を出力してリセット"""
+        if self.eval_stats.evaluated or self.eval_stats.reused or self.eval_stats.skipped:
+            logger.info(f"[POLICY] hanchan evaluations: {self.eval_stats}")
+        self.eval_stats = EvaluationStats()
+
     # ---- scores / player_id を取得するヘルパ ----
     def _get_scores_safe(self) -> list[int]:
         """本体に scores があればそれを使い、無ければデフォルト。"""
@@ -0,0 +1,109 @@
+"""
+Weights-only deployment format for mortal checkpoints.
+
+A training checkpoint (mortal.pth) also carries optimizer, scheduler and
+replay state. The weights-only artifact keeps just what inference needs:
+
+    {"config": ..., "mortal": Brain state_dict, "current_dqn": DQN state_dict}
+
+It is written next to the checkpoint as mortal.weights.pth and loaded with
+torch.load(mmap=True, weights_only=True), so on CPU the weights stay backed
+by the file: only touched pages become resident, and several processes
+share them through the page cache.
+
+Export it with:
+
+    python -m mjai_bot.checkpoint --model mortal
+"""
+import os
+import sys
+import time
+import pathlib
+import argparse
+import importlib
+import torch
+from typing import Optional
+from .logger import logger
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+WEIGHTS_KEYS = ("config", "mortal", "current_dqn")
+
+
+def current_rss() -> Optional[int]:
+    """
+    Resident set size of this process in bytes, or None if it cannot be read.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def format_rss(rss: Optional[int]) -> str:
+    return "n/a" if rss is None else f"{rss / 2**20:.1f} MB"
+
+
+def weights_path(control_state_file: pathlib.Path) -> pathlib.Path:
+    control_state_file = pathlib.Path(control_state_file)
+    return control_state_file.with_name(f"{control_state_file.stem}.weights.pth")
+
+
+def export_weights(control_state_file: pathlib.Path) -> pathlib.Path:
+    """
+    Write the weights-only artifact of a training checkpoint next to it.
+    """
+    state = torch.load(control_state_file, map_location="cpu")
+    path = weights_path(control_state_file)
+    tmp_path = path.with_suffix(".pth.tmp")
+    torch.save({key: state[key] for key in WEIGHTS_KEYS}, tmp_path)
+    tmp_path.replace(path)
+    logger.info(f"Exported weights of {control_state_file} to {path}")
+    return path
+
+
+def load_state(control_state_file: pathlib.Path, device: torch.device) -> tuple[dict, bool]:
+    """
+    Load the state needed to build an engine, from the weights-only artifact
+    if there is an up to date one, else from the training checkpoint.
+
+    :return: (state with config/mortal/current_dqn, whether the tensors are memory-mapped)
+    """
+    control_state_file = pathlib.Path(control_state_file)
+    path = weights_path(control_state_file)
+    rss_before = current_rss()
+    start = time.perf_counter()
+    if path.exists() and path.stat().st_mtime_ns >= control_state_file.stat().st_mtime_ns:
+        # mmap only pays off for CPU tensors, on GPU they are copied to the device anyway
+        mmap = device.type == "cpu"
+        state = torch.load(path, map_location=device, mmap=mmap, weights_only=True)
+        source = "weights-only, mmap" if mmap else "weights-only"
+    else:
+        mmap = False
+        state = torch.load(control_state_file, map_location=device)
+        source = "full checkpoint"
+    logger.info(
+        f"Loaded {path if source.startswith('weights') else control_state_file} ({source}) "
+        f"in {time.perf_counter() - start:.3f}s, RSS {format_rss(rss_before)} -> {format_rss(current_rss())}"
+    )
+    return state, mmap
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export the weights-only artifact of a mortal checkpoint.")
+    parser.add_argument("--model", default="mortal", choices=["mortal", "mortal3p"], help="bot package to export")
+    args = parser.parse_args(argv)
+
+    model = importlib.import_module(f".{args.model}.model", package=__package__)
+    export_weights(pathlib.Path(model.__file__).parent / "mortal.pth")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+JSON codec used where mjai events have to become text, i.e. at the
+libriichi boundary.
+
+The backend is pluggable: `register_codec` adds one, `set_codec` selects it.
+The default comes from AKAGI_JSON_CODEC ("auto", "orjson" or "json"); "auto"
+uses orjson when it is installed and the standard library otherwise.
+
+Run as a script to time the Controller -> bot and AkagiBot event path over
+a corpus of mjai logs, with text round-trips and with shared dicts:
+
+    python -m mjai_bot.codec [log_dir] [--bot mortal]
+"""
+import os
+import sys
+import json
+import time
+import pathlib
+import argparse
+from typing import Any, Callable, NamedTuple, Optional, Union
+from .logger import logger
+from .mjai_logs import iter_log_files, read_log
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Codec(NamedTuple):
+    name: str
+    dumps: Callable[[Any], str]
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+_codecs: dict[str, Codec] = {
+    "json": Codec("json", lambda obj: json.dumps(obj, separators=(",", ":")), json.loads),
+}
+if orjson is not None:
+    _codecs["orjson"] = Codec("orjson", lambda obj: orjson.dumps(obj).decode("utf-8"), orjson.loads)
+
+_current: Codec = _codecs["json"]
+
+
+def register_codec(name: str, dumps: Callable[[Any], str], loads: Callable[[Union[str, bytes]], Any]) -> None:
+    """
+    :param dumps: object -> compact JSON str
+    :param loads: JSON str -> object
+    """
+    _codecs[name] = Codec(name, dumps, loads)
+
+
+def set_codec(name: str) -> Codec:
+    global _current
+    if name == "auto":
+        name = "orjson" if "orjson" in _codecs else "json"
+    if name not in _codecs:
+        logger.warning(f"Unknown JSON codec {name}, using json")
+        name = "json"
+    _current = _codecs[name]
+    return _current
+
+
+def current_codec() -> Codec:
+    return _current
+
+
+def dumps(obj: Any) -> str:
+    return _current.dumps(obj)
+
+
+def loads(s: Union[str, bytes]) -> Any:
+    return _current.loads(s)
+
+
+def encode_events(events: list[dict]) -> list[str]:
+    """
+    Encode every event once, so every consumer of a batch can share the lines.
+    """
+    return [_current.dumps(e) for e in events]
+
+
+set_codec(os.getenv("AKAGI_JSON_CODEC", "auto"))
+
+
+# ============================================= #
+#                   Benchmark                   #
+# ============================================= #
+BENCH_EVENTS = [
+    {"type": "start_kyoku", "bakaze": "S", "dora_marker": "1p", "kyoku": 2, "honba": 2, "kyotaku": 0, "oya": 1,
+     "scores": [800, 61100, 11300, 26800],
+     "tehais": [["4p", "4s", "P", "3p", "1p", "5s", "2m", "F", "1m", "7s", "9m", "6m", "9s"]] + [["?"] * 13] * 3},
+    {"type": "tsumo", "actor": 1, "pai": "?"},
+    {"type": "dahai", "actor": 1, "pai": "F", "tsumogiri": False},
+    {"type": "tsumo", "actor": 2, "pai": "?"},
+    {"type": "dahai", "actor": 2, "pai": "3m", "tsumogiri": True},
+    {"type": "tsumo", "actor": 3, "pai": "?"},
+    {"type": "dahai", "actor": 3, "pai": "1m", "tsumogiri": True},
+    {"type": "tsumo", "actor": 0, "pai": "3s"},
+]
+
+
+def bench_games(log_dir: Optional[pathlib.Path], seat: int, limit: int) -> list[list[dict]]:
+    """
+    Games of the corpus as event lists, seen from `seat`.
+    Without a log directory, one game made of BENCH_EVENTS.
+    """
+    if log_dir is None:
+        return [[{"type": "start_game", "names": ["0", "1", "2", "3"], "id": seat}] + BENCH_EVENTS + [{"type": "end_game"}]]
+    games = []
+    for path in iter_log_files(log_dir):
+        game: list[dict] = []
+        for line in read_log(path):
+            event = json.loads(line)
+            if event["type"] == "start_game":
+                event = dict(event, id=seat)
+                game = []
+            game.append(event)
+            if event["type"] == "end_game":
+                games.append(game)
+                game = []
+        if len(games) >= limit:
+            break
+    return games[:limit]
+
+
+def _text_path(controller, akagi, batch: list[dict]) -> dict:
+    # Previous path: the batch travels as one JSON string, the bot parses it,
+    # re-encodes each event for libriichi and answers in text, and AkagiBot
+    # parses and re-encodes the same string again
+    s = json.dumps(batch, separators=(",", ":"))
+    response = json.loads(controller.bot.react(s))
+    akagi.react(input_str=s)
+    return response
+
+
+def _dict_path(controller, akagi, batch: list[dict]) -> dict:
+    # Current path: each event is encoded once and the lines are shared
+    lines = encode_events(batch)
+    response = controller.bot_react(batch, lines)
+    akagi.react(input_list=batch, input_lines=lines)
+    return response
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    from .bot import AkagiBot
+    from .controller import Controller
+
+    parser = argparse.ArgumentParser(description="Time the Controller -> bot and AkagiBot event path, text vs dicts.")
+    parser.add_argument("log_dir", type=pathlib.Path, nargs="?", default=None,
+                        help="directory of mjai logs to replay (default: BENCH_EVENTS)")
+    parser.add_argument("--bot", default="mortal", help="bot the Controller runs")
+    parser.add_argument("--seat", type=int, default=0, help="seat the bots play")
+    parser.add_argument("--games", type=int, default=20, help="maximum number of games")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions")
+    args = parser.parse_args(argv)
+
+    games = bench_games(args.log_dir, args.seat, args.games)
+    if not games:
+        print(f"No games found in {args.log_dir}")
+        return 1
+    controller = Controller()
+    if not controller.choose_bot_name(args.bot):
+        print(f"Bot {args.bot} is not available")
+        return 1
+    n_events = sum(len(game) for game in games)
+
+    results: dict[str, float] = {}
+    answers: dict[str, list[tuple]] = {}
+    for name, path in (("text round-trips", _text_path), (f"dict-native ({_current.name})", _dict_path)):
+        best = float("inf")
+        for _ in range(args.repeat):
+            seen = []
+            start = time.perf_counter()
+            for game in games:
+                akagi = AkagiBot()
+                for event in game:
+                    response = path(controller, akagi, [event])
+                    seen.append((response.get("type"), response.get("pai")))
+            best = min(best, time.perf_counter() - start)
+        results[name] = best / n_events * 1e6
+        answers[name] = seen
+        print(f"{name:<24} {results[name]:8.2f} us/event")
+    (before, after), (text_answers, dict_answers) = results.values(), answers.values()
+    print(f"{'events':<24} {n_events:8d}")
+    print(f"{'same answers':<24} {str(text_answers == dict_answers):>8}")
+    print(f"{'saved':<24} {before - after:8.2f} us/event")
+    print(f"{'speedup':<24} {before / after:8.2f}x")
+    return 0 if text_answers == dict_answers else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,55 +1,130 @@
-import os
-import json
-import importlib
+import time
+import threading
 from .base.bot import Bot
+from . import codec
+from .manifest import BotManifest, discover_bots
 from .logger import logger
 from settings.settings import settings
 
 
 class Controller(object):
     def __init__(self):
-        self.available_bots: list[type[Bot]] = []
+        self.available_bots: list[BotManifest] = []
         self.available_bots_names: list[str] = []
-        self.bot: Bot | None = None
+        self.bot_instances: dict[str, Bot] = {}
         self.list_available_bots()
-        self.bot: Bot = self.available_bots[0]() if self.available_bots else None
+        # The bot is imported and constructed on first use, not at startup
+        if settings.model in self.available_bots_names:
+            self.bot_name: str | None = settings.model
+        else:
+            self.bot_name = self.available_bots_names[0] if self.available_bots_names else None
         self.temp_mjai_msg: list[dict] = []
+        self.temp_mjai_lines: list[str] = []
         self.starting_game: bool = False
+        # Answer to the pending decision of a game taken over by `restore_bot`
+        self.restored_action: dict | None = None
+        # Background preloading: bot name -> "pending" | "loading" | "ready" | "failed"
+        self.warmup_status: dict[str, str] = {}
+        self.warmup_times: dict[str, float] = {}
+        self.warmup_started_at: float = time.perf_counter()
+        self._warmup_thread: threading.Thread | None = None
+        self.start_warmup()
+
+    def list_available_bots(self) -> list[BotManifest]:
+        """
+        Read the manifests of the bot directories, without importing any bot.
+        """
+        self.available_bots = discover_bots()
+        self.available_bots_names = [manifest.name for manifest in self.available_bots]
+        return self.available_bots
+
+    @property
+    def bot(self) -> Bot | None:
+        if self.bot_name is None:
+            return None
+        return self.get_bot_instance(self.available_bots_names.index(self.bot_name))
+
+    def preload_targets(self) -> list[str]:
+        """
+        Names of the bots to preload: both mortal flavours when the model is
+        switched automatically, otherwise only the configured one.
+        The configured model always comes first.
+        """
+        if settings.auto_switch_model:
+            names = [settings.model] + [n for n in ("mortal", "mortal3p") if n != settings.model]
+        else:
+            names = [settings.model]
+        return [
+            name for name in names
+            if name in self.available_bots_names
+            and self.available_bots[self.available_bots_names.index(name)].has("preload")
+        ]
+
+    def start_warmup(self) -> None:
+        """
+        Start a background thread that loads and warms up the engines of
+        `preload_targets`, so switching bots at game start finds them hot.
+        """
+        targets = self.preload_targets()
+        if not targets:
+            return
+        for name in targets:
+            self.warmup_status[name] = "pending"
+        self.warmup_started_at = time.perf_counter()
+        self._warmup_thread = threading.Thread(
+            target=self._warmup_worker, args=(targets,), name="model-warmup", daemon=True
+        )
+        self._warmup_thread.start()
+
+    def _warmup_worker(self, targets: list[str]) -> None:
+        for name in targets:
+            self.warmup_status[name] = "loading"
+            try:
+                self.available_bots[self.available_bots_names.index(name)].load_class().preload()
+                self.warmup_times[name] = time.perf_counter() - self.warmup_started_at
+                self.warmup_status[name] = "ready"
+                logger.info(f"Model {name} ready {self.warmup_times[name]:.2f}s after startup")
+            except Exception as e:
+                self.warmup_status[name] = "failed"
+                logger.error(f"Failed to preload {name}: {e}")
+
+    @property
+    def warmup_progress(self) -> tuple[int, int]:
+        """
+        :return: (number of preloads finished, number of preloads)
+        """
+        finished = sum(1 for status in self.warmup_status.values() if status in ("ready", "failed"))
+        return finished, len(self.warmup_status)
 
-    def list_available_bots(self) -> list[type[Bot]]:
-        bots = []
-        bots_names = []
-        # Get the current package folder
-        current_dir = os.path.dirname(__file__)
-        for item in os.listdir(current_dir):
-            if item.startswith("__"):
-                continue
-            if item == "base":
-                continue
-            dir_path = os.path.join(current_dir, item)
-            # Check if folder and has a bot.py file
-            if os.path.isdir(dir_path) and os.path.exists(os.path.join(dir_path, "bot.py")):
-                try:
-                    # Import the bot module using a relative import
-                    module = importlib.import_module(f".{item}.bot", package=__package__)
-                    if hasattr(module, "Bot"):
-                        bot_class = getattr(module, "Bot")
-                        bots.append(bot_class)
-                        bots_names.append(item)
-                except Exception as e:
-                    # Logging error or handling exception
-                    logger.error(f"Error importing bot from {item}: {e}")
-        self.available_bots = bots
-        self.available_bots_names = bots_names
-        return bots
-
-    def react(self, events: list[dict]) -> dict:
+    @property
+    def warmup_done(self) -> bool:
+        finished, total = self.warmup_progress
+        return finished == total
+
+    @property
+    def time_to_ready(self) -> float | None:
+        """
+        Seconds from the start of the warm-up until every preloaded model was ready.
+        """
+        if not self.warmup_done or not self.warmup_times:
+            return None
+        return max(self.warmup_times.values())
+
+    def react(self, events: list[dict], lines: list[str] | None = None) -> dict:
+        """
+        :param events: mjai events as dicts
+        :param lines: the same events encoded with `codec.encode_events`, to share one encoding with other consumers
+        :return: the bot's action as dict
+        """
+        if lines is None:
+            lines = codec.encode_events(events)
         if settings.auto_switch_model:
-            for event in events:
+            for event, line in zip(events, lines):
                 if event["type"] == "start_game":
                     self.starting_game = True
                     self.temp_mjai_msg = []
                     self.temp_mjai_msg.append(event)
+                    self.temp_mjai_lines = [line]
                     continue
                 if event["type"] == "start_kyoku" and self.starting_game:
                     self.starting_game = False
@@ -72,25 +147,94 @@ class Controller(object):
             if self.starting_game:
                 return {"type": "none"}
             events = self.temp_mjai_msg + events
+            lines = self.temp_mjai_lines + lines
             self.temp_mjai_msg = []
-            ans = self.bot.react(json.dumps(events, separators=(",", ":")))
-            return json.loads(ans)
+            self.temp_mjai_lines = []
+            return self.bot_react(events, lines)
         else:
-            if not self.bot:
+            if self.bot_name is None:
                 logger.error("No bot available")
                 return {"type": "none"}
-            ans = self.bot.react(json.dumps(events, separators=(",", ":")))
-            return json.loads(ans)
+            return self.bot_react(events, lines)
+
+    def bot_react(self, events: list[dict], lines: list[str]) -> dict:
+        # Bots outside the base class may only implement the text interface
+        react_events = getattr(self.bot, "react_events", None)
+        if react_events is not None:
+            return react_events(events, lines)
+        return codec.loads(self.bot.react(codec.dumps(events)))
+
+    def get_bot_instance(self, bot_index: int) -> Bot:
+        """
+        Return the bot instance for `bot_index`, creating it on first use.
+
+        Bots reset themselves on every `start_game`, so one instance per bot
+        is reused across games instead of constructing a new one each time.
+        """
+        bot_name = self.available_bots_names[bot_index]
+        if bot_name not in self.bot_instances:
+            try:
+                bot_class = self.available_bots[bot_index].load_class()
+            except Exception as e:
+                logger.error(f"Error importing bot from {bot_name}: {e}")
+                raise
+            self.bot_instances[bot_name] = bot_class()
+        return self.bot_instances[bot_name]
 
-    def choose_bot_index(self, bot_index: int) -> bool:
+    def choose_bot_index(self, bot_index: int, restore: bool = False) -> bool:
+        """
+        :param restore: hand the game in progress over to the new bot (model switch mid-hanchan).
+            Choosing the current bot again rebuilds it on the checkpoint now on disk.
+        """
         if 0 <= bot_index < len(self.available_bots):
-            self.bot = self.available_bots[bot_index]()
+            previous = self.bot_instances.get(self.bot_name) if self.bot_name is not None else None
+            try:
+                self.get_bot_instance(bot_index)
+            except Exception:
+                return False
+            if restore and previous is not None:
+                self.restored_action = self.restore_bot(previous, bot_index)
+            self.bot_name = self.available_bots_names[bot_index]
             return True
         return False
     
-    def choose_bot_name(self, bot_name: str) -> bool:
+    def choose_bot_name(self, bot_name: str, restore: bool = False) -> bool:
         if bot_name in self.available_bots_names:
-            index = self.available_bots_names.index(bot_name)
-            self.bot = self.available_bots[index]()
-            return True
+            return self.choose_bot_index(self.available_bots_names.index(bot_name), restore)
         return False
+
+    def restore_bot(self, previous: Bot, bot_index: int) -> dict | None:
+        """
+        Fast-forward the bot at `bot_index` through the event journal of `previous`,
+        which may be the same bot, e.g. to reload its checkpoint mid-game.
+
+        :return: the restored bot's answer to the last journaled event, None if not restored
+        """
+        journal = getattr(previous, "journal", None)
+        if journal is None or not journal.in_game:
+            return None
+        manifest = self.available_bots[bot_index]
+        previous_manifest = self.available_bots[self.available_bots_names.index(self.bot_name)]
+        if not manifest.has("restore"):
+            logger.warning(f"{manifest.name} cannot take over a game in progress")
+            return None
+        if manifest.players != previous_manifest.players:
+            logger.warning(f"Not restoring a {previous_manifest.players}p game into {manifest.name}")
+            return None
+        start = time.perf_counter()
+        try:
+            # restore() replaces the journal, so hand over a copy
+            action = self.get_bot_instance(bot_index).restore(list(journal.lines))
+            logger.info(f"{manifest.name} took over the game in {(time.perf_counter() - start) * 1000:.1f}ms")
+            return action
+        except Exception as e:
+            logger.error(f"Failed to restore {manifest.name}: {e}")
+            return None
+
+    def take_restored_action(self) -> dict | None:
+        """
+        The answer of the last restore, once, so the caller can render the
+        pending decision without waiting for the next event.
+        """
+        action, self.restored_action = self.restored_action, None
+        return action
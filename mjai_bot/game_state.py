@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+from mjai.mlibriichi.state import PlayerState  # type: ignore
+from .logger import logger
+from . import codec
+from .strategy.safety import TableVisibility, VisibilityView
+
+
+@dataclass(frozen=True)
+class GameStateSnapshot:
+    """
+    Read-only view of the tracked game at one point in the event stream.
+
+    `event_index` counts ingested events, two snapshots with the same index
+    describe the same state.
+    """
+    event_index: int
+    player_id: Optional[int]
+    is_3p: bool
+    dealer: int
+    scores: tuple[int, ...]
+    round_wind: str
+    honba: int
+    kyotaku: int
+    remaining_tiles: int
+    turn: int
+    rivers: Mapping[int, tuple[tuple[str, bool], ...]]
+    riichi_flags: tuple[bool, bool, bool, bool]
+    riichi_early_turns: Mapping[int, int]
+    dora_indicators: tuple[str, ...]
+    discard_count: int
+    call_count: int
+
+
+class GameStateTracker(object):
+    """
+    Single owner of the tracked game state: the mjai `PlayerState` plus the
+    table information it does not expose (rivers with tsumogiri flags,
+    scores, dora indicators, riichi turns, live wall estimate).
+
+    `visibility` keeps the per-seat river counts, genbutsu and suji tables
+    used by the safety code, updated in place by the events that change them.
+
+    Every event is applied exactly once by `ingest`. Consumers read
+    `player_state` (for the mjai.Bot properties) or immutable snapshots.
+    """
+    def __init__(self):
+        self.player_state: Optional[PlayerState] = None
+        self.player_id: Optional[int] = None
+        self.is_3p: bool = False
+        self.event_index: int = 0
+        self.last_action_candidate = None
+        self._snapshot: Optional[GameStateSnapshot] = None
+        self.visibility = TableVisibility()
+        self._reset_game()
+
+    def _reset_game(self) -> None:
+        self.dealer = 0
+        self.scores = [25000, 25000, 25000, 25000]
+        self.round_wind = "E"
+        self.honba = 0
+        self.kyotaku = 0
+        self.dora_indicators: list[str] = []
+        self.discard_events: list[dict] = []
+        self.call_events: list[dict] = []
+        self.visibility.reset()
+        self._reset_kyoku()
+        self.remaining_tiles = 0
+
+    def _reset_kyoku(self) -> None:
+        self.rivers: dict[int, list[tuple[str, bool]]] = {0: [], 1: [], 2: [], 3: []}
+        self.riichi_actors: set[int] = set()
+        self.riichi_early_turns: dict[int, int] = {}  # actor -> 宣言時のざっくり順目カウンタ
+        self.turn = 0  # ざっくり順目カウンタ（配牌後0、以後各打牌で+1）
+        self.visibility.reset_rivers()
+
+    def ingest(self, events: list[dict], lines: Optional[list[str]] = None):
+        """
+        Apply a batch of events.
+
+        :param events: mjai events as dicts
+        :param lines: the same events encoded with `codec.encode_events`, or None
+        :return: the `PlayerState.update` result of the last event
+        """
+        if lines is None:
+            lines = codec.encode_events(events)
+        for event, line in zip(events, lines):
+            self.event_index += 1
+            et = event["type"]
+
+            if et == "start_game":
+                self.player_id = event["id"]
+                self.player_state = PlayerState(self.player_id)
+                self.is_3p = False
+                self._reset_game()
+
+            if et == "start_kyoku":
+                # 3P 判定
+                if (
+                    event["scores"][0] == 35000 and
+                    event["scores"][1] == 35000 and
+                    event["scores"][2] == 35000 and
+                    event["scores"][3] == 0
+                ):
+                    self.is_3p = True
+
+                # 局情報
+                self.dealer = event.get("oya", self.dealer)
+                self.scores = event.get("scores", self.scores)
+                self.honba = event.get("honba", 0)
+                self.kyotaku = event.get("kyotaku", 0)
+                self.round_wind = event.get("bakaze", "E")
+                self._reset_kyoku()
+
+                # 残り live ツモ枚数 初期化
+                init_4p = int(os.getenv("AKAGI_INIT_LIVE_TILES_4P", "70"))
+                init_3p = int(os.getenv("AKAGI_INIT_LIVE_TILES_3P", "83"))
+                self.remaining_tiles = init_3p if self.is_3p else init_4p
+
+            # dora 表示（カン後の新ドラ含む）を即時反映
+            if et == "start_kyoku" or et == "dora":
+                self.dora_indicators.append(event["dora_marker"])
+                self.visibility.add_dora(event["dora_marker"])
+
+            # ツモは live -1
+            if et == "tsumo":
+                self.remaining_tiles = max(0, self.remaining_tiles - 1)
+
+            if et == "dahai":
+                self.discard_events.append(event)
+                actor = event["actor"]
+                self.rivers.setdefault(actor, []).append((event["pai"], bool(event.get("tsumogiri", False))))
+                self.visibility.discard(actor, event["pai"], bool(event.get("tsumogiri", False)))
+                # 打牌でざっくり順目+1
+                self.turn += 1
+
+            if et in ["chi", "pon", "daiminkan", "kakan", "ankan"]:
+                self.call_events.append(event)
+                # 加槓は既に晒したポンの3枚を除く
+                self.visibility.meld(event["actor"], [event["pai"]] if et == "kakan" else event.get("consumed", []))
+
+            # カン時は live -1（補助ツモは王牌）
+            if et in ["daiminkan", "kakan", "ankan"]:
+                self.remaining_tiles = max(0, self.remaining_tiles - 1)
+
+            # 立直追跡（早い順目を記録）
+            if et in ["reach", "reach_accepted"]:
+                actor = event["actor"]
+                self.riichi_actors.add(actor)
+                self.riichi_early_turns.setdefault(actor, self.turn)
+
+            if self.player_state is None:
+                continue
+
+            # 3P用の nukidora パッチ
+            if et == "nukidora":
+                logger.debug(f"Event: {event}")
+                replace_event = {
+                    "type": "dahai",
+                    "actor": event["actor"],
+                    "pai": "N",
+                    "tsumogiri": self.player_state.last_self_tsumo() == "N" and event["actor"] == self.player_id,
+                }
+                self.discard_events.append(replace_event)
+                self.rivers.setdefault(event["actor"], []).append(("N", False))
+                self.visibility.discard(event["actor"], "N", False)
+                # 打牌扱いで順目+1
+                self.turn += 1
+                self.last_action_candidate = self.player_state.update(codec.dumps(replace_event))
+                continue
+
+            logger.debug(f"Event: {event}")
+            self.last_action_candidate = self.player_state.update(line)
+        return self.last_action_candidate
+
+    def snapshot(self) -> GameStateSnapshot:
+        """
+        Immutable view of the current state, rebuilt only after new events.
+        """
+        if self._snapshot is not None and self._snapshot.event_index == self.event_index:
+            return self._snapshot
+        self._snapshot = GameStateSnapshot(
+            event_index=self.event_index,
+            player_id=self.player_id,
+            is_3p=self.is_3p,
+            dealer=self.dealer,
+            scores=tuple(self.scores),
+            round_wind=self.round_wind,
+            honba=self.honba,
+            kyotaku=self.kyotaku,
+            remaining_tiles=self.remaining_tiles,
+            turn=self.turn,
+            rivers=MappingProxyType({k: tuple(v) for k, v in self.rivers.items()}),
+            riichi_flags=tuple(a in self.riichi_actors for a in range(4)),
+            riichi_early_turns=MappingProxyType(dict(self.riichi_early_turns)),
+            dora_indicators=tuple(self.dora_indicators),
+            discard_count=len(self.discard_events),
+            call_count=len(self.call_events),
+        )
+        return self._snapshot
+
+    def visibility_view(self) -> VisibilityView:
+        """
+        Read-only view of `visibility`, no copy. It is only valid until the
+        next `ingest`.
+        """
+        return self.visibility.view()
+
@@ -0,0 +1,173 @@
+import copy
+import torch
+from torch import nn, Tensor
+from typing import Callable, Optional
+from .logger import logger
+
+
+class FusedChannelAttention(nn.Module):
+    """
+    ChannelAttention that runs the shared MLP once on the stacked mean and
+    amax poolings instead of calling it twice.
+    """
+    def __init__(self, shared_mlp: nn.Module):
+        super().__init__()
+        self.shared_mlp = shared_mlp
+
+    def forward(self, x: Tensor):
+        pooled = torch.stack((x.mean(-1), x.amax(-1)))
+        weight = self.shared_mlp(pooled).sum(0).sigmoid()
+        return weight.unsqueeze(-1) * x
+
+
+class InferenceGraph(nn.Module):
+    """
+    Brain encoder and DQN head of a version 2-4 model as a single
+    (obs, mask) -> q module.
+    """
+    def __init__(self, brain: nn.Module, dqn: nn.Module):
+        super().__init__()
+        self.encoder = brain.encoder
+        self.actv = brain.actv
+        self.dqn = dqn
+
+    def forward(self, obs: Tensor, mask: Tensor):
+        phi = self.actv(self.encoder(obs))
+        return self.dqn(phi, mask)
+
+
+@torch.no_grad()
+def fold_conv_bn(conv: nn.Conv1d, bn: nn.BatchNorm1d) -> nn.Conv1d:
+    """
+    Fold an eval-mode BatchNorm1d into the Conv1d right before it.
+    """
+    fused = copy.deepcopy(conv)
+    scale = torch.rsqrt(bn.running_var + bn.eps)
+    shift = -bn.running_mean * scale
+    if bn.affine:
+        scale = scale * bn.weight
+        shift = shift * bn.weight + bn.bias
+    bias = conv.bias if conv.bias is not None else torch.zeros_like(bn.running_mean)
+    fused.weight = nn.Parameter(conv.weight * scale[:, None, None], requires_grad=False)
+    fused.bias = nn.Parameter(bias * scale + shift, requires_grad=False)
+    return fused
+
+
+def fold_batch_norms(module: nn.Module) -> int:
+    """
+    Fold every BatchNorm1d that directly follows a Conv1d inside an
+    nn.Sequential into that conv, in place.
+
+    BatchNorms after a residual add (pre-activation blocks) are left as is,
+    in eval mode they are a plain per-channel affine already.
+
+    :return: number of folded BatchNorms
+    """
+    folded = 0
+    for child in module.children():
+        folded += fold_batch_norms(child)
+    if isinstance(module, nn.Sequential):
+        for i in range(len(module) - 1):
+            if isinstance(module[i], nn.Conv1d) and isinstance(module[i + 1], nn.BatchNorm1d):
+                module[i] = fold_conv_bn(module[i], module[i + 1])
+                module[i + 1] = nn.Identity()
+                folded += 1
+    return folded
+
+
+def fuse_channel_attention(module: nn.Module) -> int:
+    """
+    Replace every ChannelAttention in `module` with FusedChannelAttention, in place.
+
+    :return: number of replaced modules
+    """
+    fused = 0
+    for name, child in module.named_children():
+        if hasattr(child, "shared_mlp") and not isinstance(child, FusedChannelAttention):
+            setattr(module, name, FusedChannelAttention(child.shared_mlp))
+            fused += 1
+        else:
+            fused += fuse_channel_attention(child)
+    return fused
+
+
+def random_inputs(obs_shape: tuple, action_space: int, batch_size: int, device: torch.device) -> tuple[Tensor, Tensor]:
+    obs = torch.rand((batch_size, *obs_shape), device=device)
+    mask = torch.rand((batch_size, action_space), device=device) > 0.5
+    # A row without any legal action is not a valid input
+    mask[:, -1] = True
+    return obs, mask
+
+
+def max_q_error(graph: Callable, brain: nn.Module, dqn: nn.Module, obs: Tensor, mask: Tensor) -> float:
+    """
+    Largest absolute difference between the Q-values of `graph` and of the
+    unfused brain + dqn on the legal actions of a batch.
+    """
+    with torch.inference_mode():
+        q_ref = dqn(brain(obs), mask)
+        q_out = graph(obs, mask)
+    return (q_ref - q_out).abs()[mask].max().item()
+
+
+def freeze_graph(graph: nn.Module, example: tuple[Tensor, Tensor]) -> tuple[Callable, str]:
+    """
+    Freeze `graph` with TorchScript, falling back to torch.compile and then
+    to the eager module.
+
+    :return: (frozen module, name of the method that worked)
+    """
+    try:
+        with torch.no_grad():
+            traced = torch.jit.trace(graph, example, check_trace=False)
+            return torch.jit.freeze(traced), "torchscript"
+    except Exception as e:
+        logger.warning(f"TorchScript freeze failed, trying torch.compile: {e}")
+    try:
+        compiled = torch.compile(graph, dynamic=True)
+        # Compilation is lazy, run it once so failures surface here
+        with torch.no_grad():
+            compiled(*example)
+        return compiled, "compile"
+    except Exception as e:
+        logger.warning(f"torch.compile failed, using the eager fused graph: {e}")
+    return graph, "eager"
+
+
+def build_inference_graph(
+    brain: nn.Module,
+    dqn: nn.Module,
+    obs_shape: tuple,
+    action_space: int,
+    device: torch.device,
+    tolerance: float,
+    check_batch_size: int = 16,
+) -> Optional[Callable]:
+    """
+    Build the fused inference graph of a Brain/DQN pair: BatchNorms folded
+    into convs, ChannelAttention MLP calls merged, then frozen.
+
+    The fused graph is checked against the unfused Q-values on random
+    observations and rejected if they differ by more than `tolerance`.
+
+    :return: the frozen graph, or None if the model cannot be fused
+    """
+    if brain.version not in (2, 3, 4) or brain.is_oracle:
+        logger.info(f"Fused inference graph is not available for version {brain.version} models")
+        return None
+
+    graph = InferenceGraph(copy.deepcopy(brain), copy.deepcopy(dqn)).to(device).eval()
+    folded = fold_batch_norms(graph)
+    fused = fuse_channel_attention(graph)
+    frozen, method = freeze_graph(graph, random_inputs(obs_shape, action_space, 2, device))
+
+    obs, mask = random_inputs(obs_shape, action_space, check_batch_size, device)
+    error = max_q_error(frozen, brain, dqn, obs, mask)
+    if error > tolerance:
+        logger.error(f"Fused inference graph rejected: max |dQ| {error:.2e} > tolerance {tolerance:.2e}")
+        return None
+    logger.info(
+        f"Fused inference graph built ({method}): {folded} BatchNorms folded, "
+        f"{fused} ChannelAttentions merged, max |dQ| {error:.2e}"
+    )
+    return frozen
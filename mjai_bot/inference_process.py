@@ -0,0 +1,365 @@
+"""
+Optional dedicated inference process (settings.inference.process).
+
+The engines live in a separate, long-lived process, so torch inference does
+not share a GIL and a garbage collector with the TUI, the Playwright
+callbacks and the log sinks, and it can be pinned to its own cores
+(settings.inference.process_cores).
+
+Data path: observations and masks are written into a `shared_memory` ring
+buffer of fixed slots, the slot index goes through a queue, and actions,
+Q-values and greedy flags are read back from the same slot. No array is
+pickled. A control pipe handles loading / swapping models and warm-up.
+
+Every request carries an id that the inference process echoes back. A slot
+whose request timed out stays out of use until its late answer arrives, so
+the process can never write stale results into a slot that was reused.
+
+Bots get a `RemoteEngine`, which quacks like `MortalEngine` for libriichi.
+"""
+import os
+import atexit
+import queue
+import importlib
+import threading
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Any, Callable, NamedTuple, Optional
+import numpy as np
+from .logger import logger
+from .react_result import ReactResult
+
+RING_SLOTS = 4
+# libriichi asks for one seat at a time, larger batches are split
+RING_MAX_BATCH = 4
+REQUEST_TIMEOUT = 10.0
+SLOT_ALIGN = 64
+
+
+class RingLayout(NamedTuple):
+    slots: int
+    max_batch: int
+    obs_shape: tuple[int, ...]
+    action_space: int
+
+    def fields(self) -> list[tuple[str, type, tuple[int, ...]]]:
+        b, a = self.max_batch, self.action_space
+        return [
+            ("obs", np.float32, (b, *self.obs_shape)),
+            ("masks", np.bool_, (b, a)),
+            ("actions", np.int64, (b,)),
+            ("q_out", np.float32, (b, a)),
+            ("is_greedy", np.bool_, (b,)),
+        ]
+
+    @property
+    def slot_nbytes(self) -> int:
+        total = 0
+        for _, dtype, shape in self.fields():
+            total += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // SLOT_ALIGN) * SLOT_ALIGN
+        return total
+
+
+class SharedRing(object):
+    """
+    Fixed-size slots in one shared memory block, each slot holding the
+    inputs and outputs of one batch as numpy views.
+    """
+    def __init__(self, layout: RingLayout, name: Optional[str] = None):
+        self.layout = layout
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=layout.slots * layout.slot_nbytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self._views = [self._slot_views(i) for i in range(layout.slots)]
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _slot_views(self, slot: int) -> dict[str, np.ndarray]:
+        views = {}
+        offset = slot * self.layout.slot_nbytes
+        for field, dtype, shape in self.layout.fields():
+            views[field] = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            offset += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // SLOT_ALIGN) * SLOT_ALIGN
+        return views
+
+    def views(self, slot: int) -> dict[str, np.ndarray]:
+        return self._views[slot]
+
+    def close(self) -> None:
+        self._views = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ============================================= #
+#                Inference side                 #
+# ============================================= #
+def serve(control, requests, results, cores: list[int]) -> None:
+    """
+    Entry point of the inference process.
+
+    :param control: pipe end for (command, *args) -> (status, value)
+    :param requests: queue of (package, slot, batch_size, request id), None to stop
+    :param results: queue of (request id, error or None)
+    :param cores: CPU cores to pin the process to, empty to keep the affinity
+    """
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    engines: dict[str, Any] = {}
+    rings: dict[str, SharedRing] = {}
+
+    def handle_control() -> None:
+        while True:
+            command, *args = control.recv()
+            try:
+                match command:
+                    case "load":
+                        # Loading again swaps in the engine of the current checkpoint
+                        package, = args
+                        model = importlib.import_module(f"mjai_bot.{package}.model")
+                        engine = model.load_engine()
+                        engines[package] = engine
+                        control.send(("ok", {
+                            "name": engine.name,
+                            "engine_type": engine.engine_type,
+                            "is_oracle": engine.is_oracle,
+                            "version": engine.version,
+                            "enable_quick_eval": engine.enable_quick_eval,
+                            "enable_rule_based_agari_guard": engine.enable_rule_based_agari_guard,
+                            "obs_shape": tuple(model.obs_shape(engine.version)),
+                            "action_space": model.ACTION_SPACE,
+                        }))
+                    case "attach":
+                        package, name, layout = args
+                        rings[package] = SharedRing(RingLayout(*layout), name)
+                        control.send(("ok", None))
+                    case "warm_up":
+                        package, = args
+                        control.send(("ok", engines[package].warm_up()))
+                    case "stop":
+                        requests.put(None)
+                        control.send(("ok", None))
+                        return
+                    case _:
+                        control.send(("error", f"Unknown command {command}"))
+            except Exception:
+                control.send(("error", traceback.format_exc()))
+
+    threading.Thread(target=handle_control, name="inference-control", daemon=True).start()
+    while (item := requests.get()) is not None:
+        package, slot, n, request_id = item
+        try:
+            views = rings[package].views(slot)
+            result = engines[package].react_batch_local(views["obs"][:n], views["masks"][:n], None)
+            views["actions"][:n] = result.actions
+            views["q_out"][:n] = result.q_out
+            views["is_greedy"][:n] = result.is_greedy
+            results.put((request_id, None))
+        except Exception:
+            results.put((request_id, traceback.format_exc()))
+    for ring in rings.values():
+        ring.close()
+
+
+# ============================================= #
+#                  Client side                  #
+# ============================================= #
+class RemoteEngine(object):
+    """
+    Engine proxy handed to libriichi `Bot`s, forwarding forward passes to
+    the inference process through a `SharedRing`.
+
+    :param hedge: optional `(react_batch_local, obs, masks, invisible_obs) -> lists`
+        wrapper used by `react_batch`, e.g. to race the online server
+    """
+    def __init__(self, process: "InferenceProcess", package: str, meta: dict, ring: SharedRing,
+                 hedge: Optional[Callable] = None):
+        self.process = process
+        self.package = package
+        self.ring = ring
+        self.hedge = hedge
+        self.engine_type = meta["engine_type"]
+        self.name = meta["name"]
+        self.is_oracle = meta["is_oracle"]
+        self.version = meta["version"]
+        self.enable_quick_eval = meta["enable_quick_eval"]
+        self.enable_rule_based_agari_guard = meta["enable_rule_based_agari_guard"]
+        self.free_slots: queue.Queue[int] = queue.Queue()
+        for slot in range(ring.layout.slots):
+            self.free_slots.put(slot)
+
+    def react_batch(self, obs, masks, invisible_obs):
+        if self.hedge is not None:
+            return self.hedge(self.react_batch_local, obs, masks, invisible_obs)
+        # libriichi only takes plain lists
+        return self.react_batch_local(obs, masks, invisible_obs).to_lists()
+
+    def react_batch_local(self, obs, masks, invisible_obs) -> ReactResult:
+        if self.is_oracle:
+            raise NotImplementedError("Oracle engines cannot run in the inference process")
+        n = len(obs)
+        step = self.ring.layout.max_batch
+        if n > step:
+            parts = [self.react_batch_local(obs[i:i + step], masks[i:i + step], None) for i in range(0, n, step)]
+            return ReactResult(*(np.concatenate(field) for field in zip(*parts)))
+        try:
+            slot = self.free_slots.get(timeout=REQUEST_TIMEOUT)
+        except queue.Empty:
+            raise TimeoutError(f"No free ring slot within {REQUEST_TIMEOUT}s, the inference process is not answering")
+        release = True
+        try:
+            views = self.ring.views(slot)
+            views["obs"][:n] = obs
+            views["masks"][:n] = masks
+            self.process.submit(self.package, slot, n, lambda: self.free_slots.put(slot))
+            return ReactResult(
+                actions = views["actions"][:n].copy(),
+                q_out = views["q_out"][:n].copy(),
+                masks = views["masks"][:n].copy(),
+                is_greedy = views["is_greedy"][:n].copy(),
+            )
+        except TimeoutError:
+            # The process may still write into the slot, it comes back with the late answer
+            release = False
+            raise
+        finally:
+            if release:
+                self.free_slots.put(slot)
+
+    def warm_up(self, batch_size: int = 1) -> float:
+        """
+        Warm up the engine inside the inference process.
+
+        :return: wall time of its dummy forward pass in seconds
+        """
+        return self.process.call("warm_up", self.package)
+
+
+class InferenceProcess(object):
+    def __init__(self, cores: list[int]):
+        # spawn: the UI process runs threads, forking it is not safe
+        ctx = mp.get_context("spawn")
+        self.control, child_control = ctx.Pipe()
+        self.requests = ctx.Queue()
+        self.results = ctx.Queue()
+        self.process = ctx.Process(
+            target=serve,
+            args=(child_control, self.requests, self.results, list(cores)),
+            name="akagi-inference",
+            daemon=True,
+        )
+        self.process.start()
+        self._control_lock = threading.Lock()
+        self._engines_lock = threading.Lock()
+        self._requests_lock = threading.Lock()
+        self._next_request = 0
+        self._pending: dict[int, threading.Event] = {}
+        self._errors: dict[int, Optional[str]] = {}
+        # timed out requests -> callback returning their slot once answered
+        self._late: dict[int, Callable[[], None]] = {}
+        self.engines: dict[str, RemoteEngine] = {}
+        self._dispatcher = threading.Thread(target=self._dispatch, name="inference-results", daemon=True)
+        self._dispatcher.start()
+        logger.info(f"Inference process started (pid {self.process.pid}, cores {list(cores) or 'any'})")
+
+    def _dispatch(self) -> None:
+        while (item := self.results.get()) is not None:
+            request_id, error = item
+            with self._requests_lock:
+                event = self._pending.pop(request_id, None)
+                if event is not None:
+                    self._errors[request_id] = error
+                    event.set()
+                    continue
+                release = self._late.pop(request_id, None)
+            if release is not None:
+                logger.warning(f"Inference request {request_id} answered after its timeout, result discarded")
+                release()
+
+    def call(self, command: str, *args) -> Any:
+        with self._control_lock:
+            self.control.send((command, *args))
+            status, value = self.control.recv()
+        if status != "ok":
+            raise RuntimeError(f"Inference process failed on {command}: {value}")
+        return value
+
+    def submit(self, package: str, slot: int, n: int, on_late: Callable[[], None]) -> None:
+        """
+        Run the batch in `slot` and wait until its results are written back.
+
+        :param on_late: called from the result thread once a request that
+            timed out is answered, i.e. when its slot may be used again
+        """
+        event = threading.Event()
+        with self._requests_lock:
+            self._next_request += 1
+            request_id = self._next_request
+            self._pending[request_id] = event
+        self.requests.put((package, slot, n, request_id))
+        if not event.wait(REQUEST_TIMEOUT):
+            with self._requests_lock:
+                # Unless the answer came in right after the timeout
+                if self._pending.pop(request_id, None) is not None:
+                    self._late[request_id] = on_late
+                    raise TimeoutError(f"Inference process did not answer within {REQUEST_TIMEOUT}s")
+        error = self._errors.pop(request_id, None)
+        if error is not None:
+            raise RuntimeError(f"Inference process failed: {error}")
+
+    def engine(self, package: str, hedge: Optional[Callable] = None) -> RemoteEngine:
+        """
+        Load the engine of `package` in the inference process, once.
+        """
+        with self._engines_lock:
+            if package not in self.engines:
+                meta = self.call("load", package)
+                layout = RingLayout(RING_SLOTS, RING_MAX_BATCH, meta["obs_shape"], meta["action_space"])
+                ring = SharedRing(layout)
+                self.call("attach", package, ring.name, tuple(layout))
+                self.engines[package] = RemoteEngine(self, package, meta, ring, hedge)
+                logger.info(f"{package} loaded in the inference process, ring of {layout.slots} x {layout.slot_nbytes} bytes")
+            return self.engines[package]
+
+    def swap(self, package: str) -> None:
+        """
+        Reload the engine of `package`, e.g. after its checkpoint changed.
+        """
+        with self._engines_lock:
+            self.call("load", package)
+
+    def stop(self) -> None:
+        if not self.process.is_alive():
+            return
+        try:
+            self.call("stop")
+        except Exception as e:
+            logger.warning(f"Inference process did not stop cleanly: {e}")
+        self.process.join(timeout=5)
+        self.results.put(None)
+        for engine in self.engines.values():
+            engine.ring.close()
+        self.engines.clear()
+
+
+_process: Optional[InferenceProcess] = None
+_process_lock = threading.Lock()
+
+
+def remote_engine(package: str, cores: list[int], hedge: Optional[Callable] = None) -> RemoteEngine:
+    """
+    Engine of `package` running in the shared inference process, which is
+    started on first use and stopped at exit.
+    """
+    global _process
+    with _process_lock:
+        if _process is None:
+            _process = InferenceProcess(cores)
+            atexit.register(_process.stop)
+    return _process.engine(package, hedge)
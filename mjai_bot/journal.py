@@ -0,0 +1,52 @@
+"""
+Per-game event journal, used to rebuild a libriichi-backed bot without
+running inference on the events it has already seen.
+
+libriichi's `Bot.react(line, can_act=False)` only updates the player state,
+so `fast_forward` replays history that way and asks the engine for the last
+event only.
+"""
+import time
+from typing import Callable, Optional
+from .logger import logger
+
+
+class EventJournal(object):
+    """
+    Encoded mjai events of the current game, from its start_game on.
+    """
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def record(self, event: dict, line: str) -> None:
+        match event["type"]:
+            case "start_game":
+                self.lines = [line]
+            case "end_game":
+                self.lines = []
+            case _:
+                if self.lines:
+                    self.lines.append(line)
+
+    @property
+    def in_game(self) -> bool:
+        return bool(self.lines)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+
+def fast_forward(react: Callable[..., Optional[str]], lines: list[str]) -> Optional[str]:
+    """
+    Feed `lines` to a libriichi `Bot.react`, suppressing the forward pass on
+    every line but the last, which may be a pending decision.
+
+    :return: the bot's answer to the last line
+    """
+    start = time.perf_counter()
+    action = None
+    last = len(lines) - 1
+    for i, line in enumerate(lines):
+        action = react(line, can_act=(i == last))
+    logger.info(f"Fast-forwarded {len(lines)} events in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return action
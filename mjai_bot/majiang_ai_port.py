@@ -36,6 +36,8 @@ Notes:
 - This file is self-contained; no external ML deps.
 - Tile notation helpers in this file accept strings 'm/p/s' + '1..9', honors 'z1..z7'.
 - Red 5 tiles can be written as 'm5r','p5r','s5r'. Internally we normalize to base 'm5','p5','s5' for counts.
+- Parsing goes through the shared integer tables of mjai_bot/tiles.py.
+- Shanten and ukeire are exact (regular, chiitoitsu, kokushi), from mjai_bot/shanten.py.
 - Tuning knobs are exposed at the top (see TUNABLES).
 """
 
@@ -43,15 +45,15 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 import math
-import collections
-import copy
 import random
 import os
 import os, logging
+from . import tiles
+from .shanten import shanten, ukeire
 AI_LOG = logging.getLogger("majiang_ai")
 if not AI_LOG.handlers:
     h = logging.StreamHandler()
-    fmt = logging.Formatter("AI[% (levelname)s ] % (message)s")
+    fmt = logging.Formatter("AI[%(levelname)s] %(message)s")
     h.setFormatter(fmt)
     AI_LOG.addHandler(h)
 AI_LOG.setLevel(logging.INFO if os.getenv("AI_DEBUG") else logging.WARNING)
@@ -65,7 +67,9 @@ __all__ = ["PlayerPolicy", "Decision", "SuanPai", "Paishu", "to_base_tile", "is_
 TUNABLES = {
     # Lookahead controls
     "MAX_SHANTEN_LOOKAHEAD": 2,      # deep eval up to 2-shanten (>=3 uses simple eval)
-    "WIDTH_BY_SHANTEN": {0: 1.00, 1: 0.85, 2: 0.72},  # scale by shanten breadth
+    "WIDTH_BY_SHANTEN": {0: 1.00, 1: 0.85, 2: 0.72, 3: 0.61, 4: 0.52},  # scale by shanten breadth
+    "UKEIRE_WEIGHT": 0.15,           # share of the shape value moved by ukeire (kept below the shanten steps)
+    "GOOD_WAIT_MIN": 3.0,            # live winning tiles for a wait to count as good
 
     # Weights for eval composition
     "W_SHAPE_BASE": 1.0,             # shape/ukeire weight
@@ -170,39 +174,29 @@ SUITS = ('m', 'p', 's')
 HONORS = ('z',)
 ALL_TILES: List[str] = [f"{s}{n}" for s in SUITS for n in range(1,10)] + [f"z{n}" for n in range(1,8)]
 
+_RED5 = frozenset(tiles.MAJIANG[i] for i in tiles.RED.values())
+_BASE_TILE: Dict[str,str] = {t: tiles.MAJIANG[tiles.BASE[i]] for t, i in tiles.FROM_MAJIANG.items()}
+_BASE_ID: Dict[str,int] = {t: tiles.BASE[i] for t, i in tiles.FROM_MAJIANG.items()}
+
 def is_honor(t: str) -> bool:
     return t.startswith('z')
 
 def parse_tile(t: str) -> Tuple[str,int]:
-    s = t[0]; n = int(t[1])
-    return s, n
+    i = tiles.FROM_MAJIANG[t]
+    return t[0], tiles.RANK[i]
 
 def is_red5(t: str) -> bool:
-    return len(t) == 3 and t.endswith('r') and t[0] in SUITS and t[1] == '5'
+    return t in _RED5
 
 def to_base_tile(t: str) -> str:
     """Strip red marker if present (m5r->m5)."""
-    return f"{t[0]}5" if is_red5(t) else t
+    return _BASE_TILE.get(t, t)
 
 def tile_nexts(t: str) -> List[str]:
-    s,n = parse_tile(t)
-    if s in HONORS: return []
-    res = []
-    for d in (-2,-1,1,2):
-        k = n + d
-        if 1 <= k <= 9:
-            res.append(f"{s}{k}")
-    return res
+    return [tiles.MAJIANG[j] for j in tiles.NEXTS[tiles.FROM_MAJIANG[t]]]
 
 def tile_neighbors(t: str) -> List[str]:
-    s,n = parse_tile(t)
-    if s in HONORS: return []
-    res = []
-    for d in (-1,1):
-        k = n + d
-        if 1 <= k <= 9:
-            res.append(f"{s}{k}")
-    return res
+    return [tiles.MAJIANG[j] for j in tiles.NEIGHBORS[tiles.FROM_MAJIANG[t]]]
 
 # =========================
 # SuanPai & Paishu (normalized)
@@ -211,44 +205,61 @@ class Paishu:
     """
     Normalized remaining tiles view used for lookahead.
     Guarantees sum over tiles equals practical draw capacity left in wall.
+
+    Counts are a 34-int array by base tile id (mjai_bot/tiles.py) with a
+    running total; the scale wall_remain / total is only recomputed when read
+    after a change, so pop/push are O(1) and a lookahead can undo a simulated
+    draw by pushing it back.
     """
-    def __init__(self, counts: Dict[str,int], wall_remain: int):
-        # raw unseen count by tile (base-tile indexing: 'm5' holds pool for 'm5'+'m5r')
+    __slots__ = ("_counts", "_total", "_wall", "_scale")
+
+    def __init__(self, counts: List[int], wall_remain: int):
+        # raw unseen count by base tile id ('m5' holds pool for 'm5'+'m5r'); owned by this view
         self._counts = counts
-        self.wall_remain = max(0, wall_remain)
-        # cache normalized values
-        self._norm_cache: Dict[str,float] = {}
-        self._recompute_norm()
-
-    def _recompute_norm(self):
-        total = sum(max(c,0) for c in self._counts.values())
-        self._norm_cache.clear()
-        if total <= 0 or self.wall_remain <= 0:
-            for t in ALL_TILES:
-                self._norm_cache[t] = 0.0
-            return
-        scale = float(self.wall_remain) / float(total)
-        for t in ALL_TILES:
-            c = max(self._counts.get(to_base_tile(t), 0), 0)
-            self._norm_cache[t] = c * scale
+        self._total = sum(counts)
+        self._wall = max(0, wall_remain)
+        self._scale: Optional[float] = None
+
+    @property
+    def wall_remain(self) -> int:
+        return self._wall
+
+    def _norm_scale(self) -> float:
+        if self._scale is None:
+            if self._total <= 0 or self._wall <= 0:
+                self._scale = 0.0
+            else:
+                self._scale = float(self._wall) / float(self._total)
+        return self._scale
+
+    def val_id(self, i: int) -> float:
+        """Return normalized remaining amount for base tile id i."""
+        return self._counts[i] * self._norm_scale()
+
+    def pop_id(self, i: int):
+        if self._counts[i] > 0:
+            self._counts[i] -= 1
+            self._total -= 1
+        if self._wall > 0:
+            self._wall -= 1
+        self._scale = None
+
+    def push_id(self, i: int):
+        self._counts[i] += 1
+        self._total += 1
+        self._wall += 1
+        self._scale = None
 
     def val(self, t: str) -> float:
         """Return normalized remaining amount for tile t (base-tile address)."""
-        return self._norm_cache.get(to_base_tile(t), 0.0)
+        i = _BASE_ID.get(t)
+        return 0.0 if i is None else self.val_id(i)
 
     def pop(self, t: str):
-        bt = to_base_tile(t)
-        if bt in self._counts and self._counts[bt] > 0:
-            self._counts[bt] -= 1
-        if self.wall_remain > 0:
-            self.wall_remain -= 1
-        self._recompute_norm()
+        self.pop_id(_BASE_ID[t])
 
     def push(self, t: str):
-        bt = to_base_tile(t)
-        self._counts[bt] = self._counts.get(bt,0) + 1
-        self.wall_remain += 1
-        self._recompute_norm()
+        self.push_id(_BASE_ID[t])
 
 class SuanPai:
     """
@@ -258,71 +269,30 @@ class SuanPai:
         self.reset()
 
     def reset(self):
-        self.unseen: Dict[str,int] = {t: 4 for t in ALL_TILES}  # base tiles only
-        self.red5_seen = {'m':0,'p':0,'s':0}
+        self.unseen: List[int] = [4] * tiles.N_KINDS  # by base tile id
+        self.red5_seen: List[int] = [0, 0, 0]        # by suit (m, p, s)
 
     def observe_initial(self, my_hand: List[str], dora_indicators: List[str]):
         self.see_tiles(my_hand)
         # Dora indicator consumes the indicator tile itself; the dora tile remains unseen
         self.see_tiles([to_base_tile(x) for x in dora_indicators])
 
-    def see_tiles(self, tiles: List[str]):
-        for t in tiles:
-            bt = to_base_tile(t)
-            if bt in self.unseen and self.unseen[bt] > 0:
-                self.unseen[bt] -= 1
-            if is_red5(t):
-                self.red5_seen[t[0]] += 1
+    def see_tiles(self, seen: List[str]):
+        for t in seen:
+            i = tiles.FROM_MAJIANG.get(t)
+            if i is None:
+                continue
+            b = tiles.BASE[i]
+            if self.unseen[b] > 0:
+                self.unseen[b] -= 1
+            if tiles.IS_RED[i]:
+                self.red5_seen[tiles.SUIT[i]] += 1
 
-    def see_meld(self, tiles: List[str]):
-        self.see_tiles(tiles)
+    def see_meld(self, meld: List[str]):
+        self.see_tiles(meld)
 
     def get_paishu(self, wall_remain: int) -> Paishu:
-        return Paishu(copy.deepcopy(self.unseen), wall_remain)
-
-# =========================
-# Hand / shanten helpers (simplified)
-# =========================
-def count_shanten_like(hand: List[str]) -> int:
-    """
-    Lightweight shanten proxy:
-    - honors = isolated -> penalize
-    - sequences & pairs count
-    Returns 0..3 typical range; >=3 treated as 'far' (simple eval only).
-    (This is a heuristic proxy; you can swap to a true xiangting routine if available.)
-    """
-    suits = {'m':[], 'p':[], 's':[], 'z':[]}
-    for t in hand:
-        suits[t[0]].append(int(t[1]) if t[0] != 'z' else int(t[1]))
-    seq_like = 0
-    pair = 0
-    for s in ('m','p','s'):
-        arr = sorted(suits[s])
-        i=0
-        while i < len(arr)-1:
-            if arr[i+1]-arr[i] == 0:
-                pair += 1; i += 2
-            elif arr[i+1]-arr[i] in (1,2):
-                seq_like += 1; i += 2
-            else:
-                i += 1
-    pair += max(0, collections.Counter(suits['z']).most_common(1)[0][1]//2) if suits['z'] else 0
-    # Map to rough shanten
-    score = seq_like + pair*0.8
-    if score >= 6: return 0
-    if score >= 4: return 1
-    if score >= 2: return 2
-    return 3
-
-def ukeire_candidates_after_discard(hand: List[str]) -> Dict[str,int]:
-    """
-    Very light ukeire estimator: for each potential receive tile, count formations improved.
-    """
-    cand = collections.Counter()
-    for t in hand:
-        for n in tile_neighbors(t) + tile_nexts(t):
-            cand[to_base_tile(n)] += 1
-    return dict(cand)
+        return Paishu(self.unseen[:], wall_remain)
 
 # =========================
 # Risk model (lightweight)
@@ -501,16 +471,17 @@ class PlayerPolicy:
 
     # ----- core evals -----
     def _choose_discard_or_riichi(self, hand: List[str], legal, paishu: Paishu, state):
+        if len(hand) % 3 != 2:
+            # ツモ前（他家の打牌への応答）は打牌を選ばない
+            return None, None
         def_mult, push_thr_eff, gain_need_eff = self._placement_adjust(state)
-        shanten = count_shanten_like(hand)
         # Evaluate each discard: expected value composed of shape/score/defense
         best = (-1e9, None, None)  # (score, tile, features)
-        ukeire_base = ukeire_candidates_after_discard(hand)
 
         unique_tiles = sorted(set(hand))
         for t in unique_tiles:
             after = list(hand); after.remove(t)
-            eval_val, feats = self._eval_hand(after, paishu, state, shanten, ukeire_base)
+            eval_val, feats = self._eval_hand(after, paishu, state)
             # danger penalty for discarding t
             danger = tile_danger_basic(t, getattr(state, "risk_info", None))
 
@@ -574,7 +545,7 @@ class PlayerPolicy:
 
         return None, Decision('discard', tile=best_tile, extra={'feats':best_feats, 'score':best_score})
 
-    def _eval_hand(self, hand: List[str], paishu: Paishu, state, shanten_now: int, ukeire_base: Dict[str,int]):
+    def _eval_hand(self, hand: List[str], paishu: Paishu, state):
         """
         Combine:
           - shape/ukeire (lookahead with Paishu for <= MAX_SHANTEN_LOOKAHEAD)
@@ -582,15 +553,16 @@ class PlayerPolicy:
           - defensive context
         """
         # shape/ukeire
-        shape_val, feats = self._eval_shape_with_lookahead(hand, paishu, state, shanten_now, ukeire_base)
+        shape_val, feats = self._eval_shape_with_lookahead(hand, paishu, state)
 
         # score potential
         dora_bonus = 0.0
-        dora_tiles = set(self._dora_tiles_from_indicators(getattr(state, "doras", [])))
+        dora_ids = {tiles.DORA_NEXT[tiles.FROM_MAJIANG[ind]] for ind in getattr(state, "doras", [])}
         for t in hand:
-            if to_base_tile(t) in dora_tiles:
+            i = tiles.FROM_MAJIANG[t]
+            if tiles.BASE[i] in dora_ids:
                 dora_bonus += TUNABLES["DORA_MULT"]
-            if is_red5(t):
+            if tiles.IS_RED[i]:
                 dora_bonus += TUNABLES["AKA5_MULT"]
 
         score_val = dora_bonus
@@ -600,39 +572,48 @@ class PlayerPolicy:
 
         return total, feats
 
-    def _eval_shape_with_lookahead(self, hand: List[str], paishu: Paishu, state, shanten_now: int, ukeire_base: Dict[str,int]):
+    def _eval_shape_with_lookahead(self, hand: List[str], paishu: Paishu, state):
+        """
+        Shape value: the shanten step, raised by the share of the wall that
+        advances the hand (looked ahead one draw up to MAX_SHANTEN_LOOKAHEAD).
+        """
         feats = {'is_tenpai': False, 'good_wait': False}
-        sh = count_shanten_like(hand)
+        counts = tiles.counts34(hand)
+        sh, useful = ukeire(counts)
+        wall = max(paishu.wall_remain, 1)
+        live = sum(paishu.val_id(j) for j in useful)
+        width = TUNABLES["WIDTH_BY_SHANTEN"].get(sh, min(TUNABLES["WIDTH_BY_SHANTEN"].values()))
         if sh == 0:
             feats['is_tenpai'] = True
-            # simple wait quality: number of ukeire*paishu
-            wait_quality = 0.0
-            for rcv, base in ukeire_base.items():
-                wait_quality += base * paishu.val(rcv)
-            feats['good_wait'] = wait_quality >= 2.2
-            return TUNABLES["WIDTH_BY_SHANTEN"].get(0,1.0) * (1.0 + wait_quality*0.2), feats
+            # wait quality: live winning tiles
+            feats['good_wait'] = live >= TUNABLES["GOOD_WAIT_MIN"]
+            return width * (1.0 + TUNABLES["UKEIRE_WEIGHT"] * live / wall), feats
 
         if sh > TUNABLES["MAX_SHANTEN_LOOKAHEAD"]:
-            # simple eval: sum of potential receives weighted by paishu
-            s = 0.0
-            for rcv, base in ukeire_base.items():
-                s += base * paishu.val(rcv)
-            return TUNABLES["WIDTH_BY_SHANTEN"].get(min(sh,2),0.72) * math.tanh(0.4*s), feats
+            # simple eval: share of live ukeire
+            return width * (1.0 + TUNABLES["UKEIRE_WEIGHT"] * live / wall), feats
 
-        # Lookahead: for each useful receive, go forward one ply
+        # Lookahead: draw each useful tile, then keep the discard with the widest next ukeire
         expv = 0.0
-        width = TUNABLES["WIDTH_BY_SHANTEN"].get(sh, 0.72)
-        for rcv, base in ukeire_base.items():
-            w = paishu.val(rcv)
+        for j in useful:
+            w = paishu.val_id(j)
             if w <= 0: continue
-            paishu.pop(rcv)
-            # naive improvement: reduce shanten if rcv helps pattern
-            sh_next = max(0, sh-1)
-            gain = base * (1.0 + (0.25 if sh_next == 0 else 0.0))
-            expv += w * math.tanh(0.3*gain)
-            paishu.push(rcv)
-
-        return width * expv, feats
+            paishu.pop_id(j)
+            counts[j] += 1
+            gain = 0.0
+            for d in range(tiles.N_KINDS):
+                if not counts[d]: continue
+                counts[d] -= 1
+                if shanten(counts) < sh:
+                    nxt = sum(paishu.val_id(k) for k in ukeire(counts)[1])
+                    gain = max(gain, nxt)
+                counts[d] += 1
+            counts[j] -= 1
+            expv += (w / wall) * (gain / max(paishu.wall_remain, 1))
+            paishu.push_id(j)
+
+        # per-draw share over the two steps (geometric mean)
+        return width * (1.0 + TUNABLES["UKEIRE_WEIGHT"] * math.sqrt(expv)), feats
 
     def _maybe_kan(self, hand: List[str], legal, paishu: Paishu, state):
         kans = legal.get('kan') or []
@@ -689,13 +670,4 @@ class PlayerPolicy:
 
     # ----- Dora helpers -----
     def _dora_tiles_from_indicators(self, indicators: List[str]) -> List[str]:
-        res = []
-        for ind in indicators:
-            s,n = ind[0], int(ind[1])
-            if s == 'z':
-                order = {1:2,2:3,3:4,4:5,5:6,6:7,7:1}
-                res.append(f"z{order[n]}")
-            else:
-                nxt = n+1 if n<9 else 1
-                res.append(f"{s}{nxt}")
-        return res
+        return [tiles.MAJIANG[tiles.DORA_NEXT[tiles.FROM_MAJIANG[ind]]] for ind in indicators]
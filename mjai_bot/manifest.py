@@ -0,0 +1,101 @@
+"""
+Bot discovery from per-directory manifests, without importing the bots.
+
+Each bot directory under mjai_bot/ may hold a manifest.json:
+
+    {
+        "name": "mortal",
+        "players": 4,
+        "entry": "bot:Bot",
+        "capabilities": ["preload", "react_events"]
+    }
+
+`entry` is "<module>:<class>" relative to the bot package. A directory with
+a bot.py but no manifest gets the defaults ("bot:Bot", 4 players, no
+capabilities). The bot module is only imported by `BotManifest.load_class`.
+"""
+import os
+import json
+import pathlib
+import importlib
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+from .logger import logger
+
+MANIFEST_FILE = "manifest.json"
+DEFAULT_ENTRY = "bot:Bot"
+
+
+@dataclass
+class BotManifest:
+    name: str                   # directory name, the bot's identifier
+    path: pathlib.Path
+    players: int = 4
+    entry: str = DEFAULT_ENTRY
+    capabilities: tuple[str, ...] = ()
+    _class: Optional[type] = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def has(self, capability: str) -> bool:
+        return capability in self.capabilities
+
+    @property
+    def loaded(self) -> bool:
+        return self._class is not None
+
+    def load_class(self) -> type:
+        """
+        Import the entry module and return the bot class, once.
+        """
+        with self._lock:
+            if self._class is None:
+                module_name, class_name = self.entry.split(":")
+                module = importlib.import_module(f".{self.name}.{module_name}", package=__package__)
+                self._class = getattr(module, class_name)
+            return self._class
+
+
+def load_manifest(path: pathlib.Path) -> Optional[BotManifest]:
+    """
+    :param path: bot directory
+    :return: its manifest, None if the directory is not a bot
+    """
+    manifest_file = path / MANIFEST_FILE
+    if manifest_file.exists():
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if raw.get("name", path.name) != path.name:
+            logger.warning(f"Manifest name {raw['name']} does not match directory {path.name}, using the directory")
+        return BotManifest(
+            name=path.name,
+            path=path,
+            players=int(raw.get("players", 4)),
+            entry=raw.get("entry", DEFAULT_ENTRY),
+            capabilities=tuple(raw.get("capabilities", ())),
+        )
+    if (path / "bot.py").exists():
+        return BotManifest(name=path.name, path=path)
+    return None
+
+
+def discover_bots(root: Optional[pathlib.Path] = None) -> list[BotManifest]:
+    """
+    Manifests of every bot directory under `root` (default: mjai_bot/), sorted by name.
+    """
+    root = root or pathlib.Path(__file__).parent
+    manifests = []
+    for item in sorted(os.listdir(root)):
+        if item.startswith("__") or item == "base":
+            continue
+        path = root / item
+        if not path.is_dir():
+            continue
+        try:
+            manifest = load_manifest(path)
+        except Exception as e:
+            logger.error(f"Error reading manifest of {item}: {e}")
+            continue
+        if manifest is not None:
+            manifests.append(manifest)
+    return manifests
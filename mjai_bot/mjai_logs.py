@@ -0,0 +1,17 @@
+"""
+Reading mjai game logs (one JSON event per line, optionally gzipped).
+"""
+import gzip
+import pathlib
+from typing import Iterator
+
+
+def iter_log_files(log_dir: pathlib.Path) -> Iterator[pathlib.Path]:
+    for pattern in ("*.json", "*.jsonl", "*.json.gz", "*.jsonl.gz"):
+        yield from sorted(pathlib.Path(log_dir).rglob(pattern))
+
+
+def read_log(path: pathlib.Path) -> list[str]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
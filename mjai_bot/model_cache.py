@@ -0,0 +1,125 @@
+import time
+import pathlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+from .logger import logger
+from settings.settings import settings
+
+
+@dataclass
+class CacheEntry:
+    engine: Any
+    nbytes: int
+    load_time: float
+
+
+def engine_nbytes(engine) -> int:
+    """
+    Estimate the memory held by an engine from the parameters and buffers
+    of its torch modules (brain, dqn).
+    """
+    total = 0
+    for name in ("brain", "dqn"):
+        module = getattr(engine, name, None)
+        if module is None or not hasattr(module, "parameters"):
+            continue
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelCache(object):
+    """
+    Process-wide LRU cache of loaded engines, shared by every mortal flavour.
+
+    Entries are keyed by (checkpoint path, checkpoint mtime, device), so a
+    rewritten checkpoint is picked up on the next load and the stale entry
+    is dropped. Engines are stateless, a libriichi `Bot(engine, seat)` can
+    be wrapped around a cached engine as often as needed.
+    """
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes: int = limit_bytes
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._loading: dict[tuple, threading.Lock] = {}
+        self._lock = threading.RLock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def make_key(path: pathlib.Path, device, variant: str = "") -> tuple:
+        path = pathlib.Path(path).resolve()
+        return (str(path), path.stat().st_mtime_ns, str(device), variant)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def get_or_load(self, path: pathlib.Path, device, loader: Callable[[], Any], variant: str = "") -> Any:
+        """
+        Return the cached engine for `path` on `device`, calling `loader` on a miss.
+
+        :param path: checkpoint file the engine is built from
+        :param device: torch device the engine lives on
+        :param loader: zero-argument callable building the engine
+        :param variant: extra key part for differently built engines of the same checkpoint
+        :return: the engine
+        """
+        key = self.make_key(path, device, variant)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.engine
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Only one thread builds a given engine, others wait for it and then hit.
+        # Loads of different engines (e.g. 4p and 3p) do not block each other.
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry.engine
+                self.misses += 1
+            start = time.perf_counter()
+            engine = loader()
+            load_time = time.perf_counter() - start
+            entry = CacheEntry(engine=engine, nbytes=engine_nbytes(engine), load_time=load_time)
+            with self._lock:
+                # A checkpoint rewritten on disk invalidates its old entries
+                for stale in [k for k in self._entries if k[0] == key[0] and k[2:] == key[2:]]:
+                    logger.info(f"Dropping stale cached model: {stale[0]}")
+                    del self._entries[stale]
+                self._entries[key] = entry
+                self._loading.pop(key, None)
+                logger.info(
+                    f"Loaded model {key[0]} on {key[2]} in {load_time:.2f}s "
+                    f"({entry.nbytes / 2**20:.1f} MB)"
+                )
+                self._evict()
+            return engine
+
+    def _lookup(self, key: tuple) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def set_limit(self, limit_bytes: int) -> None:
+        with self._lock:
+            self.limit_bytes = limit_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self) -> None:
+        # Always keep the most recently used engine, even if it alone exceeds the limit
+        while len(self._entries) > 1 and self.total_bytes > self.limit_bytes:
+            key, entry = self._entries.popitem(last=False)
+            logger.info(f"Evicted cached model {key[0]} on {key[2]} ({entry.nbytes / 2**20:.1f} MB)")
+
+
+model_cache = ModelCache(settings.inference.cache_limit_mb * 2**20)
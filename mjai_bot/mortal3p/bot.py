@@ -3,14 +3,24 @@ import sys
 
 from . import model
 from .logger import logger
+from .. import codec
+from ..journal import EventJournal, fast_forward
 
 class Bot:
     def __init__(self):
         self.player_id: int = None
         self.model = None
-        # ========== Online Server =========== #
-        model.online_settings_init()
-        # ==================================== #
+        self.journal = EventJournal()
+
+    @staticmethod
+    def preload() -> None:
+        """
+        Load the engine into the shared model cache and warm it up,
+        so the next `start_game` only has to wrap it in a libriichi Bot.
+        """
+        engine = model.select_engine()
+        warm_up_time = engine.warm_up()
+        logger.info(f"Engine warmed up in {warm_up_time:.3f}s")
 
     def react(self, events: str) -> str:
         """
@@ -67,15 +77,35 @@ class Bot:
         For more information, please refer to https://github.com/smly/mjai.app
         """
         try:
-            events = json.loads(events)
-        except json.JSONDecodeError as e:
+            events = codec.loads(events)
+        except ValueError as e:
             logger.error(f"Failed to parse events: {events}, {e}")
             return json.dumps({"type":"none"}, separators=(",", ":"))
+        return codec.dumps(self.react_events(events))
+
+    def react_events(self, events: list[dict], lines: list[str] | None = None) -> dict:
+        """
+        Structured counterpart of `react`: events in and action out as dicts.
+
+        Events are encoded only for libriichi, once each; `lines` may hold
+        that encoding already (see `codec.encode_events`).
+
+        :param events: events as dicts
+        :param lines: the same events already encoded, or None
+        :return: action as dict
+        """
+        if lines is None:
+            lines = codec.encode_events(events)
 
         return_action = None
-        for e in events:
+        for e, line in zip(events, lines):
+            self.journal.record(e, line)
             if e["type"] == "start_game":
                 self.player_id = e["id"]
+                # ========== Online Server =========== #
+                # Bots are reused across games, pick up ot_settings.json saved since the last one
+                model.online_settings_init()
+                # ==================================== #
                 self.model = model.load_model(self.player_id)
                 continue
             if self.model is None or self.player_id is None:
@@ -85,36 +115,48 @@ class Bot:
                 self.player_id = None
                 self.model = None
                 continue
-            return_action = self.model.react(json.dumps(e, separators=(",", ":")))
+            try:
+                return_action = self.model.react(line)
+            except Exception as ex:
+                logger.error(f"Bot failed on {line}: {ex}, rebuilding it from the journal")
+                return_action = self.recover()
 
         if return_action is None:
-            # ========== Online Server =========== #
-            if model.ot_settings['online']:
-                raw_data = {
-                    "type":"none",
-                    "meta": {
-                        "online": model.is_online
-                    }
-                }
-                return_action = json.dumps(raw_data, separators=(",", ":"))
-            else:
-                return_action = json.dumps({"type":"none"}, separators=(",", ":"))
-            # ==================================== #
-            return return_action
+            action = {"type": "none"}
         else:
-            # ========== Online Server =========== #
-            if model.ot_settings['online']:
-                if "meta" in return_action:
-                    raw_data = json.loads(return_action)
-                    raw_data["meta"]["online"] = model.is_online
-                    return_action = json.dumps(raw_data, separators=(",", ":"))
-                else:
-                    raw_data = json.loads(return_action)
-                    raw_data["meta"] = {"online": model.is_online}
-                    return_action = json.dumps(raw_data, separators=(",", ":"))
-            # ==================================== #
-            # raw_data = json.loads(return_action)
-            # del raw_data["meta"]
-            # return json.dumps(raw_data, separators=(",", ":"))
-            return return_action
+            action = codec.loads(return_action)
+        # ========== Online Server =========== #
+        if model.ot_settings['online']:
+            action.setdefault("meta", {})["online"] = model.is_online
+        # ==================================== #
+        return action
+
+    def recover(self) -> str | None:
+        """
+        Replace the libriichi bot with a fresh one fast-forwarded through the
+        journal, which already holds the event being reacted to.
 
+        :return: the answer to the last journaled event
+        """
+        try:
+            self.model = model.load_model(self.player_id)
+            # The start_game line is never fed to libriichi
+            return fast_forward(self.model.react, self.journal.lines[1:])
+        except Exception as ex:
+            logger.error(f"Failed to recover from the journal: {ex}")
+            return None
+
+    def restore(self, lines: list[str]) -> dict:
+        """
+        Take over a game in progress from another bot's journal, e.g. when
+        the model is switched mid-hanchan. Only the last event runs inference.
+
+        :param lines: journal lines, starting with start_game
+        :return: action for the last event as dict
+        """
+        self.journal.lines = list(lines)
+        self.player_id = codec.loads(lines[0])["id"]
+        model.online_settings_init()
+        self.model = model.load_model(self.player_id)
+        return_action = fast_forward(self.model.react, lines[1:])
+        return {"type": "none"} if return_action is None else codec.loads(return_action)
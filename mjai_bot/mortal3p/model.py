@@ -1,9 +1,9 @@
 import json
-import gzip
+import time
 import torch
 import pathlib
-import requests
 import traceback
+import contextlib
 import numpy as np
 
 from torch import nn, Tensor
@@ -16,9 +16,21 @@ from itertools import permutations
 from .libriichi3p.mjai import Bot
 from .libriichi3p.consts import obs_shape, oracle_obs_shape, ACTION_SPACE, GRP_SIZE
 from .logger import logger
+from ..model_cache import model_cache
+from ..inference_graph import build_inference_graph
+from ..quantization import quantize_engine
+from ..onnx_backend import load_onnx_graph
+from ..react_result import ReactResult, BatchBuffer
+from ..online_client import OnlineClient
+from ..thread_tuner import autotune_threads, intra_op_threads
+from ..checkpoint import load_state, current_rss, format_rss
+from ..inference_process import remote_engine
+from settings.settings import settings
 
 # ========== Online Server =========== #
 OT_REQUEST_TIMEOUT = 2
+# Longest a decision waits for the server when local inference failed
+OT_LATENCY_BUDGET = 1.0
 ot_settings = {
     "server": "http://example.com",
     "online": False,
@@ -27,13 +39,16 @@ ot_settings = {
 is_online = False
 
 def online_settings_init():
-    global ot_settings
     # Check if the file exists
     if (pathlib.Path(__file__).parent / 'ot_settings.json').exists():
         with open(pathlib.Path(__file__).parent / 'ot_settings.json', 'r') as f:
-            ot_settings = json.load(f)
+            loaded = json.load(f)
+        # In place: ot_client holds this dict, server and api_key must follow the online flag
+        ot_settings.clear()
+        ot_settings.update(loaded)
 
 online_settings_init()
+ot_client = OnlineClient(ot_settings, '/react_batch_3p', OT_REQUEST_TIMEOUT, OT_LATENCY_BUDGET)
 # ==================================== #
 
 class ChannelAttention(nn.Module):
@@ -276,6 +291,7 @@ class MortalEngine:
         boltzmann_epsilon = 0,
         boltzmann_temp = 1,
         top_p = 1,
+        inference_graph = None,
     ):
         self.engine_type = 'mortal'
         self.device = device or torch.device('cpu')
@@ -295,52 +311,35 @@ class MortalEngine:
         self.boltzmann_temp = boltzmann_temp
         self.top_p = top_p
 
+        # Optional fused (obs, mask) -> q graph, see inference_graph.py
+        self.inference_graph = inference_graph
+
+        self.obs_buffer = BatchBuffer(np.float32)
+        self.masks_buffer = BatchBuffer(np.bool_)
+        self.invisible_obs_buffer = BatchBuffer(np.float32)
+
     def react_batch(self, obs, masks, invisible_obs):
-        # ========== Online Server =========== #
-        global ot_settings, is_online
-        if ot_settings['online']:
-            try:
-                list_obs = [o.tolist() for o in obs]
-                list_masks = [m.tolist() for m in masks]
-                post_data = {
-                    'obs': list_obs,
-                    'masks': list_masks,
-                }
-                data = json.dumps(post_data, separators=(',', ':'))
-                compressed_data = gzip.compress(data.encode('utf-8'))
-                headers = {
-                    'Authorization': ot_settings['api_key'],
-                    'Content-Encoding': 'gzip',
-                }
-                r = requests.post(
-                    f'{ot_settings["server"]}/react_batch_3p',
-                    headers=headers,
-                    data=compressed_data,
-                    timeout=OT_REQUEST_TIMEOUT
-                )
-                assert r.status_code == 200
-                is_online = True
-                r_json = r.json()
-                return r_json['actions'], r_json['q_out'], r_json['masks'], r_json['is_greedy']
-            except:
-                is_online = False
-                pass
-        # ==================================== #
-        try:
-            with (
-                torch.autocast(self.device.type, enabled=self.enable_amp),
-                torch.inference_mode(),
-            ):
-                return self._react_batch(obs, masks, invisible_obs)
-        except Exception as ex:
-            raise Exception(f'{ex}\n{traceback.format_exc()}')
-
-    def _react_batch(self, obs, masks, invisible_obs):
-        obs = torch.as_tensor(np.stack(obs, axis=0), device=self.device)
-        masks = torch.as_tensor(np.stack(masks, axis=0), device=self.device)
-        invisible_obs = None
+        return react_batch_hedged(self.react_batch_local, obs, masks, invisible_obs)
+
+    def react_batch_local(self, obs, masks, invisible_obs) -> ReactResult:
+        """
+        Local forward pass only, never goes through the online server.
+        """
+        with (
+            torch.autocast(self.device.type, enabled=self.enable_amp),
+            torch.inference_mode(),
+        ):
+            return self._react_batch(obs, masks, invisible_obs)
+
+    def _react_batch(self, obs, masks, invisible_obs) -> ReactResult:
+        # obs/masks/invisible_obs are either lists of per-seat arrays or already batched arrays
+        np_masks = self.masks_buffer.fill(masks)
+        obs = torch.as_tensor(self.obs_buffer.fill(obs), device=self.device)
+        masks = torch.as_tensor(np_masks, device=self.device)
         if self.is_oracle:
-            invisible_obs = torch.as_tensor(np.stack(invisible_obs, axis=0), device=self.device)
+            invisible_obs = torch.as_tensor(self.invisible_obs_buffer.fill(invisible_obs), device=self.device)
+        else:
+            invisible_obs = None
         batch_size = obs.shape[0]
 
         match self.version:
@@ -352,8 +351,11 @@ class MortalEngine:
                     latent = mu
                 q_out = self.dqn(latent, masks)
             case 2 | 3 | 4:
-                phi = self.brain(obs)
-                q_out = self.dqn(phi, masks)
+                if self.inference_graph is not None:
+                    q_out = self.inference_graph(obs, masks)
+                else:
+                    phi = self.brain(obs)
+                    q_out = self.dqn(phi, masks)
 
         if self.boltzmann_epsilon > 0:
             is_greedy = torch.full((batch_size,), 1-self.boltzmann_epsilon, device=self.device).bernoulli().to(torch.bool)
@@ -364,7 +366,68 @@ class MortalEngine:
             is_greedy = torch.ones(batch_size, dtype=torch.bool, device=self.device)
             actions = q_out.argmax(-1)
 
-        return actions.tolist(), q_out.tolist(), masks.tolist(), is_greedy.tolist()
+        return ReactResult(
+            actions = actions.cpu().numpy(),
+            q_out = q_out.float().cpu().numpy(),
+            # The mask buffer is reused by the next call, the result keeps its own copy
+            masks = np_masks.copy(),
+            is_greedy = is_greedy.cpu().numpy(),
+        )
+
+    def warm_up(self, batch_size: int = 1) -> float:
+        """
+        Run a dummy forward pass on zero observations so the allocator and
+        kernels are initialised before the first real decision.
+
+        :param batch_size: batch size of the dummy forward pass
+        :return: wall time of the forward pass in seconds
+        """
+        obs = [np.zeros(obs_shape(self.version), dtype=np.float32) for _ in range(batch_size)]
+        masks = [np.ones(ACTION_SPACE, dtype=bool) for _ in range(batch_size)]
+        invisible_obs = None
+        if self.is_oracle:
+            invisible_obs = [np.zeros(oracle_obs_shape(self.version), dtype=np.float32) for _ in range(batch_size)]
+        start = time.perf_counter()
+        # Bypass the online path on purpose, only the local engine needs warming up
+        self.react_batch_local(obs, masks, invisible_obs)
+        return time.perf_counter() - start
+
+def react_batch_hedged(react_batch_local, obs, masks, invisible_obs):
+    """
+    Race the online server against `react_batch_local`, in this process or
+    in the inference process.
+    """
+    # ========== Online Server =========== #
+    global ot_settings, is_online
+    remote = None
+    started_at = time.perf_counter()
+    if ot_settings['online']:
+        try:
+            remote = ot_client.submit(obs, masks)
+        except Exception:
+            pass
+        if remote is None:
+            # Breaker open or the request could not be built
+            is_online = False
+    # ==================================== #
+    try:
+        # Runs while the online request is in flight
+        local = react_batch_local(obs, masks, invisible_obs)
+    except Exception as ex:
+        # Only then the server is waited for, up to the latency budget
+        result = ot_client.wait(remote, started_at) if remote is not None else None
+        is_online = result is not None
+        if result is not None:
+            return result
+        raise Exception(f'{ex}\n{traceback.format_exc()}')
+    if remote is not None:
+        # Whichever finished first: the server only wins if it already answered
+        result = ot_client.poll(remote)
+        is_online = result is not None
+        if result is not None:
+            return result
+    # libriichi only takes plain lists
+    return local.to_lists()
 
 def sample_top_p(logits, p):
     if p >= 1:
@@ -379,24 +442,22 @@ def sample_top_p(logits, p):
     sampled = probs_idx.gather(-1, probs_sort.multinomial(1)).squeeze(-1)
     return sampled
 
-def load_model(seat: int) -> Bot:
-    # check if GPU is available
-    if torch.cuda.is_available():
-        device = torch.device('cuda')
-    else:
-        device = torch.device('cpu')
-
-    # latest binary model
-    control_state_file = "./mortal.pth"
-
-    # Get the path of control_state_file = current directory / control_state_file
-    control_state_file = pathlib.Path(__file__).parent / control_state_file
-    state = torch.load(control_state_file, map_location=device)
-
-    mortal = Brain(version=state['config']['control']['version'], conv_channels=state['config']['resnet']['conv_channels'], num_blocks=state['config']['resnet']['num_blocks']).eval()
-    dqn = DQN(version=state['config']['control']['version']).eval()
-    mortal.load_state_dict(state['mortal'])
-    dqn.load_state_dict(state['current_dqn'])
+def build_engine(
+    control_state_file: pathlib.Path,
+    device: torch.device,
+    fuse: bool = False,
+    precision: str = 'fp32',
+    backend: str = 'torch',
+) -> MortalEngine:
+    state, mmapped = load_state(control_state_file, device)
+
+    # With a memory-mapped state the modules are built without storage and
+    # take the mapped tensors as their weights, instead of copying them
+    with torch.device('meta') if mmapped else contextlib.nullcontext():
+        mortal = Brain(version=state['config']['control']['version'], conv_channels=state['config']['resnet']['conv_channels'], num_blocks=state['config']['resnet']['num_blocks']).eval()
+        dqn = DQN(version=state['config']['control']['version']).eval()
+    mortal.load_state_dict(state['mortal'], assign=mmapped)
+    dqn.load_state_dict(state['current_dqn'], assign=mmapped)
 
     engine = MortalEngine(
         mortal,
@@ -409,6 +470,77 @@ def load_model(seat: int) -> Bot:
         enable_rule_based_agari_guard = True,
         name = 'mortal',
     )
+    if precision == 'int8':
+        # int8 kernels are CPU only, load_engine picks the device accordingly
+        quantize_engine(engine, Bot, settings.inference.calibration_dir or None)
+    elif backend == 'onnx':
+        # Falls back to the torch modules if onnxruntime is missing or the graph does not match
+        engine.inference_graph = load_onnx_graph(
+            control_state_file,
+            engine.brain,
+            engine.dqn,
+            obs_shape(engine.version),
+            ACTION_SPACE,
+            intra_op_threads(pathlib.Path(__file__).parent.name),
+        )
+    elif fuse:
+        # Falls back to the unfused modules if the graph cannot be built or verified
+        engine.inference_graph = build_inference_graph(
+            engine.brain,
+            engine.dqn,
+            obs_shape(engine.version),
+            ACTION_SPACE,
+            device,
+            settings.inference.fuse_tolerance,
+        )
+    logger.info(f"Engine built from {control_state_file.name}, RSS {format_rss(current_rss())}")
+    return engine
+
+def load_engine() -> MortalEngine:
+    precision = settings.inference.precision
+    backend = settings.inference.engine_backend
+    # check if GPU is available, int8 and onnxruntime run on CPU only
+    if torch.cuda.is_available() and precision != 'int8' and backend != 'onnx':
+        device = torch.device('cuda')
+    else:
+        device = torch.device('cpu')
+
+    # latest binary model
+    control_state_file = "./mortal.pth"
+
+    # Get the path of control_state_file = current directory / control_state_file
+    control_state_file = pathlib.Path(__file__).parent / control_state_file
+
+    fuse = settings.inference.fuse
+    if precision == 'int8':
+        variant = 'int8'
+    elif backend == 'onnx':
+        variant = 'onnx'
+    else:
+        variant = 'fused' if fuse else ''
+
+    if device.type == 'cpu':
+        # Tuned once per machine, checkpoint and variant, then reused on later starts
+        autotune_threads(pathlib.Path(__file__).parent.name, control_state_file, settings.inference.autotune, variant)
+
+    # The engine is stateless, so every seat and every game shares the cached one
+    return model_cache.get_or_load(
+        control_state_file,
+        device,
+        partial(build_engine, control_state_file, device, fuse, precision, backend),
+        variant=variant,
+    )
 
+def select_engine():
+    """
+    The engine bots run on: the local one, or its proxy in the dedicated
+    inference process when settings.inference.process is set.
+    """
+    if settings.inference.process:
+        return remote_engine(pathlib.Path(__file__).parent.name, settings.inference.process_cores, react_batch_hedged)
+    return load_engine()
+
+def load_model(seat: int) -> Bot:
+    engine = select_engine()
     bot = Bot(engine, seat)
     return bot
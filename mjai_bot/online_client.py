@@ -0,0 +1,221 @@
+"""
+Client for the online (ot_server) inference path of the mortal bots.
+
+Requests go through one pooled keep-alive session with a compact binary
+body, are hedged against local inference by `MortalEngine.react_batch`, and
+stop being sent while a circuit breaker is open.
+
+Binary request body (Content-Type: application/x-mortal-batch), little endian:
+
+    header  "<4sBBHHHH": magic b"MJOB", format version, obs encoding,
+                         batch size, obs channels, obs width, action space
+    obs     OBS_PACKED_BITS: np.packbits of the flattened obs, one row per sample
+            OBS_FLOAT32:     raw float32, used when obs are not all 0/1
+    masks   np.packbits of the (batch, action space) bool mask, one row per sample
+
+The response is the usual JSON {"actions", "q_out", "masks", "is_greedy"}.
+A server answering 415 to the binary body gets gzip JSON from then on.
+"""
+import json
+import gzip
+import time
+import struct
+import threading
+import requests
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Callable, Optional, Sequence
+from .logger import logger
+
+BATCH_MAGIC = b"MJOB"
+BATCH_FORMAT_VERSION = 1
+BATCH_HEADER = struct.Struct("<4sBBHHHH")
+BATCH_CONTENT_TYPE = "application/x-mortal-batch"
+OBS_PACKED_BITS = 0
+OBS_FLOAT32 = 1
+
+
+def encode_batch(obs: Sequence[np.ndarray], masks: Sequence[np.ndarray]) -> bytes:
+    obs = np.stack(obs, axis=0).astype(np.float32, copy=False)
+    masks = np.stack(masks, axis=0).astype(bool, copy=False)
+    batch_size, channels, width = obs.shape
+    flat = obs.reshape(batch_size, -1)
+    if np.all((flat == 0) | (flat == 1)):
+        encoding = OBS_PACKED_BITS
+        obs_bytes = np.packbits(flat.astype(bool), axis=1).tobytes()
+    else:
+        encoding = OBS_FLOAT32
+        obs_bytes = flat.tobytes()
+    header = BATCH_HEADER.pack(
+        BATCH_MAGIC, BATCH_FORMAT_VERSION, encoding,
+        batch_size, channels, width, masks.shape[1],
+    )
+    return header + obs_bytes + np.packbits(masks, axis=1).tobytes()
+
+
+def decode_batch(data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Inverse of `encode_batch`.
+
+    :return: (obs float32 (batch, channels, width), masks bool (batch, action space))
+    """
+    magic, version, encoding, batch_size, channels, width, action_space = BATCH_HEADER.unpack_from(data)
+    if magic != BATCH_MAGIC or version != BATCH_FORMAT_VERSION:
+        raise ValueError(f"Not a version {BATCH_FORMAT_VERSION} mortal batch")
+    offset = BATCH_HEADER.size
+    obs_size = channels * width
+    if encoding == OBS_PACKED_BITS:
+        row_bytes = (obs_size + 7) // 8
+        packed = np.frombuffer(data, dtype=np.uint8, count=batch_size * row_bytes, offset=offset)
+        obs = np.unpackbits(packed.reshape(batch_size, row_bytes), axis=1, count=obs_size).astype(np.float32)
+        offset += batch_size * row_bytes
+    elif encoding == OBS_FLOAT32:
+        obs = np.frombuffer(data, dtype=np.float32, count=batch_size * obs_size, offset=offset).copy()
+        offset += batch_size * obs_size * 4
+    else:
+        raise ValueError(f"Unknown obs encoding {encoding}")
+    row_bytes = (action_space + 7) // 8
+    packed = np.frombuffer(data, dtype=np.uint8, count=batch_size * row_bytes, offset=offset)
+    masks = np.unpackbits(packed.reshape(batch_size, row_bytes), axis=1, count=action_space).astype(bool)
+    return obs.reshape(batch_size, channels, width), masks
+
+
+class CircuitBreaker(object):
+    """
+    Opens after `failure_threshold` consecutive failures. While open, a
+    background thread runs `probe` every `probe_interval` seconds and closes
+    the breaker once it succeeds.
+    """
+    def __init__(self, probe: Callable[[], bool], failure_threshold: int = 3, probe_interval: float = 5.0):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.failures: int = 0
+        self.is_open: bool = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        return not self.is_open
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.is_open or self.failures < self.failure_threshold:
+                return
+            self.is_open = True
+        logger.warning(f"Online server failed {self.failures} times in a row, using local inference until it is back")
+        threading.Thread(target=self._probe_loop, name="ot-health-probe", daemon=True).start()
+
+    def _probe_loop(self) -> None:
+        while True:
+            time.sleep(self.probe_interval)
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                with self._lock:
+                    self.failures = 0
+                    self.is_open = False
+                logger.info("Online server is reachable again")
+                return
+
+
+class OnlineClient(object):
+    """
+    Pooled, binary-encoded requests to `<server><endpoint>` of an ot_server.
+
+    :param ot_settings: the bot's ot_settings dict (server, online, api_key), read on every request
+    :param endpoint: react_batch path of the server, e.g. "/react_batch"
+    :param timeout: HTTP timeout of a single request in seconds
+    :param latency_budget: longest a decision waits for the server when local inference failed
+    """
+    def __init__(self, ot_settings: dict, endpoint: str, timeout: float, latency_budget: float):
+        self.ot_settings = ot_settings
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.latency_budget = latency_budget
+        self.binary = True
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.breaker = CircuitBreaker(self.probe)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ot-request")
+
+    def submit(self, obs, masks) -> Optional[Future]:
+        """
+        Start a request in the background.
+
+        :return: future of (actions, q_out, masks, is_greedy) lists, or None while the breaker is open
+        """
+        if not self.breaker.allow():
+            return None
+        # Encode on the caller's thread, libriichi may reuse obs/masks once react_batch returns
+        if self.binary:
+            body = encode_batch(obs, masks)
+        else:
+            body = self._encode_json(obs, masks)
+        return self._executor.submit(self._request, body, self.binary)
+
+    def poll(self, future: Future) -> Optional[tuple]:
+        """
+        Result of `future` if it has already arrived, without waiting.
+        """
+        if not future.done():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    def wait(self, future: Future, started_at: float) -> Optional[tuple]:
+        """
+        Result of `future` if it arrives within the latency budget counted from `started_at`.
+        """
+        try:
+            return future.result(timeout=max(0., self.latency_budget - (time.perf_counter() - started_at)))
+        except Exception:
+            return None
+
+    @staticmethod
+    def _encode_json(obs, masks) -> bytes:
+        post_data = {
+            'obs': [o.tolist() for o in obs],
+            'masks': [m.tolist() for m in masks],
+        }
+        return gzip.compress(json.dumps(post_data, separators=(',', ':')).encode('utf-8'))
+
+    def _request(self, body: bytes, binary: bool) -> tuple:
+        headers = {'Authorization': self.ot_settings['api_key']}
+        if binary:
+            headers['Content-Type'] = BATCH_CONTENT_TYPE
+        else:
+            headers['Content-Encoding'] = 'gzip'
+        try:
+            r = self.session.post(
+                f'{self.ot_settings["server"]}{self.endpoint}',
+                headers=headers,
+                data=body,
+                timeout=self.timeout,
+            )
+            if r.status_code == 415 and binary:
+                logger.info("Online server does not accept binary batches, switching to gzip JSON")
+                self.binary = False
+            assert r.status_code == 200, f"status {r.status_code}"
+            r_json = r.json()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return r_json['actions'], r_json['q_out'], r_json['masks'], r_json['is_greedy']
+
+    def probe(self) -> bool:
+        # Any answer that is not a server error means the server is up again
+        r = self.session.get(self.ot_settings["server"], timeout=self.timeout)
+        return r.status_code < 500
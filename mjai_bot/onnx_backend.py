@@ -0,0 +1,164 @@
+"""
+ONNX Runtime backend for Mortal engines.
+
+The Brain encoder and DQN head are exported as one (obs, mask) -> q graph
+with a dynamic batch axis, written next to the checkpoint as
+`<checkpoint>.v<version>.onnx`, and run on onnxruntime's CPU execution
+provider from `MortalEngine._react_batch`.
+
+Run as a script to (re-)export a checkpoint and check it against torch:
+
+    python -m mjai_bot.onnx_backend --model mortal
+"""
+import sys
+import pathlib
+import argparse
+import importlib
+import torch
+from torch import nn, Tensor
+from typing import Optional
+from .inference_graph import InferenceGraph, random_inputs, max_q_error
+from .logger import logger
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+ONNX_OPSET = 17
+EQUIVALENCE_TOLERANCE = 1e-4
+
+
+def onnx_path(control_state_file: pathlib.Path, version: int) -> pathlib.Path:
+    control_state_file = pathlib.Path(control_state_file)
+    return control_state_file.with_name(f"{control_state_file.stem}.v{version}.onnx")
+
+
+def export_onnx(brain: nn.Module, dqn: nn.Module, obs_shape: tuple, action_space: int, path: pathlib.Path) -> pathlib.Path:
+    """
+    Export a version 2-4 Brain/DQN pair to `path` with a dynamic batch size.
+    """
+    graph = InferenceGraph(brain, dqn).cpu().eval()
+    example = random_inputs(obs_shape, action_space, 2, torch.device("cpu"))
+    # Write to a temporary file first so a crashed export never leaves a truncated graph behind
+    tmp_path = path.with_suffix(".onnx.tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            graph,
+            example,
+            str(tmp_path),
+            input_names=["obs", "mask"],
+            output_names=["q"],
+            dynamic_axes={"obs": {0: "batch"}, "mask": {0: "batch"}, "q": {0: "batch"}},
+            opset_version=ONNX_OPSET,
+        )
+    tmp_path.replace(path)
+    logger.info(f"Exported ONNX graph to {path}")
+    return path
+
+
+class OnnxGraph:
+    """
+    onnxruntime session with the (obs, mask) -> q calling convention of
+    a torch inference graph, so MortalEngine can use either.
+
+    `num_threads` is the intra-op thread count, 0 for onnxruntime's default.
+    """
+    def __init__(self, path: pathlib.Path, num_threads: int = 0):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads
+        self.path = path
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, obs: Tensor, mask: Tensor) -> Tensor:
+        q, = self.session.run(["q"], {
+            "obs": obs.detach().cpu().numpy(),
+            "mask": mask.detach().cpu().numpy(),
+        })
+        return torch.from_numpy(q)
+
+
+def load_onnx_graph(
+    control_state_file: pathlib.Path,
+    brain: nn.Module,
+    dqn: nn.Module,
+    obs_shape: tuple,
+    action_space: int,
+    num_threads: int = 0,
+) -> Optional[OnnxGraph]:
+    """
+    Open the ONNX graph of a checkpoint, exporting it first if it is missing
+    or older than the checkpoint, and check it against the torch modules.
+
+    :param num_threads: intra-op threads of the session, e.g. the tuned
+        count from thread_tuner; 0 for onnxruntime's default
+
+    :return: the graph, or None if the torch path has to be used instead
+    """
+    if ort is None:
+        logger.error("onnxruntime is not installed, falling back to the torch backend")
+        return None
+    if brain.version not in (2, 3, 4) or brain.is_oracle:
+        logger.info(f"ONNX backend is not available for version {brain.version} models")
+        return None
+
+    path = onnx_path(control_state_file, brain.version)
+    try:
+        if not path.exists() or path.stat().st_mtime_ns < pathlib.Path(control_state_file).stat().st_mtime_ns:
+            export_onnx(brain, dqn, obs_shape, action_space, path)
+        graph = OnnxGraph(path, num_threads)
+    except Exception as e:
+        logger.error(f"Failed to prepare ONNX graph {path}, falling back to the torch backend: {e}")
+        return None
+
+    error = check_equivalence(graph, brain, dqn, obs_shape, action_space)
+    if error > EQUIVALENCE_TOLERANCE:
+        logger.error(f"ONNX graph {path} rejected: max |dQ| {error:.2e} > tolerance {EQUIVALENCE_TOLERANCE:.2e}")
+        return None
+    logger.info(f"Using ONNX graph {path} (max |dQ| {error:.2e})")
+    return graph
+
+
+def check_equivalence(graph: OnnxGraph, brain: nn.Module, dqn: nn.Module, obs_shape: tuple, action_space: int, batch_size: int = 16) -> float:
+    """
+    Largest |dQ| between the ONNX graph and the torch modules on random inputs.
+    """
+    obs, mask = random_inputs(obs_shape, action_space, batch_size, torch.device("cpu"))
+    return max_q_error(graph, brain.cpu(), dqn.cpu(), obs, mask)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export a Mortal checkpoint to ONNX and check it against torch.")
+    parser.add_argument("--model", default="mortal", choices=["mortal", "mortal3p"], help="bot package to export")
+    parser.add_argument("--batch-size", type=int, default=64, help="batch size of the equivalence check")
+    args = parser.parse_args(argv)
+
+    model = importlib.import_module(f".{args.model}.model", package=__package__)
+    control_state_file = pathlib.Path(model.__file__).parent / "mortal.pth"
+    engine = model.build_engine(control_state_file, torch.device("cpu"))
+    path = export_onnx(
+        engine.brain,
+        engine.dqn,
+        model.obs_shape(engine.version),
+        model.ACTION_SPACE,
+        onnx_path(control_state_file, engine.version),
+    )
+    if ort is None:
+        print("onnxruntime is not installed, skipping the equivalence check")
+        return 1
+
+    error = check_equivalence(
+        OnnxGraph(path),
+        engine.brain,
+        engine.dqn,
+        model.obs_shape(engine.version),
+        model.ACTION_SPACE,
+        args.batch_size,
+    )
+    print(f"max |dQ| onnx vs torch: {error:.2e} (tolerance {EQUIVALENCE_TOLERANCE:.2e})")
+    return 0 if error <= EQUIVALENCE_TOLERANCE else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Run Mortal inference and the AkagiBot strategy layer side by side.
+
+Per event batch, the controller (libriichi + torch, which releases the GIL)
+runs on a worker thread while the tracking AkagiBot ingests the same events on
+the caller thread, so the UI reads a bot that is never evaluated concurrently.
+The strategy layer has its own AkagiBot, owned by a single strategy worker that
+ingests every batch in order and only evaluates the newest one. The Mortal
+suggestion is returned as soon as it is ready, the strategy worker is never
+waited for.
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from .bot import AkagiBot
+from .controller import Controller
+from .logger import logger
+
+
+class ReactPipeline(object):
+    def __init__(self, controller: Controller, bot: AkagiBot):
+        self.controller = controller
+        self.bot = bot
+        self.strategy_bot = AkagiBot()
+        self.mortal_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="akagi-mortal")
+        # One worker keeps the strategy bot single-owner and its batches in order
+        self.strategy_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="akagi-strategy")
+        self.submitted = 0
+        self.strategy_skipped = 0
+        # (critical path, mortal) in seconds
+        self.timings: deque[tuple[float, float]] = deque(maxlen=256)
+        # strategy evaluation in seconds, appended by the strategy worker
+        self.strategy_timings: deque[float] = deque(maxlen=256)
+
+    def _timed(self, fn: Callable, *args) -> tuple[Any, float]:
+        start = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - start
+
+    def _strategy(self, seq: int, events: list[dict], lines: list[str]) -> Optional[str]:
+        """
+        Runs on the strategy worker. Every batch is ingested, but a batch that
+        already has a newer one queued behind it is not evaluated.
+        """
+        if not self.strategy_bot.ingest(input_list=events, input_lines=lines):
+            return None
+        if seq != self.submitted:
+            self.strategy_skipped += 1
+            return None
+        response, elapsed = self._timed(self.strategy_bot.decide)
+        self.strategy_timings.append(elapsed)
+        return response
+
+    def react(self, events: list[dict], lines: list[str]) -> dict:
+        """
+        Feed one batch to the controller, the tracking bot and the strategy worker.
+
+        :param events: mjai events as dicts
+        :param lines: the same events encoded with `codec.encode_events`
+        :return: the controller (Mortal) response
+        """
+        start = time.perf_counter()
+        mortal_future = self.mortal_executor.submit(self._timed, self.controller.react, events, lines)
+        self.submitted += 1
+        self.strategy_executor.submit(self._strategy, self.submitted, events, lines)
+        self.bot.ingest(input_list=events, input_lines=lines)
+        mortal_response, mortal_time = mortal_future.result()
+        self.timings.append((time.perf_counter() - start, mortal_time))
+        return mortal_response
+
+    def take_restored(self) -> Optional[dict]:
+        """
+        The controller's answer to the pending decision of a game it just
+        took over on a model switch, to be rendered like a `react` result.
+        """
+        return self.controller.take_restored_action()
+
+    def stats(self) -> dict:
+        """
+        Mean latencies in ms over the recent decisions.
+        """
+        if not self.timings:
+            return {}
+        n = len(self.timings)
+        strategy = list(self.strategy_timings)
+        return {
+            "decisions": n,
+            "critical_path_ms": sum(t[0] for t in self.timings) / n * 1000,
+            "mortal_ms": sum(t[1] for t in self.timings) / n * 1000,
+            "strategy_ms": sum(strategy) / len(strategy) * 1000 if strategy else None,
+            "strategy_skipped": self.strategy_skipped,
+        }
+
+    def shutdown(self) -> None:
+        if self.timings:
+            logger.info(f"React pipeline: {self.stats()}")
+        self.mortal_executor.shutdown(wait=False, cancel_futures=True)
+        self.strategy_executor.shutdown(wait=False, cancel_futures=True)
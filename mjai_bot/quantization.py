@@ -0,0 +1,204 @@
+"""
+Int8 CPU inference for Mortal engines.
+
+Linear layers are quantized dynamically, the Conv1d stack statically with
+activation ranges calibrated on observations replayed from mjai logs.
+
+Run as a script to compare an fp32 and an int8 engine side by side:
+
+    python -m mjai_bot.quantization path/to/mjai_logs --model mortal
+"""
+import sys
+import copy
+import json
+import time
+import pathlib
+import argparse
+import importlib
+import numpy as np
+import torch
+from torch import nn
+from typing import Callable, Optional
+from torch.ao.quantization import QConfigMapping, get_default_qconfig, default_dynamic_qconfig, quantize_dynamic
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+from .inference_graph import fold_batch_norms
+from .mjai_logs import iter_log_files, read_log
+from .logger import logger
+
+CALIBRATION_MAX_SAMPLES = 2048
+CALIBRATION_BATCH_SIZE = 256
+
+
+class EngineRecorder:
+    """
+    Engine wrapper handed to a libriichi `Bot`, which forwards every
+    react_batch call to the wrapped engine and keeps the observations.
+    """
+    def __init__(self, engine, limit: int):
+        self.engine = engine
+        self.limit = limit
+        self.obs: list[np.ndarray] = []
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    def react_batch(self, obs, masks, invisible_obs):
+        if len(self.obs) < self.limit:
+            self.obs.extend(np.array(o, copy=True) for o in obs)
+        return self.engine.react_batch_local(obs, masks, invisible_obs).to_lists()
+
+
+class EngineComparator:
+    """
+    Engine wrapper handed to a libriichi `Bot`, which runs both engines on
+    every react_batch call and records how far the int8 one is from fp32.
+
+    The replay follows the fp32 engine's decisions.
+    """
+    def __init__(self, reference, candidate):
+        self.reference = reference
+        self.candidate = candidate
+        self.decisions: int = 0
+        self.agreements: int = 0
+        self.abs_dq_sum: float = 0.
+        self.abs_dq_count: int = 0
+        self.reference_time: float = 0.
+        self.candidate_time: float = 0.
+
+    def __getattr__(self, name):
+        return getattr(self.reference, name)
+
+    def react_batch(self, obs, masks, invisible_obs):
+        start = time.perf_counter()
+        result = self.reference.react_batch_local(obs, masks, invisible_obs)
+        self.reference_time += time.perf_counter() - start
+        start = time.perf_counter()
+        candidate = self.candidate.react_batch_local(obs, masks, invisible_obs)
+        self.candidate_time += time.perf_counter() - start
+
+        self.decisions += len(result.actions)
+        self.agreements += int((result.actions == candidate.actions).sum())
+        dq = np.abs(result.q_out - candidate.q_out)[result.masks]
+        self.abs_dq_sum += float(dq.sum())
+        self.abs_dq_count += dq.size
+        return result.to_lists()
+
+
+def replay_logs(bot_class, engine, log_dir: pathlib.Path, stop: Callable[[], bool] = lambda: False) -> int:
+    """
+    Replay every seat of every mjai log in `log_dir` through `bot_class(engine, seat)`.
+
+    :param bot_class: libriichi `Bot` class matching the engine's player count
+    :param engine: engine (or wrapper) passed to the bots
+    :param log_dir: directory searched recursively for mjai logs
+    :param stop: called between games, replay ends once it returns True
+    :return: number of replayed games
+    """
+    games = 0
+    for path in iter_log_files(log_dir):
+        if stop():
+            break
+        try:
+            lines = read_log(path)
+            start_game = json.loads(lines[0])
+            num_players = len(start_game.get("names", [None] * 4))
+            for seat in range(num_players):
+                bot = bot_class(engine, seat)
+                for line in lines:
+                    bot.react(line)
+            games += 1
+        except Exception as e:
+            logger.warning(f"Skipping mjai log {path}: {e}")
+    return games
+
+
+def collect_calibration_obs(bot_class, engine, log_dir: pathlib.Path, limit: int = CALIBRATION_MAX_SAMPLES) -> list[np.ndarray]:
+    recorder = EngineRecorder(engine, limit)
+    games = replay_logs(bot_class, recorder, log_dir, stop=lambda: len(recorder.obs) >= limit)
+    logger.info(f"Collected {len(recorder.obs)} calibration observations from {games} games in {log_dir}")
+    return recorder.obs[:limit]
+
+
+def quantize_brain(brain: nn.Module, calibration_obs: list[np.ndarray]) -> nn.Module:
+    """
+    Int8 Brain: Conv1d statically quantized with ranges observed on
+    `calibration_obs`, Linear dynamically quantized. Everything else (Mish,
+    residual adds, pre-activation BatchNorms) stays fp32.
+    """
+    brain = copy.deepcopy(brain).cpu().eval()
+    fold_batch_norms(brain)
+    if not calibration_obs:
+        logger.warning("No calibration observations, only Linear layers of the Brain are quantized")
+        return quantize_dynamic(brain, {nn.Linear}, dtype=torch.qint8)
+
+    qconfig_mapping = (
+        QConfigMapping()
+        .set_object_type(nn.Conv1d, get_default_qconfig(torch.backends.quantized.engine))
+        .set_object_type(nn.Linear, default_dynamic_qconfig)
+    )
+    obs = torch.as_tensor(np.stack(calibration_obs, axis=0))
+    prepared = prepare_fx(brain, qconfig_mapping, example_inputs=(obs[:1],))
+    with torch.inference_mode():
+        for batch in obs.split(CALIBRATION_BATCH_SIZE):
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def quantize_dqn(dqn: nn.Module) -> nn.Module:
+    return quantize_dynamic(copy.deepcopy(dqn).cpu().eval(), {nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_engine(engine, bot_class, calibration_dir: Optional[pathlib.Path]) -> None:
+    """
+    Replace the Brain and DQN of a CPU engine with int8 versions, in place.
+
+    :param engine: fp32 MortalEngine on CPU
+    :param bot_class: libriichi `Bot` class used to replay the calibration logs
+    :param calibration_dir: directory of mjai logs to calibrate on, or None
+    """
+    calibration_obs = []
+    if calibration_dir and pathlib.Path(calibration_dir).is_dir():
+        calibration_obs = collect_calibration_obs(bot_class, engine, pathlib.Path(calibration_dir))
+    elif calibration_dir:
+        logger.warning(f"Calibration directory {calibration_dir} does not exist")
+    engine.brain = quantize_brain(engine.brain, calibration_obs)
+    engine.dqn = quantize_dqn(engine.dqn)
+    logger.info(f"Quantized {engine.name} to int8 ({torch.backends.quantized.engine})")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 Mortal engines on a directory of mjai logs.")
+    parser.add_argument("log_dir", type=pathlib.Path, help="directory of mjai logs to replay")
+    parser.add_argument("--model", default="mortal", choices=["mortal", "mortal3p"], help="bot package to load")
+    parser.add_argument("--calibration-dir", type=pathlib.Path, default=None,
+                        help="mjai logs to calibrate on (default: log_dir)")
+    args = parser.parse_args(argv)
+
+    model = importlib.import_module(f".{args.model}.model", package=__package__)
+    control_state_file = pathlib.Path(model.__file__).parent / "mortal.pth"
+    device = torch.device("cpu")
+    reference = model.build_engine(control_state_file, device)
+    candidate = model.build_engine(control_state_file, device)
+    quantize_engine(candidate, model.Bot, args.calibration_dir or args.log_dir)
+
+    comparator = EngineComparator(reference, candidate)
+    games = replay_logs(model.Bot, comparator, args.log_dir)
+    if comparator.decisions == 0:
+        print(f"No decisions replayed from {args.log_dir}")
+        return 1
+
+    agreement = comparator.agreements / comparator.decisions
+    mean_dq = comparator.abs_dq_sum / max(comparator.abs_dq_count, 1)
+    speedup = comparator.reference_time / max(comparator.candidate_time, 1e-9)
+    print(f"games:            {games}")
+    print(f"decisions:        {comparator.decisions}")
+    print(f"argmax agreement: {agreement:.4%}")
+    print(f"mean |dQ|:        {mean_dq:.5f}")
+    print(f"fp32 time:        {comparator.reference_time:.3f}s")
+    print(f"int8 time:        {comparator.candidate_time:.3f}s")
+    print(f"speedup:          {speedup:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import threading
+import numpy as np
+from typing import NamedTuple, Sequence, Union
+
+
+class ReactResult(NamedTuple):
+    """
+    Output of `MortalEngine._react_batch` as numpy arrays.
+
+    actions:   (batch,) int64, chosen action per observation
+    q_out:     (batch, ACTION_SPACE) float32, -inf on illegal actions
+    masks:     (batch, ACTION_SPACE) bool, legal actions
+    is_greedy: (batch,) bool
+
+    On CPU q_out, actions and is_greedy are views of the output tensors, no
+    copy is made. libriichi only accepts plain lists, so `react_batch`
+    converts with `to_lists()` once, right at that boundary.
+    """
+    actions: np.ndarray
+    q_out: np.ndarray
+    masks: np.ndarray
+    is_greedy: np.ndarray
+
+    def to_lists(self) -> tuple[list, list, list, list]:
+        return self.actions.tolist(), self.q_out.tolist(), self.masks.tolist(), self.is_greedy.tolist()
+
+
+class BatchBuffer(object):
+    """
+    Per-thread preallocated (batch, *shape) buffer the per-seat arrays handed
+    over by libriichi are copied into, instead of `np.stack` allocating a new
+    batch on every call.
+
+    The returned batch is only valid until the next `fill` on the same thread.
+    """
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self._local = threading.local()
+
+    def fill(self, arrays: Union[np.ndarray, Sequence[np.ndarray]]) -> np.ndarray:
+        # An already batched array is used as is
+        if isinstance(arrays, np.ndarray):
+            return arrays
+        n = len(arrays)
+        shape = (n, *np.shape(arrays[0]))
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape[0] < n or buffer.shape[1:] != shape[1:]:
+            buffer = np.empty(shape, dtype=self.dtype)
+            self._local.buffer = buffer
+        return np.stack(arrays, axis=0, out=buffer[:n])
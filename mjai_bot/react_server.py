@@ -0,0 +1,252 @@
+"""
+Local inference server speaking the ot_server protocol of the mortal bots.
+
+    POST /react_batch      4p, served by mjai_bot/mortal/mortal.pth
+    POST /react_batch_3p   3p, served by mjai_bot/mortal3p/mortal.pth
+    GET  /                 health check
+    GET  /stats            latency and batch size statistics as JSON
+
+Request bodies are gzip JSON {"obs", "masks"} or the binary batch of
+online_client.py, the response is JSON {"actions", "q_out", "masks", "is_greedy"}.
+Concurrent requests arriving within a short window are run as one forward pass.
+
+Point a client at it with ot_settings.json {"server": "http://host:port", "online": true, ...}:
+
+    python -m mjai_bot.react_server --host 0.0.0.0 --port 8765
+"""
+import sys
+import gzip
+import json
+import time
+import queue
+import argparse
+import importlib
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Sequence
+from .online_client import BATCH_CONTENT_TYPE, decode_batch
+from .logger import logger
+
+ENDPOINTS = {
+    "/react_batch": "mortal",
+    "/react_batch_3p": "mortal3p",
+}
+STATS_WINDOW = 4096
+STATS_LOG_INTERVAL = 60.0
+
+
+@dataclass
+class PendingRequest:
+    obs: np.ndarray
+    masks: np.ndarray
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    future: Future = field(default_factory=Future)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    return float(np.percentile(values, q)) if len(values) else 0.
+
+
+class MicroBatcher(object):
+    """
+    Collects requests for one engine and runs them in a single forward pass.
+
+    The worker takes the first waiting request, then keeps taking requests
+    for at most `window` seconds or until `max_batch` observations are
+    gathered, whichever comes first.
+    """
+    def __init__(self, name: str, engine, window: float, max_batch: int):
+        self.name = name
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self.latencies: deque[float] = deque(maxlen=STATS_WINDOW)
+        self.batch_sizes: deque[int] = deque(maxlen=STATS_WINDOW)
+        self.requests: int = 0
+        self._queue: queue.Queue[PendingRequest] = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, obs: np.ndarray, masks: np.ndarray) -> Future:
+        request = PendingRequest(obs=obs, masks=masks)
+        self._queue.put(request)
+        return request.future
+
+    def _collect(self) -> list[PendingRequest]:
+        batch = [self._queue.get()]
+        size = len(batch[0].obs)
+        deadline = time.perf_counter() + self.window
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.obs)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                obs = np.concatenate([r.obs for r in batch], axis=0)
+                masks = np.concatenate([r.masks for r in batch], axis=0)
+                result = self.engine.react_batch_local(obs, masks, None)
+            except Exception as e:
+                logger.error(f"{self.name} forward pass failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            done_at = time.perf_counter()
+            start = 0
+            for request in batch:
+                end = start + len(request.obs)
+                request.future.set_result({
+                    "actions": result.actions[start:end].tolist(),
+                    "q_out": result.q_out[start:end].tolist(),
+                    "masks": result.masks[start:end].tolist(),
+                    "is_greedy": result.is_greedy[start:end].tolist(),
+                })
+                start = end
+            with self._stats_lock:
+                self.requests += len(batch)
+                self.batch_sizes.append(len(obs))
+                self.latencies.extend(done_at - r.enqueued_at for r in batch)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            latencies = list(self.latencies)
+            batch_sizes = list(self.batch_sizes)
+            requests = self.requests
+        return {
+            "requests": requests,
+            "latency_ms_p50": percentile(latencies, 50) * 1000,
+            "latency_ms_p99": percentile(latencies, 99) * 1000,
+            "batch_size_mean": float(np.mean(batch_sizes)) if batch_sizes else 0.,
+            "batch_size_max": max(batch_sizes, default=0),
+        }
+
+
+class ReactBatchHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients with a pooled session reuse their connection
+    protocol_version = "HTTP/1.1"
+    server: "ReactBatchServer"
+
+    def do_GET(self):
+        if self.path == "/":
+            self._send_json(200, {"status": "ok", "endpoints": sorted(self.server.batchers)})
+        elif self.path == "/stats":
+            self._send_json(200, {endpoint: b.stats() for endpoint, b in self.server.batchers.items()})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        batcher = self.server.batchers.get(self.path)
+        if batcher is None:
+            self._send_json(404, {"error": "not found"})
+            return
+        if self.server.api_key and self.headers.get("Authorization") != self.server.api_key:
+            self._send_json(401, {"error": "unauthorized"})
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            obs, masks = self._decode(body)
+        except Exception as e:
+            self._send_json(400, {"error": f"bad request: {e}"})
+            return
+        try:
+            response = batcher.submit(obs, masks).result()
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, response)
+
+    def _decode(self, body: bytes) -> tuple[np.ndarray, np.ndarray]:
+        if self.headers.get("Content-Type") == BATCH_CONTENT_TYPE:
+            return decode_batch(body)
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        data = json.loads(body)
+        return np.asarray(data["obs"], dtype=np.float32), np.asarray(data["masks"], dtype=bool)
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request access lines would flood the log, stats are reported instead
+        pass
+
+
+class ReactBatchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], batchers: dict[str, MicroBatcher], api_key: str = ""):
+        super().__init__(address, ReactBatchHandler)
+        self.batchers = batchers
+        self.api_key = api_key
+
+
+def log_stats(batchers: dict[str, MicroBatcher], interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        for endpoint, batcher in batchers.items():
+            s = batcher.stats()
+            logger.info(
+                f"{endpoint}: {s['requests']} requests, latency p50 {s['latency_ms_p50']:.1f} ms "
+                f"p99 {s['latency_ms_p99']:.1f} ms, batch size mean {s['batch_size_mean']:.2f} "
+                f"max {s['batch_size_max']}"
+            )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve /react_batch and /react_batch_3p from the local mortal checkpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--api-key", default="", help="required Authorization header, empty to accept any")
+    parser.add_argument("--window-ms", type=float, default=5.0, help="micro-batching window")
+    parser.add_argument("--max-batch", type=int, default=64, help="largest batch of one forward pass")
+    args = parser.parse_args(argv)
+
+    batchers: dict[str, MicroBatcher] = {}
+    for endpoint, package in ENDPOINTS.items():
+        try:
+            model = importlib.import_module(f".{package}.model", package=__package__)
+            engine = model.load_engine()
+            engine.warm_up()
+        except Exception as e:
+            logger.error(f"Not serving {endpoint}, failed to load {package}: {e}")
+            continue
+        batchers[endpoint] = MicroBatcher(endpoint, engine, args.window_ms / 1000, args.max_batch)
+        logger.info(f"Serving {endpoint} with {package}")
+    if not batchers:
+        logger.error("No model could be loaded")
+        return 1
+
+    threading.Thread(target=log_stats, args=(batchers, STATS_LOG_INTERVAL), name="stats", daemon=True).start()
+    server = ReactBatchServer((args.host, args.port), batchers, args.api_key)
+    logger.info(f"Listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
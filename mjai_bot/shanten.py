@@ -0,0 +1,367 @@
+"""
+Exact shanten and ukeire for regular hands, chiitoitsu and kokushi.
+
+Hands are 34-count vectors (see `tiles.counts34`). A regular hand is scored
+suit by suit: the 9 counts of a number suit, or the 7 of the honors, map to
+a row giving the number of tiles still missing to form `m` melds (m = 0..4)
+with or without the pair, and the four rows are merged by a min-plus
+convolution. Shanten is the smallest number of missing tiles minus one.
+Only additions are counted and no kind may be needed more than four times,
+so waits on a tile the hand already holds four of are not counted.
+
+Suit rows are tabulated on first use, keyed by the suit's count vector, and
+kept for the life of the process; whole-hand results are LRU-cached by the
+34-count tuple. Ukeire reuses the same rows: for each of the 34 draws only
+the drawn tile's suit is looked up again and merged with the other three.
+
+Run as a script to check random hands against a plain recursive search and
+time the engine and PlayerPolicy's discard lookahead:
+
+    python -m mjai_bot.shanten [hands]
+"""
+import sys
+import time
+import types
+import random
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+from . import tiles
+
+MAX_MELDS = 4
+CACHE_SIZE = 1 << 16
+_ROW = 2 * (MAX_MELDS + 1)          # row[m * 2 + pair]
+_INF = 99
+_YAOCHU: tuple[int, ...] = tuple(i for i in range(tiles.N_KINDS) if tiles.IS_HONOR[i] or tiles.RANK[i] in (1, 9))
+# Suit of each base id and the slice of the count vector it covers
+_SUIT_OF: tuple[int, ...] = tuple(tiles.SUIT[:tiles.N_KINDS])
+_SPANS: tuple[tuple[int, int], ...] = ((0, 9), (9, 18), (18, 27), (27, 34))
+
+_number_rows: dict[tuple[int, ...], tuple[int, ...]] = {}
+_honor_rows: dict[tuple[int, ...], tuple[int, ...]] = {}
+
+
+def _transitions(pending: int, seq_ok: bool) -> tuple[tuple[int, int, int, int], ...]:
+    """
+    Ways to lay melds on one rank, as (next pending, melds added, pair added,
+    tiles needed on the rank). `pending` packs the sequences started one and
+    two ranks back as `a * 3 + b`. Three equal sequences need the same tiles
+    as three triplets on consecutive ranks, so at most two start per rank.
+    """
+    a, b = divmod(pending, 3)
+    out = []
+    for s in range(3 if seq_ok else 1):
+        for k in range(2):
+            for q in range(2):
+                need = a + b + s + 3 * k + 2 * q
+                if need <= 4:
+                    out.append((s * 3 + a, s + k, q, need))
+    return tuple(out)
+
+
+_TRANSITIONS: tuple[tuple[tuple[tuple[int, int, int, int], ...], ...], ...] = tuple(
+    tuple(_transitions(pending, seq_ok) for pending in range(9)) for seq_ok in (False, True)
+)
+
+
+def _number_row(c: tuple[int, ...]) -> tuple[int, ...]:
+    """
+    Missing tiles per (melds, pair) for one number suit.
+
+    Walks the ranks once, carrying the sequences still waiting for this rank,
+    so every way of laying out the melds is covered.
+    """
+    row = _number_rows.get(c)
+    if row is not None:
+        return row
+    # pending sequences -> row of missing tiles
+    states = {0: [0] + [_INF] * (_ROW - 1)}
+    for i in range(9):
+        have = c[i]
+        table = _TRANSITIONS[i < 7]
+        nxt: dict[int, list[int]] = {}
+        for pending, cur in states.items():
+            for to, dm, dq, need in table[pending]:
+                add = need - have if need > have else 0
+                out = nxt.get(to)
+                if out is None:
+                    out = nxt[to] = [_INF] * _ROW
+                shift = 2 * dm + dq
+                for j in range(_ROW - 2 * dm):
+                    v = cur[j]
+                    if v >= _INF or (dq and j & 1):
+                        continue
+                    v += add
+                    if v < out[j + shift]:
+                        out[j + shift] = v
+        states = nxt
+    row = _number_rows[c] = tuple(states[0])
+    return row
+
+
+def _honor_row(c: tuple[int, ...]) -> tuple[int, ...]:
+    """
+    Missing tiles per (melds, pair) for the honors, which only form sets.
+    """
+    key = tuple(sorted(c))
+    row = _honor_rows.get(key)
+    if row is not None:
+        return row
+    out = [0] + [_INF] * (_ROW - 1)
+    for have in key:
+        single = [_INF] * _ROW
+        single[0] = 0
+        single[2] = max(0, 3 - have)
+        single[1] = max(0, 2 - have)
+        out = _merge(out, single)
+    row = _honor_rows[key] = tuple(out)
+    return row
+
+
+def _merge(x: Sequence[int], y: Sequence[int]) -> list[int]:
+    out = [_INF] * _ROW
+    for m1 in range(MAX_MELDS + 1):
+        for p1 in range(2):
+            a = x[m1 * 2 + p1]
+            if a >= _INF:
+                continue
+            for m2 in range(MAX_MELDS + 1 - m1):
+                for p2 in range(2 - p1):
+                    v = a + y[m2 * 2 + p2]
+                    j = (m1 + m2) * 2 + p1 + p2
+                    if v < out[j]:
+                        out[j] = v
+    return out
+
+
+def _rows(c: tuple[int, ...]) -> list[tuple[int, ...]]:
+    return [_number_row(c[0:9]), _number_row(c[9:18]), _number_row(c[18:27]), _honor_row(c[27:34])]
+
+
+def _target(x: Sequence[int], y: Sequence[int], melds: int) -> int:
+    """
+    Missing tiles for `melds` melds and the pair, from two partial rows.
+    """
+    best = _INF
+    for m1 in range(melds + 1):
+        j = (melds - m1) * 2
+        v = x[m1 * 2] + y[j + 1]
+        if v < best:
+            best = v
+        v = x[m1 * 2 + 1] + y[j]
+        if v < best:
+            best = v
+    return best
+
+
+def regular_shanten(counts: Sequence[int]) -> int:
+    """
+    Shanten of the four-melds-and-a-pair shape; called melds are implied
+    by the tile count (a 10/11-tile hand needs three melds, and so on).
+    """
+    c = tuple(counts)
+    r = _rows(c)
+    return _target(_merge(r[0], r[1]), _merge(r[2], r[3]), sum(c) // 3) - 1
+
+
+def chiitoitsu_shanten(counts: Sequence[int]) -> int:
+    """
+    :return: shanten towards seven pairs, `_INF` unless the hand is closed
+    """
+    if sum(counts) < 13:
+        return _INF
+    kinds = sum(1 for n in counts if n)
+    pairs = sum(1 for n in counts if n >= 2)
+    return 6 - pairs + max(0, 7 - kinds)
+
+
+def kokushi_shanten(counts: Sequence[int]) -> int:
+    """
+    :return: shanten towards thirteen orphans, `_INF` unless the hand is closed
+    """
+    if sum(counts) < 13:
+        return _INF
+    kinds = sum(1 for i in _YAOCHU if counts[i])
+    pair = any(counts[i] >= 2 for i in _YAOCHU)
+    return 13 - kinds - pair
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _shanten(c: tuple[int, ...]) -> int:
+    return min(regular_shanten(c), chiitoitsu_shanten(c), kokushi_shanten(c))
+
+
+def shanten(counts: Sequence[int]) -> int:
+    """
+    :param counts: 34-count vector of the concealed tiles (13/14 tiles, or
+        3 fewer per called meld)
+    :return: -1 for a complete hand, 0 for tenpai, and so on
+    """
+    return _shanten(tuple(counts))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _ukeire(c: tuple[int, ...]) -> tuple[int, tuple[int, ...]]:
+    n = sum(c)
+    if n % 3 != 1:
+        raise ValueError(f"Ukeire needs a hand waiting for a draw, got {n} tiles")
+    base = _shanten(c)
+    rows = _rows(c)
+    # The other three suits merged, per suit, so a draw costs one lookup
+    rest = [
+        _merge(_merge(rows[1], rows[2]), rows[3]),
+        _merge(_merge(rows[0], rows[2]), rows[3]),
+        _merge(_merge(rows[0], rows[1]), rows[3]),
+        _merge(_merge(rows[0], rows[1]), rows[2]),
+    ]
+    melds = (n + 1) // 3
+    closed = n == 13
+    if closed:
+        kinds = sum(1 for x in c if x)
+        pairs = sum(1 for x in c if x >= 2)
+        y_kinds = sum(1 for i in _YAOCHU if c[i])
+        y_pair = any(c[i] >= 2 for i in _YAOCHU)
+    yaochu = frozenset(_YAOCHU)
+    useful = []
+    cc = list(c)
+    for i in range(tiles.N_KINDS):
+        if c[i] >= 4:
+            continue
+        s = _SUIT_OF[i]
+        lo, hi = _SPANS[s]
+        cc[i] += 1
+        suit = tuple(cc[lo:hi])
+        cc[i] -= 1
+        row = _honor_row(suit) if s == tiles.HONOR_SUIT else _number_row(suit)
+        sh = _target(row, rest[s], melds) - 1
+        if closed and sh >= base:
+            # Seven pairs and thirteen orphans, updated for the one added tile
+            sh = min(
+                sh,
+                6 - (pairs + (c[i] == 1)) + max(0, 7 - (kinds + (c[i] == 0))),
+                13 - (y_kinds + (i in yaochu and c[i] == 0)) - (y_pair or (i in yaochu and c[i] == 1)),
+            )
+        if sh < base:
+            useful.append(i)
+    return base, tuple(useful)
+
+
+def ukeire(counts: Sequence[int]) -> tuple[int, tuple[int, ...]]:
+    """
+    :param counts: 34-count vector of a hand waiting for a draw (13 tiles,
+        or 3 fewer per called meld)
+    :return: the hand's shanten and the base ids of the draws that lower it
+    """
+    return _ukeire(tuple(counts))
+
+
+def cache_info() -> dict[str, Any]:
+    return {
+        "shanten": _shanten.cache_info(),
+        "ukeire": _ukeire.cache_info(),
+        "number_rows": len(_number_rows),
+        "honor_rows": len(_honor_rows),
+    }
+
+
+def _reference_shanten(counts: Sequence[int]) -> int:
+    """
+    Plain mentsu/taatsu search over the whole hand, for checking only. It
+    does not know about the four-copy limit, so compare hands without quads.
+    """
+    c = list(counts)
+    melds = sum(c) // 3
+    best = _INF
+
+    def search(i: int, m: int, t: int, p: int) -> None:
+        nonlocal best
+        while i < tiles.N_KINDS and not c[i]:
+            i += 1
+        if i == tiles.N_KINDS:
+            best = min(best, 2 * (melds - m) - min(t, melds - m) - p)
+            return
+        number = i < 27
+        blocks = [(i, i, i)]
+        if number and i % 9 <= 6:
+            blocks.append((i, i + 1, i + 2))
+        for block in blocks:
+            if all(c[j] >= block.count(j) for j in block):
+                for j in block:
+                    c[j] -= 1
+                search(i, m + 1, t, p)
+                for j in block:
+                    c[j] += 1
+        partials = [(i, i)]
+        if number and i % 9 <= 7:
+            partials.append((i, i + 1))
+        if number and i % 9 <= 6:
+            partials.append((i, i + 2))
+        for a, b in partials:
+            if (c[b] >= 2) if a == b else c[b]:
+                c[a] -= 1
+                c[b] -= 1
+                if a == b and not p:
+                    search(i, m, t, 1)
+                search(i, m, t + 1, p)
+                c[a] += 1
+                c[b] += 1
+        c[i] -= 1
+        search(i, m, t, p)
+        c[i] += 1
+
+    search(0, 0, 0, 0)
+    return best
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    from .majiang_ai_port import PlayerPolicy
+    n_hands = int(argv[0]) if argv else 2000
+    rng = random.Random(0)
+    wall = [i for i in range(tiles.N_KINDS) for _ in range(4)]
+    hands = []
+    for k in range(n_hands):
+        c = [0] * tiles.N_KINDS
+        for i in rng.sample(wall[:36] if k % 4 == 0 else wall, 13):
+            c[i] += 1
+        hands.append(c)
+
+    mismatches = 0
+    for c in hands:
+        if max(c) < 4 and regular_shanten(c) != _reference_shanten(c):
+            mismatches += 1
+        base, useful = ukeire(c)
+        brute = []
+        for i in range(tiles.N_KINDS):
+            if c[i] < 4:
+                c[i] += 1
+                if shanten(c) < base:
+                    brute.append(i)
+                c[i] -= 1
+        if tuple(brute) != useful:
+            mismatches += 1
+    print(f"hands:          {n_hands}")
+    print(f"mismatches:     {mismatches}")
+
+    # Suit rows stay filled from the check above; only the LRU is cold
+    _shanten.cache_clear()
+    _ukeire.cache_clear()
+    for name in ("uncached", "cached"):
+        start = time.perf_counter()
+        for c in hands:
+            ukeire(c)
+        print(f"ukeire {name + ':':<9}{(time.perf_counter() - start) / n_hands * 1e6:10.1f} us/hand")
+
+    policy = PlayerPolicy()
+    n_turns = min(n_hands, 200)
+    start = time.perf_counter()
+    for c in hands[:n_turns]:
+        hand = [tiles.MAJIANG[i] for i in range(tiles.N_KINDS) for _ in range(c[i])]
+        hand.append(tiles.MAJIANG[rng.choice([i for i in range(tiles.N_KINDS) if c[i] < 4])])
+        state = types.SimpleNamespace(my_hand=hand, legal_actions={}, doras=["z1"], wall_remain=60)
+        policy.decide(state)
+    print(f"discard choice: {(time.perf_counter() - start) / n_turns * 1e3:8.2f} ms/turn")
+    print(f"suit rows:      {len(_number_rows)} number, {len(_honor_rows)} honor")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
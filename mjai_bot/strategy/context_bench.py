@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+判断ごとの入力オブジェクト（PolicyContext / TableState / SafetyContext /
+MoveCandidate）を毎回作る場合と、AkagiBot のように使い回す場合の比較。
+
+    python -m mjai_bot.strategy.context_bench [log_dir] [--contexts N] [--repeat N]
+
+局面は danger_bench と同じ（ログのツモ時点、未指定なら乱数）。
+1判断あたりの時間と、tracemalloc で測った判断中のピーク確保量を出す。
+"""
+from __future__ import annotations
+import sys
+import time
+import pathlib
+import argparse
+import dataclasses
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+from ..akagi_policy import PolicyContext, ExpectedValueEngine
+from .last_avoid import TableState, MoveCandidate, LastAvoidConfig, choose_with_last_avoid
+from .safety import SafetyContext
+from .danger_bench import log_contexts, random_contexts
+
+SCORES = (25000, 25000, 25000, 25000)
+
+
+def _policy_values(ctx: SafetyContext) -> Tuple[Tuple[str, object], ...]:
+    # update_policy が設定する項目と同じもの
+    return (
+        ("my_score", SCORES[ctx.my_index]),
+        ("player_id", ctx.my_index),
+        ("is_dealer", ctx.dealer == ctx.my_index),
+        ("riichi_declared_count", sum(1 for r in ctx.riichi_flags if r)),
+        ("opponent_threat", any(ctx.riichi_flags)),
+        ("win_rate", 0.18),
+        ("deal_in_rate", 0.07 + 0.05 * sum(1 for r in ctx.riichi_flags if r)),
+        ("tempai_rate", 0.45),
+        ("basepoint", 2600.0),
+        ("turns_left", max(0, ctx.remaining_tiles // 4)),
+    )
+
+def fresh_decision(ctx: SafetyContext, cfg: LastAvoidConfig) -> str:
+    """判断ごとに全て作り直す（従来の AkagiBot と同じ確保）"""
+    policy = PolicyContext(other_scores=[s for i, s in enumerate(SCORES) if i != ctx.my_index],
+                           **dict(_policy_values(ctx)))
+    ExpectedValueEngine.decide(policy)
+    ts = TableState(
+        round_wind="E", honba=0, kyotaku=0, dealer=ctx.dealer, turn=0,
+        remaining_tiles=ctx.remaining_tiles,
+        scores=list(SCORES),
+        me=ctx.my_index,
+        riichi_flags=list(ctx.riichi_flags),
+        rivers={k: list(v) for k, v in ctx.rivers.items()},
+        my_tiles=ctx.my_tiles[:],
+        dora_indicators=list(ctx.dora_indicators),
+        riichi_early_turns=dict(ctx.riichi_early_turns),
+    )
+    candidates = [MoveCandidate(tile=t, kind="discard", ev_point=0.0) for t in dict.fromkeys(ctx.my_tiles)]
+    return choose_with_last_avoid(candidates, ts, cfg).tile
+
+class ReusedDecision(object):
+    """AkagiBot と同じく、1組のオブジェクトを上書きして使い回す"""
+    def __init__(self, cfg: LastAvoidConfig):
+        self.cfg = cfg
+        self.policy = PolicyContext(my_score=25000, other_scores=[25000, 25000, 25000])
+        self.table = TableState(
+            round_wind="E", honba=0, kyotaku=0, dealer=0, turn=0, remaining_tiles=0,
+            scores=list(SCORES), me=0, riichi_flags=[False] * 4, rivers={}, my_tiles=[],
+        )
+        self.candidates: Dict[str, MoveCandidate] = {}
+
+    def __call__(self, ctx: SafetyContext, cfg: LastAvoidConfig) -> str:
+        policy = self.policy
+        for name, value in _policy_values(ctx):
+            setattr(policy, name, value)
+        policy.other_scores[:] = [s for i, s in enumerate(SCORES) if i != ctx.my_index]
+        ExpectedValueEngine.decide(policy)
+        ts = self.table.refresh(
+            round_wind="E", honba=0, kyotaku=0, dealer=ctx.dealer, turn=0,
+            remaining_tiles=ctx.remaining_tiles,
+            scores=SCORES,
+            me=ctx.my_index,
+            riichi_flags=ctx.riichi_flags,
+            rivers=ctx.rivers,
+            my_tiles=ctx.my_tiles,
+            dora_indicators=ctx.dora_indicators,
+            riichi_early_turns=ctx.riichi_early_turns,
+        )
+        candidates = []
+        for t in dict.fromkeys(ctx.my_tiles):
+            cand = self.candidates.get(t)
+            if cand is None:
+                cand = self.candidates[t] = MoveCandidate(tile=t, kind="discard")
+            cand.ev_point = 0.0
+            cand.danger_score = 0.0
+            candidates.append(cand)
+        return choose_with_last_avoid(candidates, ts, self.cfg).tile
+
+def measure(decide: Callable[[SafetyContext, LastAvoidConfig], str], contexts: List[SafetyContext],
+            cfg: LastAvoidConfig, repeat: int) -> Tuple[float, float, List[str]]:
+    """
+    :return: (秒/判断, ピーク確保バイト/判断, 選んだ牌)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for ctx in contexts:
+            decide(ctx, cfg)
+        best = min(best, time.perf_counter() - start)
+
+    chosen = []
+    peak_total = 0
+    tracemalloc.start()
+    for ctx in contexts:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        chosen.append(decide(ctx, cfg))
+        peak_total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    n = len(contexts)
+    return best / n, peak_total / n, chosen
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare fresh and reused decision contexts.")
+    parser.add_argument("log_dir", type=pathlib.Path, nargs="?", default=None,
+                        help="directory of mjai logs to replay (default: random positions)")
+    parser.add_argument("--contexts", type=int, default=500, help="maximum number of positions")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions")
+    args = parser.parse_args(argv)
+
+    source = log_contexts(args.log_dir) if args.log_dir else random_contexts(args.contexts)
+    contexts: List[SafetyContext] = []
+    for ctx in source:
+        if ctx.my_tiles:
+            # 差分更新のビューは次の局面で変わるので、河からの集計で比べる
+            contexts.append(dataclasses.replace(ctx, visibility=None))
+        if len(contexts) >= args.contexts:
+            break
+    if not contexts:
+        print(f"No positions found in {args.log_dir}")
+        return 1
+
+    cfg = LastAvoidConfig()
+    fresh = measure(fresh_decision, contexts, cfg, args.repeat)
+    reused = measure(ReusedDecision(cfg), contexts, cfg, args.repeat)
+    print(f"positions:      {len(contexts)}")
+    print(f"same choices:   {fresh[2] == reused[2]}")
+    print(f"{'':16}{'us/decision':>14}{'peak bytes':>14}")
+    for name, (seconds, peak, _) in (("fresh", fresh), ("reused", reused)):
+        print(f"{name:16}{seconds * 1e6:14.1f}{peak:14.0f}")
+    return 0 if fresh[2] == reused[2] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
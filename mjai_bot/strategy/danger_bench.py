@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+danger_vector の一致確認とマイクロベンチ。
+
+    python -m mjai_bot.strategy.danger_bench [log_dir] [--contexts N] [--repeat N]
+
+log_dir の mjai ログを再生し、各ツモ時点の SafetyContext について
+37種すべてで aggregate_danger と danger_vector が完全一致することを確認、
+打牌候補の危険度付与にかかる時間を比較する。ログ再生時は TableVisibility を
+差分更新し、そのビューを使った danger_vector も照合する。
+ログ未指定時は乱数の局面を使う。
+vector の時間は bot と同じくビューを計測外で用意したものと、
+rivers から毎回 TableVisibility を組み直すものの両方を出す。
+"""
+from __future__ import annotations
+import sys
+import json
+import time
+import random
+import pathlib
+import argparse
+import dataclasses
+from typing import Dict, Iterator, List, Optional
+from ..mjai_logs import iter_log_files, read_log
+from .safety import SafetyContext, TableVisibility, TILE_KINDS, TILE_INDEX, aggregate_danger, danger_vector
+
+INIT_LIVE_TILES = 70
+
+
+def log_contexts(log_dir: pathlib.Path) -> Iterator[SafetyContext]:
+    """
+    ツモ直後の手番者視点の局面を列挙する（河・立直・ドラは GameStateTracker と同じ扱い）。
+    visibility は差分更新中のビューなので、次の局面を取り出す前に使うこと。
+    """
+    table = TableVisibility()
+    for path in iter_log_files(log_dir):
+        table.reset()
+        rivers: Dict[int, list] = {}
+        hands: Dict[int, List[str]] = {}
+        riichi_turns: Dict[int, int] = {}
+        dora: List[str] = []
+        dealer, remaining, turn = 0, 0, 0
+        for line in read_log(path):
+            event = json.loads(line)
+            et = event["type"]
+            actor = event.get("actor")
+            if et == "start_kyoku":
+                rivers = {0: [], 1: [], 2: [], 3: []}
+                hands = {i: list(t) for i, t in enumerate(event["tehais"])}
+                riichi_turns = {}
+                dora = [event["dora_marker"]]
+                dealer = event.get("oya", 0)
+                remaining, turn = INIT_LIVE_TILES, 0
+                table.reset()
+                table.add_dora(event["dora_marker"])
+            elif et == "dora":
+                dora.append(event["dora_marker"])
+                table.add_dora(event["dora_marker"])
+            elif et == "tsumo":
+                remaining = max(0, remaining - 1)
+                hands[actor].append(event["pai"])
+                hand = hands[actor]
+                if "?" not in hand:
+                    yield SafetyContext(
+                        riichi_flags=[a in riichi_turns for a in range(4)],
+                        rivers={k: list(v) for k, v in rivers.items()},
+                        my_index=actor,
+                        remaining_tiles=remaining,
+                        dealer=dealer,
+                        dora_indicators=list(dora),
+                        my_tiles=list(hand),
+                        riichi_early_turns=dict(riichi_turns),
+                        visibility=table.view(),
+                    )
+            elif et == "dahai":
+                rivers[actor].append((event["pai"], bool(event.get("tsumogiri", False))))
+                table.discard(actor, event["pai"], bool(event.get("tsumogiri", False)))
+                _remove(hands[actor], [event["pai"]])
+                turn += 1
+            elif et == "nukidora":
+                rivers[actor].append(("N", False))
+                table.discard(actor, "N", False)
+                _remove(hands[actor], ["N"])
+                turn += 1
+            elif et in ("chi", "pon", "daiminkan", "kakan", "ankan"):
+                _remove(hands[actor], event.get("consumed", []))
+                if et != "chi" and et != "pon":
+                    remaining = max(0, remaining - 1)
+            elif et in ("reach", "reach_accepted"):
+                riichi_turns.setdefault(actor, turn)
+
+def _remove(hand: List[str], tiles: List[str]) -> None:
+    for t in tiles:
+        if t in hand:
+            hand.remove(t)
+        elif "?" in hand:
+            hand.remove("?")
+
+def random_contexts(n: int, seed: int = 0) -> Iterator[SafetyContext]:
+    rng = random.Random(seed)
+    wall = [t for t in TILE_KINDS[:34] for _ in range(4)]
+    for _ in range(n):
+        rng.shuffle(wall)
+        discards = rng.randint(0, 60)
+        rivers = {i: [(t, rng.random() < 0.4) for t in wall[i:discards:4]] for i in range(4)}
+        riichi = [rng.random() < 0.3 for _ in range(4)]
+        yield SafetyContext(
+            riichi_flags=riichi,
+            rivers=rivers,
+            my_index=0,
+            remaining_tiles=max(0, 70 - discards),
+            dealer=rng.randrange(4),
+            dora_indicators=wall[discards:discards + rng.randint(1, 3)],
+            my_tiles=wall[discards + 10:discards + 24],
+            riichi_early_turns={i: rng.randint(1, 15) for i in range(4) if riichi[i]},
+        )
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check danger_vector against aggregate_danger and time both.")
+    parser.add_argument("log_dir", type=pathlib.Path, nargs="?", default=None,
+                        help="directory of mjai logs to replay (default: random positions)")
+    parser.add_argument("--contexts", type=int, default=2000, help="maximum number of positions")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions")
+    args = parser.parse_args(argv)
+
+    source = log_contexts(args.log_dir) if args.log_dir else random_contexts(args.contexts)
+    contexts: List[SafetyContext] = []
+    mismatches = checked = 0
+    for ctx in source:
+        # 差分更新のビュー（あれば）と rivers からの一括集計の両方を照合
+        variants = [ctx, dataclasses.replace(ctx, visibility=None)] if ctx.visibility is not None else [ctx]
+        for variant in variants:
+            vector = danger_vector(variant)
+            for tile in TILE_KINDS:
+                scalar = aggregate_danger(tile, ctx)
+                checked += 1
+                if scalar != vector[TILE_INDEX[tile]]:
+                    mismatches += 1
+                    if mismatches <= 10:
+                        print(f"mismatch {tile}: scalar {scalar!r} vector {vector[TILE_INDEX[tile]]!r}")
+        contexts.append(variants[-1])
+        if len(contexts) >= args.contexts:
+            break
+    if not contexts:
+        print(f"No positions found in {args.log_dir}")
+        return 1
+
+    # bot はトラッカーの差分更新ビューを渡すので、局面ごとのビューは計測外で作る
+    # （ビューはコピーなしなので局面ごとに別の TableVisibility から取る）
+    viewed = [dataclasses.replace(ctx, visibility=TableVisibility.from_context(ctx).view()) for ctx in contexts]
+    # last_avoid と同じ使い方: 手牌の異なる牌ごとに危険度を引く
+    candidates = [list(dict.fromkeys(ctx.my_tiles or TILE_KINDS[:14])) for ctx in contexts]
+    scalar_time = vector_time = rebuild_time = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for ctx, tiles in zip(contexts, candidates):
+            [aggregate_danger(t, ctx) for t in tiles]
+        scalar_time = min(scalar_time, time.perf_counter() - start)
+        start = time.perf_counter()
+        for ctx, tiles in zip(viewed, candidates):
+            vector = danger_vector(ctx)
+            [float(vector[TILE_INDEX[t]]) for t in tiles]
+        vector_time = min(vector_time, time.perf_counter() - start)
+        start = time.perf_counter()
+        for ctx, tiles in zip(contexts, candidates):
+            vector = danger_vector(ctx)
+            [float(vector[TILE_INDEX[t]]) for t in tiles]
+        rebuild_time = min(rebuild_time, time.perf_counter() - start)
+
+    n = len(contexts)
+    print(f"positions:       {n}")
+    print(f"tiles checked:   {checked}")
+    print(f"mismatches:      {mismatches}")
+    print(f"scalar:          {scalar_time / n * 1e6:.1f}us / position")
+    print(f"vector (view):   {vector_time / n * 1e6:.1f}us / position")
+    print(f"vector (river):  {rebuild_time / n * 1e6:.1f}us / position")
+    print(f"speedup (view):  {scalar_time / max(vector_time, 1e-12):.2f}x")
+    print(f"speedup (river): {scalar_time / max(rebuild_time, 1e-12):.2f}x")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
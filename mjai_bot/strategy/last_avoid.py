@@ -1,14 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Optional, Dict
+from dataclasses import dataclass, field
+from typing import List, Optional, Mapping, Sequence
 import os
 import logging
-from .safety import SafetyContext, aggregate_danger, bucketize, Tile
+from .safety import SafetyContext, VisibilityView, TILE_INDEX, danger_vector, bucketize, Tile
 
 log = logging.getLogger("akagi.last_avoid")
 
-@dataclass
+@dataclass(slots=True)
 class TableState:
     round_wind: str
     honba: int
@@ -19,12 +19,63 @@ class TableState:
     scores: List[int]        # 0..3
     me: int
     riichi_flags: List[bool]
-    rivers: Dict[int, List]  # [(tile,tsumogiri), ...]
+    rivers: Mapping[int, Sequence]  # [(tile,tsumogiri), ...]（読み取り専用で可）
     my_tiles: Optional[List[Tile]] = None
-    dora_indicators: Optional[List[Tile]] = None
-    riichi_early_turns: Optional[Dict[int, int]] = None  # actor->宣言順目
-
-@dataclass
+    dora_indicators: Optional[Sequence[Tile]] = None
+    riichi_early_turns: Optional[Mapping[int, int]] = None  # actor->宣言順目
+    visibility: Optional[VisibilityView] = None  # トラッカーの河集計（None なら rivers から作る）
+    _safety: Optional[SafetyContext] = field(default=None, repr=False, compare=False)
+
+    def refresh(self, *, round_wind: str, honba: int, kyotaku: int, dealer: int, turn: int,
+                remaining_tiles: int, scores: Sequence[int], me: int, riichi_flags: Sequence[bool],
+                rivers: Mapping[int, Sequence], my_tiles: Sequence[Tile],
+                dora_indicators: Sequence[Tile], riichi_early_turns: Mapping[int, int],
+                visibility: Optional[VisibilityView] = None) -> "TableState":
+        """
+        前回の判断で使ったこのオブジェクトを上書きして使い回す。
+        リストは中身だけ差し替え、読み取り専用の河・ドラ・立直順目は参照を持つ。
+        """
+        self.round_wind = round_wind
+        self.honba = honba
+        self.kyotaku = kyotaku
+        self.dealer = dealer
+        self.turn = turn
+        self.remaining_tiles = remaining_tiles
+        self.scores[:] = scores
+        self.me = me
+        self.riichi_flags[:] = riichi_flags
+        self.rivers = rivers
+        if self.my_tiles is None:
+            self.my_tiles = []
+        self.my_tiles[:] = my_tiles
+        self.dora_indicators = dora_indicators
+        self.riichi_early_turns = riichi_early_turns
+        self.visibility = visibility
+        return self
+
+    def safety_context(self) -> SafetyContext:
+        """この卓情報を指す SafetyContext（1つを使い回す、コピーなし）"""
+        ctx = self._safety
+        if ctx is None:
+            ctx = self._safety = SafetyContext(
+                riichi_flags=self.riichi_flags,
+                rivers=self.rivers,
+                my_index=self.me,
+                remaining_tiles=self.remaining_tiles,
+                dealer=self.dealer,
+            )
+        ctx.riichi_flags = self.riichi_flags
+        ctx.rivers = self.rivers
+        ctx.my_index = self.me
+        ctx.remaining_tiles = self.remaining_tiles
+        ctx.dealer = self.dealer
+        ctx.my_tiles = self.my_tiles
+        ctx.dora_indicators = self.dora_indicators
+        ctx.riichi_early_turns = self.riichi_early_turns
+        ctx.visibility = self.visibility
+        return ctx
+
+@dataclass(slots=True)
 class MoveCandidate:
     tile: Tile
     kind: str                # 'discard', 'chi', 'pon', ...
@@ -81,21 +132,13 @@ def choose_with_last_avoid(
     can_escape = (plc == 4 and diff_up <= cfg.can_escape_point_diff)
     must_fold = (plc == 4 and diff_up >= cfg.must_fold_point_diff and global_risk >= 1.5)
 
-    ctx = SafetyContext(
-        riichi_flags=ts.riichi_flags,
-        rivers=ts.rivers,
-        my_index=ts.me,
-        remaining_tiles=ts.remaining_tiles,
-        dealer=ts.dealer,
-        my_tiles=ts.my_tiles,
-        dora_indicators=ts.dora_indicators,
-        riichi_early_turns=ts.riichi_early_turns,
-    )
-
-    # 危険度を付与
+    ctx = ts.safety_context()
+
+    # 危険度を付与（37種を一括計算して引く）
+    danger = danger_vector(ctx)
     for c in mortal_candidates:
         if c.kind == "discard":
-            c.danger_score = aggregate_danger(c.tile, ctx)
+            c.danger_score = float(danger[TILE_INDEX[c.tile]])
         else:
             c.danger_score = 0.0
 
@@ -119,5 +162,5 @@ def choose_with_last_avoid(
     discards.sort(key=lambda c: (c.danger_score, -c.ev_point))
     best = discards[0] if discards else max(mortal_candidates, key=lambda c: c.ev_point)
     # log.info("[LAST-AVOID] FORCE plc=%d diff_up=%d risk=%.2f -> %s danger=%.2f(%s) EV=%.3f",
-    #          plc, diff_up, global_risk, best.tile, getattr(best, "danger_score", 0.0), bucketize(getattr(best, "danger_score", 0.0)), best.ev_point)
+    #          plc, diff_up, global_risk, best.tile, best.danger_score, bucketize(best.danger_score), best.ev_point)
     return best
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Set, Tuple, Optional, Iterable, Union
+from typing import Dict, List, Set, Tuple, Optional, Iterable, Union, Mapping, Sequence
 import logging
 import os
+import numpy as np
+from .. import tiles
 
 log = logging.getLogger("akagi.safety")
 
@@ -95,18 +97,20 @@ def honor_safety_bonus(tile: Tile, ctx: "SafetyContext") -> float:
     return max(0.0, bonus)
 
 
+_PARSED: Dict[Tile, Tuple[str, Optional[int], bool]] = {
+    t: (t, None, False) if tiles.IS_HONOR[i] else (tiles.SUIT_CHARS[tiles.SUIT[i]], tiles.RANK[i], tiles.IS_RED[i])
+    for i, t in enumerate(tiles.MJAI)
+}
+
 def parse_tile(t: Tile) -> Tuple[str, Optional[int], bool]:
     """
     return (suit_or_honor, rank(None for honor), is_red)
     e.g. '5mr' -> ('m', 5, True), '9p' -> ('p', 9, False), 'E' -> ('E', None, False)
     """
-    if t in HONORS:
-        return (t, None, False)
-    is_red = t.endswith("r")
-    core = t[:-1] if is_red else t
-    suit = core[-1]
-    rank = int(core[:-1])
-    return (suit, rank, is_red)
+    try:
+        return _PARSED[t]
+    except KeyError:
+        raise ValueError(f"Unknown tile {t!r}") from None
 
 def is_honor(t: Tile) -> bool:
     return t in HONORS
@@ -135,19 +139,9 @@ def hand_cuts(river: Iterable[RiverItem]) -> List[Tile]:
 # ------------------------------
 # ドラ関連
 # ------------------------------
-def _dora_next_number(n: int) -> int:
-    return 1 if n == 9 else n + 1
-
 def indicator_to_dora(ind: Tile) -> Tile:
     """ドラ表示牌 -> ドラ"""
-    if ind in HONORS:
-        order = ["E", "S", "W", "N"] if ind in {"E", "S", "W", "N"} else ["P", "F", "C"]
-        i = order.index(ind)
-        return order[(i + 1) % len(order)]
-    s, r, _ = parse_tile(ind)
-    if r is None:
-        return ind
-    return f"{_dora_next_number(r)}{s}"
+    return tiles.MJAI[tiles.DORA_NEXT[tiles.FROM_MJAI[ind]]]
 
 def expand_dora_numbers(dora_inds: Optional[List[Tile]]) -> Dict[str, Set[int]]:
     """
@@ -158,10 +152,9 @@ def expand_dora_numbers(dora_inds: Optional[List[Tile]]) -> Dict[str, Set[int]]:
     if not dora_inds:
         return by
     for ind in dora_inds:
-        d = indicator_to_dora(ind)
-        s, r, _ = parse_tile(d)
-        if r is not None and s in SUITS:
-            by[s].add(r)
+        d = tiles.DORA_NEXT[tiles.FROM_MJAI[ind]]
+        if not tiles.IS_HONOR[d]:
+            by[tiles.SUIT_CHARS[tiles.SUIT[d]]].add(tiles.RANK[d])
     return by
 
 # ------------------------------
@@ -312,16 +305,17 @@ def sequence_confidence(opp_hand_cuts_list: List[Tile]) -> float:
 # ------------------------------
 # コンテキスト & 総合危険度
 # ------------------------------
-@dataclass
+@dataclass(slots=True)
 class SafetyContext:
     riichi_flags: List[bool]
-    rivers: Dict[int, List[Union[Tile, RiverItem]]]
+    rivers: Mapping[int, Sequence[Union[Tile, RiverItem]]]
     my_index: int
     remaining_tiles: int
     dealer: int
-    dora_indicators: Optional[List[Tile]] = None
+    dora_indicators: Optional[Sequence[Tile]] = None
     my_tiles: Optional[List[Tile]] = None
-    riichi_early_turns: Optional[Dict[int, int]] = None  # actor->宣言順目（小さいほど早い）
+    riichi_early_turns: Optional[Mapping[int, int]] = None  # actor->宣言順目（小さいほど早い）
+    visibility: Optional["VisibilityView"] = None  # 差分更新済みの河集計（None なら rivers から作る）
     # 早い親リーチ補正
     early_dealer_riichi_boost_at: int = int(os.getenv("AKAGI_EARLY_DEALER_RIICHI_TURN", "8"))
     early_dealer_riichi_add: float = float(os.getenv("AKAGI_EARLY_DEALER_RIICHI_ADD", "0.10"))
@@ -418,3 +412,280 @@ def bucketize(d: float) -> str:
     if d <= 0.7: return "MID"
     if d <= 1.1: return "HIGH"
     return "VHIGH"
+
+
+# ------------------------------
+# ベクトル化版（37種を一括評価）
+# ------------------------------
+# 1m..9m, 1p..9p, 1s..9s, 字牌7種, 赤5m/5p/5s（tiles の id 順）
+TILE_KINDS: Tuple[Tile, ...] = tiles.MJAI
+TILE_INDEX: Dict[Tile, int] = tiles.FROM_MJAI
+_SUIT_OF = np.array([-1 if h else s for s, h in zip(tiles.SUIT, tiles.IS_HONOR)])
+_RANK_OF = np.array([0 if h else r for r, h in zip(tiles.RANK, tiles.IS_HONOR)])
+_IS_HONOR = _SUIT_OF < 0
+_IS_NUMBER = ~_IS_HONOR
+_IS_RED = np.arange(len(TILE_KINDS)) >= 34
+_SUIT_IDX = np.where(_IS_HONOR, 0, _SUIT_OF)  # 字牌は 0 行を参照し、結果をマスクする
+_IS_YAKUHAI = np.isin(np.array(TILE_KINDS), ["P", "F", "C"])
+_URASUJI = {6: 3, 7: 4, 8: 5, 3: 6, 4: 7, 5: 8, 2: 5, 1: 4, 9: 6}
+
+
+def _kind_counts(tiles: Iterable[Tile]) -> np.ndarray:
+    counts = np.zeros(len(TILE_KINDS), dtype=np.int64)
+    for t in tiles:
+        counts[TILE_INDEX[t]] += 1
+    return counts
+
+def _rank_table(counts: np.ndarray) -> np.ndarray:
+    """37種の枚数 -> スート別の数字枚数 (3, 11)、赤は通常の5に合算"""
+    table = np.zeros((3, 11), dtype=np.int64)
+    np.add.at(table, (_SUIT_IDX[_IS_NUMBER], _RANK_OF[_IS_NUMBER]), counts[_IS_NUMBER])
+    return table
+
+def _kabe_vector(visible: np.ndarray, endgame_boost: float) -> np.ndarray:
+    # kabe_bonus と同じ順序で加算する（浮動小数の結果を一致させるため）
+    v = visible[_SUIT_IDX]
+    r = _RANK_OF
+    bonus = np.zeros(len(TILE_KINDS))
+    bonus += np.where((v[:, 1] >= 4) & (r == 2), 0.25, 0.0)
+    bonus += np.where((v[:, 9] >= 4) & (r == 8), 0.25, 0.0)
+    for n in range(2, 9):
+        bonus += np.where((v[:, n] >= 4) & (np.abs(r - n) == 1), 0.15, 0.0)
+    return np.where(_IS_NUMBER, bonus, 0.0) * endgame_boost
+
+def _no_chance_vector(visible: np.ndarray, remaining_tiles: int) -> np.ndarray:
+    v = visible[_SUIT_IDX]
+    r = _RANK_OF
+    add = np.zeros(len(TILE_KINDS))
+    add += np.where((r == 2) & (v[:, 1] >= 4) & ((v[:, 3] + v[:, 4]) >= 3), 0.08, 0.0)
+    add += np.where((r == 8) & (v[:, 9] >= 4) & ((v[:, 6] + v[:, 7]) >= 3), 0.08, 0.0)
+    if remaining_tiles <= 14:
+        add *= 1.5
+    return np.where(_IS_NUMBER, add, 0.0)
+
+def _red_vector() -> np.ndarray:
+    near_five = _IS_NUMBER & np.isin(_RANK_OF, [4, 5, 6])
+    return np.where(_IS_RED, 0.20, np.where(near_five, 0.05, 0.0))
+
+_RED_PRESSURE = _red_vector()
+
+def _dora_vector(dora_by_suit: Dict[str, Set[int]]) -> np.ndarray:
+    # 添字 rank+2 で ±2 まで範囲外を気にせず引けるようにする
+    table = np.zeros((3, 14), dtype=bool)
+    for si, s in enumerate(SUITS):
+        for r in dora_by_suit.get(s, set()):
+            table[si, r + 2] = True
+    row, r = table[_SUIT_IDX], _RANK_OF + 2
+    idx = np.arange(len(TILE_KINDS))
+    near = row[idx, r] | row[idx, r - 1] | row[idx, r + 1]
+    far = row[idx, r - 2] | row[idx, r + 2]
+    return np.where(_IS_NUMBER, np.where(near, 0.10, np.where(far, 0.15, 0.0)), 0.0)
+
+def _danger_against_player_vector(seat: int,
+                                  vis: "VisibilityView",
+                                  kabe: np.ndarray,
+                                  no_chance: np.ndarray,
+                                  opp_turn_riichi: Optional[int],
+                                  is_dealer: bool,
+                                  ctx: SafetyContext) -> np.ndarray:
+    """
+    danger_against_player を37種まとめて計算。
+    """
+    base = np.full(len(TILE_KINDS), 1.0)
+    base = np.where(
+        vis.suji[seat],
+        base - 0.35 * min(vis.seq_conf[seat], 1.3),
+        np.where(vis.urasuji[seat], base + 0.15, base),
+    )
+    base = base - kabe
+    base = base - no_chance
+    base = base + _RED_PRESSURE
+    base = base + vis.dora
+    if is_dealer and opp_turn_riichi is not None:
+        if opp_turn_riichi <= ctx.early_dealer_riichi_boost_at:
+            base = base + ctx.early_dealer_riichi_add
+    base = np.maximum(0.0, np.minimum(1.6, base))
+    return np.where(vis.genbutsu[seat], 0.0, base)
+
+def _honor_bonus_vector(vis: "VisibilityView", my_counts: np.ndarray,
+                        genbutsu_any: np.ndarray, ctx: SafetyContext) -> np.ndarray:
+    seen = vis.river_total + my_counts
+    bonus = np.full(len(TILE_KINDS), HONOR_BASE_BONUS)
+    bonus = np.where(seen >= 3, bonus + HONOR_SEEN3_BONUS, np.where(seen >= 2, bonus + HONOR_SEEN2_BONUS, bonus))
+    if ctx.remaining_tiles <= 14:
+        bonus = bonus * HONOR_ENDGAME_BOOST
+    if ctx.dora_indicators:
+        bonus = np.where(vis.dora_indicator, bonus - HONOR_DORA_PENALTY, bonus)
+    bonus = np.where(_IS_YAKUHAI & (vis.river_total == 0), bonus - HONOR_YAKUHAI_UNSEEN_PENAL, bonus)
+    bonus = np.maximum(0.0, bonus)
+    return np.where(_IS_HONOR & ~genbutsu_any, bonus, 0.0)
+
+def danger_vector(ctx: SafetyContext) -> np.ndarray:
+    """
+    aggregate_danger を TILE_KINDS の37種について一括計算する。
+    河の集計は ctx.visibility（無ければ ctx.rivers から1回だけ作る）を使い、
+    値はスカラー版と同じ演算順で求める。
+
+    :return: shape (37,)、`TILE_INDEX[tile]` で引く
+    """
+    vis = ctx.visibility if ctx.visibility is not None else TableVisibility.from_context(ctx).view()
+    my_counts = _kind_counts(ctx.my_tiles) if ctx.my_tiles else np.zeros(len(TILE_KINDS), dtype=np.int64)
+    visible = vis.river_ranks + _rank_table(my_counts)
+
+    riichi_players = [i for i, riichi in enumerate(ctx.riichi_flags) if riichi]
+    if not riichi_players:
+        # 平場: 壁/ドラ/赤のみ軽く
+        base = np.maximum(0.0, 0.7 - _kabe_vector(visible, 1.0))
+        base = base + vis.dora * 0.5
+        base = base + _RED_PRESSURE * 0.5
+        return np.maximum(0.0, np.minimum(1.2, base))
+
+    kabe = _kabe_vector(visible, 1.3 if ctx.remaining_tiles <= 14 else 1.0)
+    no_chance = _no_chance_vector(visible, ctx.remaining_tiles)
+    per = []
+    genbutsu_any = np.zeros(len(TILE_KINDS), dtype=bool)
+    for i in riichi_players:
+        opp_turn = None if ctx.riichi_early_turns is None else ctx.riichi_early_turns.get(i)
+        per.append(_danger_against_player_vector(i, vis, kabe, no_chance, opp_turn, i == ctx.dealer, ctx))
+        genbutsu_any |= vis.genbutsu[i]
+
+    d = np.max(per, axis=0)
+    # 複数立直で +補正
+    if len(riichi_players) >= 2:
+        d = d + 0.15
+    # 終盤 +補正
+    if ctx.remaining_tiles <= 18:
+        d = d + 0.15
+    # 字牌現物ボーナス
+    d = np.maximum(0.0, d - _honor_bonus_vector(vis, my_counts, genbutsu_any, ctx))
+    return np.maximum(0.0, np.minimum(1.8, d))
+
+# ------------------------------
+# 河/見え枚数の差分トラッカー
+# ------------------------------
+SEATS = 4
+# (スート, 数字) -> 該当する牌種（5 は通常と赤の2種）
+_KINDS_OF: Dict[Tuple[int, int], List[int]] = {}
+for _i in range(len(TILE_KINDS)):
+    if _IS_NUMBER[_i]:
+        _KINDS_OF.setdefault((int(_SUIT_OF[_i]), int(_RANK_OF[_i])), []).append(_i)
+
+def _readonly(a: np.ndarray) -> np.ndarray:
+    v = a.view()
+    v.flags.writeable = False
+    return v
+
+@dataclass(frozen=True)
+class VisibilityView:
+    """
+    TableVisibility の読み取り専用ビュー（コピーなし）。
+    次のイベントが反映されるまでの間だけ有効。
+    """
+    version: int
+    river_counts: np.ndarray    # (4, 37) 各家の河の牌種別枚数
+    river_total: np.ndarray     # (37,) 全員の河の合計
+    river_ranks: np.ndarray     # (3, 11) 河の数牌のスート別枚数（赤は5に合算）
+    meld_counts: np.ndarray     # (4, 37) 副露で晒した牌（危険度では未使用）
+    genbutsu: np.ndarray        # (4, 37) bool 現物
+    suji: np.ndarray            # (4, 37) bool 手出しのスジ
+    urasuji: np.ndarray         # (4, 37) bool 手出しの裏筋（スジが優先）
+    seq_conf: Tuple[float, ...]  # 各家の sequence_confidence
+    dora: np.ndarray            # (37,) dora_pressure
+    dora_indicator: np.ndarray  # (37,) bool ドラ表示牌
+
+class TableVisibility:
+    """
+    河・副露・ドラ表示から危険度の特徴量を打牌ごとに O(1) で更新する。
+    対局開始で reset、局開始で reset_rivers し、dahai/nukidora は discard、
+    副露は meld、ドラ表示は add_dora で反映する。
+    """
+    def __init__(self):
+        self.version = 0
+        self.reset()
+
+    def reset(self) -> None:
+        n = len(TILE_KINDS)
+        self.dora_indicators: List[Tile] = []
+        self.dora = np.zeros(n)
+        self.dora_indicator = np.zeros(n, dtype=bool)
+        self.reset_rivers()
+
+    def reset_rivers(self) -> None:
+        n = len(TILE_KINDS)
+        self.river_counts = np.zeros((SEATS, n), dtype=np.int64)
+        self.river_total = np.zeros(n, dtype=np.int64)
+        self.river_ranks = np.zeros((3, 11), dtype=np.int64)
+        self.meld_counts = np.zeros((SEATS, n), dtype=np.int64)
+        self.genbutsu = np.zeros((SEATS, n), dtype=bool)
+        self.suji = np.zeros((SEATS, n), dtype=bool)
+        self.urasuji = np.zeros((SEATS, n), dtype=bool)
+        self.hand_cuts: List[List[Tile]] = [[] for _ in range(SEATS)]
+        self.seq_conf = [1.0] * SEATS
+        self._touch()
+
+    def _touch(self) -> None:
+        self.version += 1
+        self._view: Optional[VisibilityView] = None
+
+    def discard(self, actor: int, tile: Tile, tsumogiri: bool) -> None:
+        i = TILE_INDEX.get(tile)
+        if i is not None:
+            self.river_counts[actor, i] += 1
+            self.river_total[i] += 1
+            self.genbutsu[actor, i] = True
+            if _IS_NUMBER[i]:
+                si, r = int(_SUIT_OF[i]), int(_RANK_OF[i])
+                self.river_ranks[si, r] += 1
+                if not tsumogiri:
+                    for partner in suji_partner_ranks(r):
+                        self.suji[actor, _KINDS_OF[(si, partner)]] = True
+                    self.urasuji[actor, _KINDS_OF[(si, _URASUJI[r])]] = True
+        if not tsumogiri:
+            self.hand_cuts[actor].append(tile)
+            self.seq_conf[actor] = sequence_confidence(self.hand_cuts[actor])
+        self._touch()
+
+    def meld(self, actor: int, tiles: Iterable[Tile]) -> None:
+        for t in tiles:
+            i = TILE_INDEX.get(t)
+            if i is not None:
+                self.meld_counts[actor, i] += 1
+        self._touch()
+
+    def add_dora(self, indicator: Tile) -> None:
+        self.dora_indicators.append(indicator)
+        self.dora = _dora_vector(expand_dora_numbers(self.dora_indicators))
+        i = TILE_INDEX.get(indicator)
+        if i is not None:
+            self.dora_indicator[i] = True
+        self._touch()
+
+    def view(self) -> VisibilityView:
+        if self._view is None:
+            self._view = VisibilityView(
+                version=self.version,
+                river_counts=_readonly(self.river_counts),
+                river_total=_readonly(self.river_total),
+                river_ranks=_readonly(self.river_ranks),
+                meld_counts=_readonly(self.meld_counts),
+                genbutsu=_readonly(self.genbutsu),
+                suji=_readonly(self.suji),
+                urasuji=_readonly(self.urasuji),
+                seq_conf=tuple(self.seq_conf),
+                dora=_readonly(self.dora),
+                dora_indicator=_readonly(self.dora_indicator),
+            )
+        return self._view
+
+    @classmethod
+    def from_context(cls, ctx: SafetyContext) -> "TableVisibility":
+        """ctx.rivers / ctx.dora_indicators から一括で作る（トラッカーを持たない呼び出し元用）"""
+        table = cls()
+        for seat, river in ctx.rivers.items():
+            for x in river:
+                # 旧形式([tile,...])は“手出し扱い”
+                tile, tsumogiri = x if isinstance(x, tuple) else (x, False)
+                table.discard(seat, tile, tsumogiri)
+        for ind in ctx.dora_indicators or ():
+            table.add_dora(ind)
+        return table
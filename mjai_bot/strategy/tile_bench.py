@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+牌の整数テーブル (mjai_bot/tiles.py) へ移植した戦略コードと、移植前の文字列処理の比較ベンチ。
+
+    python -m mjai_bot.strategy.tile_bench [log_dir] [--contexts N] [--repeat N]
+
+danger_bench と同じ局面（ログのツモ時点、未指定なら乱数）を、移植した入口ごとに
+新旧両方で再生し、結果の一致と時間を比べる。
+
+- danger: 打牌候補ごとの aggregate_danger と danger_vector。旧方式は safety の
+  parse_tile / indicator_to_dora / expand_dora_numbers を移植前の実装に差し替えて測る。
+- chi: AkagiBot._chi_consumes（find_chi_consume_simple）と移植前の f-string 版。
+  各他家の最後の数牌の打牌を、ツモ前の手牌でチーする形として数える。
+- majiang: majiang_ai_port の to_base_tile / is_red5 / tile_neighbors / tile_nexts を
+  手牌の全牌に。
+"""
+from __future__ import annotations
+import sys
+import time
+import pathlib
+import argparse
+import contextlib
+import dataclasses
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Set
+from .. import tiles
+from .. import majiang_ai_port as mj
+from ..bot import AkagiBot
+from . import safety
+from .safety import SafetyContext, HONORS, SUITS, aggregate_danger, danger_vector, only_tiles
+from .danger_bench import log_contexts, random_contexts
+
+
+# ------------------------------
+# 移植前の実装（比較用）
+# ------------------------------
+def _str_parse_tile(t):
+    if t in HONORS:
+        return (t, None, False)
+    is_red = t.endswith("r")
+    core = t[:-1] if is_red else t
+    suit = core[-1]
+    rank = int(core[:-1])
+    return (suit, rank, is_red)
+
+def _str_indicator_to_dora(ind):
+    if ind in HONORS:
+        order = ["E", "S", "W", "N"] if ind in {"E", "S", "W", "N"} else ["P", "F", "C"]
+        i = order.index(ind)
+        return order[(i + 1) % len(order)]
+    s, r, _ = _str_parse_tile(ind)
+    if r is None:
+        return ind
+    return f"{1 if r == 9 else r + 1}{s}"
+
+def _str_expand_dora_numbers(dora_inds):
+    by: Dict[str, Set[int]] = {s: set() for s in SUITS}
+    if not dora_inds:
+        return by
+    for ind in dora_inds:
+        d = _str_indicator_to_dora(ind)
+        s, r, _ = _str_parse_tile(d)
+        if r is not None and s in SUITS:
+            by[s].add(r)
+    return by
+
+@contextlib.contextmanager
+def string_tiles() -> Iterator[None]:
+    """safety の牌処理を移植前の文字列版に一時的に差し替える"""
+    names = ("parse_tile", "indicator_to_dora", "expand_dora_numbers")
+    saved = {name: getattr(safety, name) for name in names}
+    safety.parse_tile = _str_parse_tile
+    safety.indicator_to_dora = _str_indicator_to_dora
+    safety.expand_dora_numbers = _str_expand_dora_numbers
+    try:
+        yield
+    finally:
+        for name, fn in saved.items():
+            setattr(safety, name, fn)
+
+def _str_chi_consumes(pos) -> List[List[str]]:
+    chi_candidates = []
+    color = pos.last_kawa_tile[1]
+    chi_num = int(pos.last_kawa_tile[0])
+    tehai_mjai = pos.tehai_mjai
+    for allowed, (da, db) in ((pos.can_chi_high, (-2, -1)), (pos.can_chi_mid, (-1, 1)), (pos.can_chi_low, (1, 2))):
+        a, b = f"{chi_num+da}{color}", f"{chi_num+db}{color}"
+        if allowed and f"{a}r" in tehai_mjai and b in tehai_mjai:
+            chi_candidates.append([f"{a}r", b])
+        if allowed and a in tehai_mjai and f"{b}r" in tehai_mjai:
+            chi_candidates.append([a, f"{b}r"])
+        if allowed and a in tehai_mjai and b in tehai_mjai:
+            chi_candidates.append([a, b])
+    return chi_candidates
+
+def _str_is_red5(t):
+    return len(t) == 3 and t.endswith('r') and t[0] in mj.SUITS and t[1] == '5'
+
+def _str_to_base_tile(t):
+    return f"{t[0]}5" if _str_is_red5(t) else t
+
+def _str_offsets(t, deltas):
+    s, n = t[0], int(t[1])
+    if s in mj.HONORS:
+        return []
+    return [f"{s}{n + d}" for d in deltas if 1 <= n + d <= 9]
+
+def _str_tile_nexts(t):
+    return _str_offsets(t, (-2, -1, 1, 2))
+
+def _str_tile_neighbors(t):
+    return _str_offsets(t, (-1, 1))
+
+
+# ------------------------------
+# 入口ごとの新旧
+# ------------------------------
+class ChiPosition(object):
+    """_chi_consumes が読む AkagiBot の属性だけを持つ局面"""
+    CHI_SHAPES = AkagiBot.CHI_SHAPES
+    can_chi_low = can_chi_mid = can_chi_high = True
+
+    def __init__(self, last_kawa_tile: str, tehai_mjai: List[str]):
+        self.last_kawa_tile = last_kawa_tile
+        self.tehai_mjai = tehai_mjai
+
+def chi_positions(ctx: SafetyContext) -> List[ChiPosition]:
+    hand = ctx.my_tiles[:-1]
+    out = []
+    for seat, river in ctx.rivers.items():
+        discards = only_tiles(river)
+        if seat != ctx.my_index and discards and discards[-1] not in HONORS:
+            out.append(ChiPosition(discards[-1], hand))
+    return out
+
+def danger(ctx: SafetyContext, candidates: List[str]):
+    """旧方式は string_tiles() の中で呼ぶ"""
+    vector = danger_vector(ctx)
+    return [aggregate_danger(t, ctx) for t in candidates], vector.tolist()
+
+def chi_old(positions: List[ChiPosition]):
+    return [_str_chi_consumes(pos) for pos in positions]
+
+def chi_new(positions: List[ChiPosition]):
+    return [[list(consumed) for _, consumed in AkagiBot._chi_consumes(pos)] for pos in positions]
+
+def majiang_old(hand: List[str]):
+    return [(_str_to_base_tile(t), _str_is_red5(t), _str_tile_neighbors(t), _str_tile_nexts(t)) for t in hand]
+
+def majiang_new(hand: List[str]):
+    return [(mj.to_base_tile(t), mj.is_red5(t), mj.tile_neighbors(t), mj.tile_nexts(t)) for t in hand]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the strategy code ported to integer tile tables with the string versions.")
+    parser.add_argument("log_dir", type=pathlib.Path, nargs="?", default=None,
+                        help="directory of mjai logs to replay (default: random positions)")
+    parser.add_argument("--contexts", type=int, default=2000, help="maximum number of positions")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions")
+    args = parser.parse_args(argv)
+
+    source = log_contexts(args.log_dir) if args.log_dir else random_contexts(args.contexts)
+    contexts: List[SafetyContext] = []
+    for ctx in source:
+        if ctx.my_tiles:
+            # ログ再生のビューは次の局面で書き換わるので rivers から組み直す方を使う
+            contexts.append(ctx if ctx.visibility is None else dataclasses.replace(ctx, visibility=None))
+        if len(contexts) >= args.contexts:
+            break
+    if not contexts:
+        print(f"No positions found in {args.log_dir}")
+        return 1
+
+    # 入口名 -> (旧, 旧を動かす環境, 新, 局面ごとの引数)
+    entries: Dict[str, tuple[Callable, Callable[[], ContextManager], Callable, list]] = {
+        "danger": (danger, string_tiles, danger,
+                   [(ctx, list(dict.fromkeys(ctx.my_tiles))) for ctx in contexts]),
+        "chi": (chi_old, contextlib.nullcontext, chi_new, [(chi_positions(ctx),) for ctx in contexts]),
+        "majiang": (majiang_old, contextlib.nullcontext, majiang_new,
+                    [([tiles.MAJIANG[tiles.FROM_MJAI[t]] for t in ctx.my_tiles],) for ctx in contexts]),
+    }
+    n = len(contexts)
+    print(f"positions:       {n}")
+    failed = False
+    for name, (old, old_env, new, inputs) in entries.items():
+        with old_env():
+            old_results = [old(*args_) for args_ in inputs]
+        mismatches = sum(1 for args_, expected in zip(inputs, old_results) if new(*args_) != expected)
+        failed |= mismatches > 0
+        timings: Dict[str, float] = {}
+        for label, fn, env in (("old", old, old_env), ("new", new, contextlib.nullcontext)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                with env():
+                    start = time.perf_counter()
+                    for args_ in inputs:
+                        fn(*args_)
+                    best = min(best, time.perf_counter() - start)
+            timings[label] = best
+        print(f"{name}:")
+        print(f"  mismatches:    {mismatches}")
+        print(f"  string (old):  {timings['old'] / n * 1e6:.1f}us / position")
+        print(f"  table (new):   {timings['new'] / n * 1e6:.1f}us / position")
+        print(f"  speedup:       {timings['old'] / max(timings['new'], 1e-12):.2f}x")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
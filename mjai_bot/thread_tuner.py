@@ -0,0 +1,293 @@
+"""
+Torch CPU thread tuning for the mortal engines.
+
+The first CPU load of a checkpoint on a machine benchmarks react_batch over
+candidate intra-op thread counts, once per inter-op setting. Inter-op
+threads can only be set once per process, so every inter-op candidate is
+measured in its own subprocess:
+
+    python -m mjai_bot.thread_tuner --model mortal --interop 1
+
+The fastest configuration (by p50) is stored in thread_profile.json, keyed
+by machine, checkpoint sha256 and engine variant (fused, int8, onnx), and
+applied on later starts. For the onnx variant the candidates are applied to
+the onnxruntime session, which does not use torch's threads. A failed
+tuning run is stored as well and not retried for that checkpoint; delete
+its entry to tune again. Within a process the profile of each bot package
+and checkpoint is resolved once.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import pathlib
+import argparse
+import platform
+import importlib
+import threading
+import subprocess
+import numpy as np
+from datetime import datetime
+from typing import Optional
+from .logger import logger
+
+PROFILE_FILE = pathlib.Path(__file__).parent / "thread_profile.json"
+INTEROP_CANDIDATES = (1, 2)
+BENCH_WARMUP_RUNS = 5
+BENCH_RUNS = 50
+BENCH_TIMEOUT = 600
+
+# Profile applied for each bot package ("mortal", "mortal3p"), shown in the TUI
+applied_profiles: dict[str, dict] = {}
+_profile_lock = threading.Lock()
+# (package, checkpoint path, size, mtime, variant) -> resolved profile, None if untuned
+_resolved: dict[tuple, Optional[dict]] = {}
+# Profile whose thread counts are currently set on torch
+_current: Optional[dict] = None
+
+
+def machine_id() -> str:
+    return f"{platform.node()}|{platform.machine()}|{platform.processor()}|{os.cpu_count()}"
+
+
+def candidate_threads() -> list[int]:
+    cpus = os.cpu_count() or 1
+    candidates = {cpus, max(1, cpus // 2)}
+    n = 1
+    while n <= cpus:
+        candidates.add(n)
+        n *= 2
+    return sorted(candidates)
+
+
+def load_profiles() -> dict:
+    if not PROFILE_FILE.exists():
+        return {"checkpoints": {}, "profiles": {}, "failures": {}}
+    with open(PROFILE_FILE, "r") as f:
+        return json.load(f)
+
+
+def save_profiles(data: dict) -> None:
+    tmp_path = PROFILE_FILE.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    tmp_path.replace(PROFILE_FILE)
+
+
+def checkpoint_sha256(path: pathlib.Path, data: dict) -> str:
+    """
+    sha256 of a checkpoint, memoised in `data` by path, size and mtime.
+    """
+    path = pathlib.Path(path).resolve()
+    stat = path.stat()
+    memo = data.setdefault("checkpoints", {}).get(str(path))
+    if memo and memo["size"] == stat.st_size and memo["mtime_ns"] == stat.st_mtime_ns:
+        return memo["sha256"]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            digest.update(chunk)
+    data["checkpoints"][str(path)] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+    return digest.hexdigest()
+
+
+def benchmark(engine, obs_shape: tuple, action_space: int, threads: int) -> tuple[float, float]:
+    """
+    Time single-observation react_batch calls with `threads` intra-op threads.
+
+    :return: (p50, p99) in milliseconds
+    """
+    import torch
+    torch.set_num_threads(threads)
+    obs = [(np.random.rand(*obs_shape) > 0.5).astype(np.float32)]
+    masks = [np.ones(action_space, dtype=bool)]
+    for _ in range(BENCH_WARMUP_RUNS):
+        engine.react_batch_local(obs, masks, None)
+    times = []
+    for _ in range(BENCH_RUNS):
+        start = time.perf_counter()
+        engine.react_batch_local(obs, masks, None)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(times, 50)), float(np.percentile(times, 99))
+
+
+def run_benchmark_process(package: str, interop: int) -> list[dict]:
+    result = subprocess.run(
+        [sys.executable, "-m", "mjai_bot.thread_tuner", "--model", package, "--interop", str(interop)],
+        cwd=pathlib.Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        timeout=BENCH_TIMEOUT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"benchmark with {interop} inter-op threads failed: {result.stderr.strip()[-500:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def tune(package: str) -> dict:
+    """
+    Benchmark every inter-op and intra-op candidate for a bot package.
+
+    :return: the fastest configuration with its p50/p99
+    """
+    results = []
+    for interop in INTEROP_CANDIDATES:
+        try:
+            results.extend(run_benchmark_process(package, interop))
+        except Exception as e:
+            logger.warning(f"Thread tuning of {package}: {e}")
+    if not results:
+        raise RuntimeError(f"no thread configuration of {package} could be benchmarked")
+    # Fewer threads win ties, leaving cores to the UI and the browser
+    best = min(results, key=lambda r: (round(r["p50_ms"], 2), r["intra_op_threads"] + r["interop_threads"]))
+    return dict(best, tuned_at=datetime.now().isoformat(timespec="seconds"))
+
+
+def apply_profile(profile: dict) -> None:
+    global _current
+    if profile is _current:
+        return
+    import torch
+    torch.set_num_threads(profile["intra_op_threads"])
+    try:
+        torch.set_num_interop_threads(profile["interop_threads"])
+    except RuntimeError:
+        # Only possible once per process, before any inter-op work started
+        logger.debug("Inter-op threads already fixed for this process")
+    _current = profile
+
+
+def resolve_profile(package: str, control_state_file: pathlib.Path, enabled: bool, variant: str = "") -> Optional[dict]:
+    """
+    Look up the thread profile of this machine, checkpoint and engine variant,
+    tuning it first if there is none, tuning is enabled and it has not failed
+    before. thread_profile.json is only written when it changed.
+    """
+    data = load_profiles()
+    before = json.dumps(data, sort_keys=True)
+    key = f"{machine_id()}|{checkpoint_sha256(control_state_file, data)}"
+    if variant:
+        # Plain torch fp32 keeps the key of profiles tuned before variants existed
+        key = f"{key}|{variant}"
+    profile = data.setdefault("profiles", {}).get(key)
+    failure = data.setdefault("failures", {}).get(key)
+    if profile is None and failure is not None:
+        logger.warning(f"Thread tuning of {package} failed on {failure['failed_at']}, using default threads")
+    elif profile is None and enabled:
+        logger.info(f"Tuning torch CPU threads for {package}, this only happens once per checkpoint")
+        try:
+            profile = tune(package)
+        except Exception as e:
+            logger.error(f"Thread tuning of {package} failed: {e}")
+            data["failures"][key] = {
+                "error": str(e)[-500:],
+                "failed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+        else:
+            data["profiles"][key] = profile
+    if json.dumps(data, sort_keys=True) != before:
+        save_profiles(data)
+    return profile
+
+
+def autotune_threads(package: str, control_state_file: pathlib.Path, enabled: bool, variant: str = "") -> Optional[dict]:
+    """
+    Apply the thread profile of this machine, checkpoint and engine variant,
+    tuning it first if there is none and tuning is enabled.
+
+    The profile is resolved once per package, checkpoint and variant in a
+    process; later calls only re-apply it. Thread counts are process-wide,
+    the last loaded engine's profile wins.
+
+    :param package: bot package name, "mortal" or "mortal3p"
+    :param control_state_file: checkpoint the engine is built from
+    :param enabled: whether a missing profile may be benchmarked now
+    :param variant: engine variant as in the model cache: "", "fused", "int8" or "onnx"
+    :return: the applied profile, or None
+    """
+    path = pathlib.Path(control_state_file).resolve()
+    stat = path.stat()
+    memo_key = (package, str(path), stat.st_size, stat.st_mtime_ns, variant)
+    with _profile_lock:
+        if memo_key in _resolved:
+            profile = _resolved[memo_key]
+            first = False
+        else:
+            profile = _resolved[memo_key] = resolve_profile(package, path, enabled, variant)
+            first = True
+        if profile is None:
+            return None
+        apply_profile(profile)
+    applied_profiles[package] = profile
+    if first:
+        logger.info(
+            f"{package}: {profile['intra_op_threads']} intra-op / {profile['interop_threads']} inter-op threads "
+            f"(p50 {profile['p50_ms']:.2f} ms, p99 {profile['p99_ms']:.2f} ms)"
+        )
+    return profile
+
+
+def intra_op_threads(package: str) -> int:
+    """
+    Tuned intra-op thread count of a bot package, 0 (the runtime's default)
+    if it has no profile.
+    """
+    profile = applied_profiles.get(package)
+    return profile["intra_op_threads"] if profile else 0
+
+
+def profile_summary(package: str) -> str:
+    profile = applied_profiles.get(package)
+    if profile is None:
+        return f"CPU threads ({package}): default, not tuned"
+    return (
+        f"CPU threads ({package}): {profile['intra_op_threads']} intra-op, "
+        f"{profile['interop_threads']} inter-op | p50 {profile['p50_ms']:.2f} ms, "
+        f"p99 {profile['p99_ms']:.2f} ms"
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark react_batch over intra-op thread counts for one inter-op setting.")
+    parser.add_argument("--model", default="mortal", choices=["mortal", "mortal3p"], help="bot package to benchmark")
+    parser.add_argument("--interop", type=int, default=1, help="inter-op threads of this process")
+    args = parser.parse_args(argv)
+
+    import torch
+    from .onnx_backend import OnnxGraph
+    # Must happen before any inter-op parallel work
+    torch.set_num_interop_threads(args.interop)
+    model = importlib.import_module(f".{args.model}.model", package=__package__)
+    control_state_file = pathlib.Path(model.__file__).parent / "mortal.pth"
+    # Benchmark the engine the way load_engine builds it
+    engine = model.build_engine(
+        control_state_file,
+        torch.device("cpu"),
+        model.settings.inference.fuse,
+        model.settings.inference.precision,
+        model.settings.inference.engine_backend,
+    )
+    results = []
+    for threads in candidate_threads():
+        graph = getattr(engine, "inference_graph", None)
+        if isinstance(graph, OnnxGraph):
+            # onnxruntime ignores torch's thread count, the session takes the candidate instead
+            engine.inference_graph = OnnxGraph(graph.path, threads)
+        p50, p99 = benchmark(engine, model.obs_shape(engine.version), model.ACTION_SPACE, threads)
+        results.append({
+            "intra_op_threads": threads,
+            "interop_threads": args.interop,
+            "p50_ms": p50,
+            "p99_ms": p99,
+        })
+    print(json.dumps(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
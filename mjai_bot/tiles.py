@@ -0,0 +1,96 @@
+"""
+Compact integer tile encoding shared by the strategy code.
+
+Ids 0..33 are the 34 tile kinds (1m..9m, 1p..9p, 1s..9s, E S W N P F C)
+and 34..36 the red fives (5mr, 5pr, 5sr). Strings are converted once, at
+the mjai boundary, with `tile_id`; everything else reads the precomputed
+tables below and counts tiles in fixed-size `counts34` arrays.
+
+Both notations found in this package are accepted: mjai ("5mr", "E") and
+the majiang-ai one used by majiang_ai_port ("m5r", "z1").
+"""
+from typing import Iterable, Optional
+
+N_KINDS = 34                    # ids of count arrays, red fives fold into their base
+N_TILES = 37                    # all ids, red fives included
+SUIT_CHARS = "mps"
+HONOR_SUIT = 3
+HONOR_CHARS = "ESWNPFC"         # z1..z7
+
+MJAI: tuple[str, ...] = (
+    tuple(f"{r}{s}" for s in SUIT_CHARS for r in range(1, 10))
+    + tuple(HONOR_CHARS)
+    + tuple(f"5{s}r" for s in SUIT_CHARS)
+)
+MAJIANG: tuple[str, ...] = (
+    tuple(f"{s}{r}" for s in SUIT_CHARS for r in range(1, 10))
+    + tuple(f"z{n}" for n in range(1, 8))
+    + tuple(f"{s}5r" for s in SUIT_CHARS)
+)
+SUIT: tuple[int, ...] = tuple([i // 9 for i in range(27)] + [HONOR_SUIT] * 7 + [0, 1, 2])
+RANK: tuple[int, ...] = tuple([i % 9 + 1 for i in range(27)] + list(range(1, 8)) + [5, 5, 5])
+IS_RED: tuple[bool, ...] = tuple(i >= N_KINDS for i in range(N_TILES))
+IS_HONOR: tuple[bool, ...] = tuple(s == HONOR_SUIT for s in SUIT)
+# Red five -> its base five, identity otherwise
+BASE: tuple[int, ...] = tuple(range(N_KINDS)) + (4, 13, 22)
+# Base five -> red five
+RED: dict[int, int] = {4: 34, 13: 35, 22: 36}
+
+FROM_MJAI: dict[str, int] = {t: i for i, t in enumerate(MJAI)}
+FROM_MAJIANG: dict[str, int] = {t: i for i, t in enumerate(MAJIANG)}
+FROM_ANY: dict[str, int] = {**FROM_MJAI, **FROM_MAJIANG}
+
+
+def number_id(suit: int, rank: int) -> Optional[int]:
+    """
+    :return: id of a number tile, None for an honor suit or a rank outside 1..9
+    """
+    if suit < HONOR_SUIT and 1 <= rank <= 9:
+        return suit * 9 + rank - 1
+    return None
+
+
+def _dora_next(i: int) -> int:
+    if SUIT[i] < HONOR_SUIT:
+        return number_id(SUIT[i], RANK[i] % 9 + 1)
+    if RANK[i] <= 4:
+        return 27 + RANK[i] % 4            # E -> S -> W -> N -> E
+    return 31 + (RANK[i] - 4) % 3          # P -> F -> C -> P
+
+
+def _offsets(i: int, deltas: tuple[int, ...]) -> tuple[int, ...]:
+    ids = (number_id(SUIT[i], RANK[i] + d) for d in deltas)
+    return tuple(j for j in ids if j is not None)
+
+
+_SUJI_RANKS = {1: (4,), 2: (5,), 3: (6,), 4: (7,), 5: (2, 8), 6: (3,), 7: (4,), 8: (5,), 9: (6,)}
+
+# Indicator -> base id of the dora it shows
+DORA_NEXT: tuple[int, ...] = tuple(_dora_next(i) for i in range(N_TILES))
+# Base ids of the suji partners, of the tiles at +-1, and at -2, -1, +1, +2
+SUJI: tuple[tuple[int, ...], ...] = tuple(
+    () if IS_HONOR[i] else tuple(number_id(SUIT[i], r) for r in _SUJI_RANKS[RANK[i]])
+    for i in range(N_TILES)
+)
+NEIGHBORS: tuple[tuple[int, ...], ...] = tuple(_offsets(i, (-1, 1)) for i in range(N_TILES))
+NEXTS: tuple[tuple[int, ...], ...] = tuple(_offsets(i, (-2, -1, 1, 2)) for i in range(N_TILES))
+
+
+def tile_id(t: str) -> int:
+    """
+    :param t: tile in mjai or majiang-ai notation
+    """
+    try:
+        return FROM_ANY[t]
+    except KeyError:
+        raise ValueError(f"Unknown tile {t!r}") from None
+
+
+def counts34(tiles: Iterable[str]) -> list[int]:
+    """
+    Tile counts indexed by base id, red fives counted as their base.
+    """
+    counts = [0] * N_KINDS
+    for t in tiles:
+        counts[BASE[tile_id(t)]] += 1
+    return counts
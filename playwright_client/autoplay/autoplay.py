@@ -29,12 +29,13 @@ class AutoPlay(object):
         """
         self.client = client
 
-    def act(self, mjai_msg: dict) -> bool:
+    def act(self, mjai_msg: dict, bot=None) -> bool:
         """
         Given a MJAI message, this method processes the message and performs the corresponding action.
 
         Args:
             mjai_msg (dict): The MJAI message to process.
+            bot (AutoplayView): The bot state the message was decided on, instead of the bot set with set_bot.
 
         Returns:
             bool: True if the action was performed, False otherwise.
@@ -42,7 +43,7 @@ class AutoPlay(object):
         if not self.client.running:
             logger.error("Client is not running.")
             return False
-        points: list[Point] = self.autoplay.act(mjai_msg)
+        points: list[Point] = self.autoplay.act(mjai_msg, bot)
         if not points:
             # Maybe under riichi condition
             return True
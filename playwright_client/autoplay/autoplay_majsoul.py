@@ -134,9 +134,12 @@ TILES = [
 
 class AutoPlayMajsoul(object):
     def __init__(self):
+        # AkagiBot, or the AutoplayView captured with the decision being played
         self.bot: AkagiBot = None
 
-    def act(self, mjai_msg: dict) -> list[Point]:
+    def act(self, mjai_msg: dict, bot=None) -> list[Point]:
+        if bot is not None:
+            self.bot = bot
         if mjai_msg is None:
             return []
         logger.debug(f"Act: {mjai_msg}")
@@ -148,7 +151,10 @@ class AutoPlayMajsoul(object):
             if not self.bot.last_kawa_tile:
                 random_time = max(random_time, 4.0)
                 try:
-                    dealer = getattr(self.bot, "_AkagiBot__dealer", None)
+                    dealer = getattr(self.bot, "dealer", None)
+                    if dealer is None:
+                        state = getattr(self.bot, "state", None)
+                        dealer = state.dealer if state is not None else None
                     myid = getattr(self.bot, "player_id", None)
                     if dealer is not None and myid is not None and int(dealer) == int(myid):
                         extra = max(0.0, AKAGI_OYA_FIRST_DAHAI_EXTRA)
@@ -337,7 +343,7 @@ class AutoPlayMajsoul(object):
 
     def click_dahai(self, mjai_msg: dict) -> list[Point]:
         dahai = mjai_msg['pai']
-        tehai = self.bot.tehai_mjai
+        tehai = list(self.bot.tehai_mjai)
         tsumohai = self.bot.last_self_tsumo
         is_tsumohai = False
         if len(tehai) in [14, 11, 8, 5, 2] and tsumohai != "":
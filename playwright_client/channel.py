@@ -0,0 +1,48 @@
+import time
+import threading
+from typing import Callable, Optional
+
+
+class MessageChannel(object):
+    """
+    Hand-off of parsed mjai messages from the Playwright thread to the UI.
+
+    Producers `put` single messages or `put_batch` everything parsed from one
+    frame. The consumer takes all pending messages with one `drain`, and is
+    woken through the listener, which is called (outside the lock) only when
+    the channel goes from empty to non-empty, so a burst of frames costs one
+    wake-up.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: list[dict] = []
+        self._arrived_at: Optional[float] = None
+        self.listener: Optional[Callable[[], None]] = None
+
+    def put(self, message: dict) -> None:
+        self.put_batch([message])
+
+    def put_batch(self, messages: list[dict]) -> None:
+        if not messages:
+            return
+        with self._lock:
+            was_empty = not self._pending
+            self._pending.extend(messages)
+            if was_empty:
+                self._arrived_at = time.perf_counter()
+        listener = self.listener
+        if was_empty and listener is not None:
+            listener()
+
+    def drain(self) -> tuple[list[dict], Optional[float]]:
+        """
+        :return: all pending messages and the `time.perf_counter()` at which
+            the oldest of them arrived (None if there were none)
+        """
+        with self._lock:
+            messages, self._pending = self._pending, []
+            arrived_at, self._arrived_at = self._arrived_at, None
+        return messages, arrived_at
+
+    def empty(self) -> bool:
+        return not self._pending
@@ -10,16 +10,18 @@ logger: loguru.Logger = main_logger.bind(module="rpc_client")
 main_logger.add(log_path, level="DEBUG", filter=lambda record: record["extra"].get("module") == "rpc_client")
 
 import time
-import queue
 import asyncio
 import threading
+from typing import Callable, Optional
 from settings.settings import settings
+from .channel import MessageChannel
 from .majsoul import PlaywrightController, mjai_messages
 
 
 class Client(object):
     def __init__(self):
-        self.messages: queue.Queue[dict] = None
+        self.messages: MessageChannel = None
+        self.last_arrival: Optional[float] = None
         self.running = False
         self._thread: threading.Thread = None
         self.controller: PlaywrightController = PlaywrightController(
@@ -55,10 +57,23 @@ class Client(object):
         logger.debug(f"Sending command: {command}")
         self.controller.command_queue.put(command)
 
+    def set_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """
+        Call `listener` from the producing thread whenever new messages become
+        available, instead of polling `dump_messages`.
+        """
+        mjai_messages.listener = listener
+
     def dump_messages(self) -> list[dict]:
-        ans: list[dict] = []
-        while not self.messages.empty():
-            message = self.messages.get()
+        """
+        Take every pending message at once. The arrival time of the oldest one
+        is kept in `last_arrival` (time.perf_counter()).
+        """
+        if self.messages is None:
+            return []
+        ans, arrived_at = self.messages.drain()
+        if arrived_at is not None:
+            self.last_arrival = arrived_at
+        for message in ans:
             logger.debug(f"Message: {message}")
-            ans.append(message)
         return ans
@@ -16,6 +16,7 @@ from playwright.sync_api import (
 from email.header import Header
 from email.utils import formatdate, make_msgid, formataddr
 from .bridge import MajsoulBridge
+from .channel import MessageChannel
 from .logger import logger
 from akagi.hooks import register_page
 import os
@@ -1099,7 +1100,7 @@ class PostGameGuard:
 # フロー管理（bridge は既存実装に準拠）
 activated_flows: list[str] = []  # store all flow.id ([-1] is the recently opened)
 majsoul_bridges: dict[WebSocket, MajsoulBridge] = {}  # store all flow.id -> MajsoulBridge
-mjai_messages: queue.Queue[dict] = queue.Queue()  # store all messages
+mjai_messages: MessageChannel = MessageChannel()  # store all messages
 
 
 class PlaywrightController:
@@ -1178,6 +1179,7 @@ class PlaywrightController:
             with self.bridge_lock:
                 msgs = bridge.parse(payload)
             if msgs:
+                batch: list[dict] = []
                 for m in msgs:
                     try:
                         if isinstance(m, dict):
@@ -1191,9 +1193,11 @@ class PlaywrightController:
                             elif t == "start_game":
                                 self._started = True
                                 notify_log.info("[ws:parsed] start_game detected")
-                        mjai_messages.put(m)
+                        batch.append(m)
                     except Exception:
                         pass
+                # 1フレーム分をまとめて渡す（UI 側の起床は1回）
+                mjai_messages.put_batch(batch)
         except Exception:
             logger.error(f"[WebSocket] Error during message parsing: {traceback.format_exc()}")
 
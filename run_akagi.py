@@ -1,7 +1,6 @@
 import logging
 import sys
 from pathlib import Path
-from akagi.akagi import main
 # ===== ログ設定 =====
 # logs フォルダが無ければ作成
 Path("logs").mkdir(exist_ok=True)
@@ -17,5 +16,10 @@ logging.basicConfig(
 )
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv[1:]:
+        # import 時間の内訳を表示して終了（UI は起動しない）
+        from akagi.startup_profile import main as profile_startup
+        sys.exit(profile_startup())
+    from akagi.akagi import main
     logging.info("=== Akagi 起動 ===")
     main()
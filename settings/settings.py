@@ -9,6 +9,19 @@ from .logger import logger
 
 FILE_PATH = Path(__file__).resolve().parent
 
+# Defaults for the "inference" section, which older settings.json files lack
+INFERENCE_DEFAULTS = {
+    "cache_limit_mb": 2048,
+    "fuse": False,
+    "fuse_tolerance": 1e-3,
+    "precision": "fp32",
+    "calibration_dir": "",
+    "engine_backend": "torch",
+    "autotune": True,
+    "process": False,
+    "process_cores": [],
+}
+
 
 @dataclasses.dataclass
 class Viewport:
@@ -29,6 +42,19 @@ class OTConfig:
     api_key: str
 
 
+@dataclasses.dataclass
+class InferenceConfig:
+    cache_limit_mb: int
+    fuse: bool
+    fuse_tolerance: float
+    precision: str
+    calibration_dir: str
+    engine_backend: str
+    autotune: bool
+    process: bool
+    process_cores: list[int]
+
+
 @dataclasses.dataclass
 class Settings:
     playwright: PlaywrightConfig
@@ -37,6 +63,7 @@ class Settings:
     ot: OTConfig
     autoplay: bool
     auto_switch_model: bool
+    inference: InferenceConfig
     def update(self, settings: dict) -> None:
         """
         Update settings from a dictionary
@@ -54,6 +81,16 @@ class Settings:
         self.ot.api_key = settings["ot_server"]["api_key"]
         self.autoplay = settings["autoplay"]
         self.auto_switch_model = settings["auto_switch_model"]
+        settings = with_defaults(settings)
+        self.inference.cache_limit_mb = settings["inference"]["cache_limit_mb"]
+        self.inference.fuse = settings["inference"]["fuse"]
+        self.inference.fuse_tolerance = settings["inference"]["fuse_tolerance"]
+        self.inference.precision = settings["inference"]["precision"]
+        self.inference.calibration_dir = settings["inference"]["calibration_dir"]
+        self.inference.engine_backend = settings["inference"]["engine_backend"]
+        self.inference.autotune = settings["inference"]["autotune"]
+        self.inference.process = settings["inference"]["process"]
+        self.inference.process_cores = settings["inference"]["process_cores"]
         self.save_ot_settings()
 
     def save_ot_settings(self) -> None:
@@ -105,7 +142,18 @@ class Settings:
                     "api_key": self.ot.api_key
                 },
                 "autoplay": self.autoplay,
-                "auto_switch_model": self.auto_switch_model
+                "auto_switch_model": self.auto_switch_model,
+                "inference": {
+                    "cache_limit_mb": self.inference.cache_limit_mb,
+                    "fuse": self.inference.fuse,
+                    "fuse_tolerance": self.inference.fuse_tolerance,
+                    "precision": self.inference.precision,
+                    "calibration_dir": self.inference.calibration_dir,
+                    "engine_backend": self.inference.engine_backend,
+                    "autotune": self.inference.autotune,
+                    "process": self.inference.process,
+                    "process_cores": self.inference.process_cores
+                }
             }, f, indent=4)
         # Save the settings to the file
         logger.info(f"Saved settings to {FILE_PATH / 'settings.json'}")
@@ -155,13 +203,17 @@ def load_settings() -> Settings:
                     "api_key": "your_api_key"
                 },
                 "autoplay": False,
-                "auto_switch_model": True
+                "auto_switch_model": True,
+                "inference": dict(INFERENCE_DEFAULTS, process_cores=[])
             }, f, indent=4)
         logger.info(f"Created new settings.json with default values")
         # Load settings again
         with open(FILE_PATH / "settings.json", "r") as f:
             settings = json.load(f)
 
+    # Fill in settings added in later versions
+    settings = with_defaults(settings)
+
     # Load schema
     with open(FILE_PATH / "settings.schema.json", "r") as f:
         schema = json.load(f)
@@ -187,9 +239,37 @@ def load_settings() -> Settings:
             api_key=settings["ot_server"]["api_key"]
         ),
         autoplay=settings["autoplay"],
-        auto_switch_model=settings["auto_switch_model"]
+        auto_switch_model=settings["auto_switch_model"],
+        inference=InferenceConfig(
+            cache_limit_mb=settings["inference"]["cache_limit_mb"],
+            fuse=settings["inference"]["fuse"],
+            fuse_tolerance=settings["inference"]["fuse_tolerance"],
+            precision=settings["inference"]["precision"],
+            calibration_dir=settings["inference"]["calibration_dir"],
+            engine_backend=settings["inference"]["engine_backend"],
+            autotune=settings["inference"]["autotune"],
+            process=settings["inference"]["process"],
+            process_cores=settings["inference"]["process_cores"]
+        )
     )
 
+def with_defaults(settings: dict) -> dict:
+    """
+    Fill in missing keys of the "inference" section with INFERENCE_DEFAULTS
+
+    Args:
+        settings (dict): settings.json
+
+    Returns:
+        dict: settings.json with a complete "inference" section
+    """
+    inference = settings.get("inference")
+    if not isinstance(inference, dict):
+        inference = {}
+    merged = {key: list(value) if isinstance(value, list) else value for key, value in INFERENCE_DEFAULTS.items()}
+    merged.update(inference)
+    return {**settings, "inference": merged}
+
 def get_schema() -> dict:
     """
     Get the schema for settings.json
@@ -208,7 +288,7 @@ def get_settings() -> dict:
         dict: settings.json
     """
     with open(FILE_PATH / "settings.json", "r") as f:
-        return json.load(f)
+        return with_defaults(json.load(f))
     
 def save_settings(settings: dict) -> None:
     """
@@ -0,0 +1,55 @@
+"""
+ONNX Runtime backend against the torch path, on a small random Brain/DQN.
+
+    python -m unittest tests.test_onnx_backend
+"""
+import pathlib
+import tempfile
+import unittest
+
+try:
+    import torch
+    import onnxruntime
+    from mjai_bot.mortal.model import Brain, DQN, obs_shape, ACTION_SPACE
+    from mjai_bot.onnx_backend import (
+        EQUIVALENCE_TOLERANCE, OnnxGraph, check_equivalence, export_onnx, load_onnx_graph, onnx_path,
+    )
+except ImportError as e:
+    missing = str(e)
+else:
+    missing = None
+
+VERSION = 4
+
+
+@unittest.skipIf(missing is not None, f"ONNX backend unavailable: {missing}")
+class OnnxBackendTest(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.brain = Brain(version=VERSION, conv_channels=16, num_blocks=2).eval()
+        self.dqn = DQN(version=VERSION).eval()
+        self.obs_shape = obs_shape(VERSION)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.checkpoint = pathlib.Path(self.tmp.name) / "mortal.pth"
+        self.checkpoint.touch()
+
+    def test_exported_graph_matches_torch(self):
+        path = export_onnx(self.brain, self.dqn, self.obs_shape, ACTION_SPACE, onnx_path(self.checkpoint, VERSION))
+        for batch_size in (1, 7):
+            error = check_equivalence(OnnxGraph(path, num_threads=1), self.brain, self.dqn, self.obs_shape, ACTION_SPACE, batch_size)
+            self.assertLessEqual(error, EQUIVALENCE_TOLERANCE)
+
+    def test_load_exports_and_checks(self):
+        graph = load_onnx_graph(self.checkpoint, self.brain, self.dqn, self.obs_shape, ACTION_SPACE, num_threads=2)
+        self.assertIsNotNone(graph)
+        self.assertTrue(onnx_path(self.checkpoint, VERSION).exists())
+        self.assertEqual(graph.session.get_session_options().intra_op_num_threads, 2)
+
+    def test_oracle_models_fall_back_to_torch(self):
+        brain = Brain(version=VERSION, conv_channels=16, num_blocks=2, is_oracle=True).eval()
+        self.assertIsNone(load_onnx_graph(self.checkpoint, brain, self.dqn, self.obs_shape, ACTION_SPACE))
+
+
+if __name__ == "__main__":
+    unittest.main()